@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+# Admission control of the webhook receiver. A notification is accepted before its body is read only if:
+#   - its Content-Length is not larger than the maximum body size, else 413
+#   - its Content-Encoding, if compressed, is gzip or deflate, else 415
+#   - fewer notifications than the maximum are being received at the same time, else 503 with Retry-After
+#   - the notifications waiting for the reports and being received, with this one, are not larger than the maximum
+#     queued bytes, else 503 with Retry-After
+# The notifications larger than the streaming size, without Content-Length, or compressed, their size known only when
+# decompressed, are diverted to the streaming ingestion: saved and parsed one chunk at a time. The maximum body size
+# is also applied to the decompressed notifications, while read. The limits are for each receiver process.
+
+
+import contextlib
+import threading
+import zlib
+
+from http_compression import CONTENT_ENCODINGS, decompress_chunks
+from metrics import ADMISSION_REJECTED, IN_FLIGHT
+from proximity_stream import CHUNK_SIZE
+
+
+MAX_IN_FLIGHT = 8
+MAX_QUEUED_BYTES = 1024 * 1024 * 1024
+MAX_BODY_SIZE = 512 * 1024 * 1024
+STREAMING_SIZE = 32 * 1024 * 1024
+RETRY_AFTER = 30  # seconds
+
+
+class AdmissionRejected(Exception):
+    """
+    The notification is rejected by the admission control
+    """
+
+    def __init__(self, reason, status, retry_after=None):
+        """
+        :param reason: body_size, content_encoding, in_flight or queued_bytes
+        :param status: the HTTP status of the response, 400, 413, 415 or 503
+        :param retry_after: seconds, for the Retry-After header, or None
+        """
+        super().__init__(reason)
+        self.reason = reason
+        self.status = status
+        self.retry_after = retry_after
+
+    def response(self):
+        """
+        :return: the Flask response: body, status and headers
+        """
+        headers = {} if self.retry_after is None else {'Retry-After': str(self.retry_after)}
+        return 'Notification rejected: ' + self.reason, self.status, headers
+
+
+class AdmissionControl:
+    """
+    Limit the notifications received at the same time and the bytes waiting for the reports, the notifications
+    above the limits are rejected before their body is read
+    """
+
+    def __init__(self, max_in_flight=MAX_IN_FLIGHT, max_queued_bytes=MAX_QUEUED_BYTES, max_body_size=MAX_BODY_SIZE,
+                 streaming_size=STREAMING_SIZE, retry_after=RETRY_AFTER, queued_bytes=None):
+        """
+        :param max_in_flight: maximum number of notifications received at the same time
+        :param max_queued_bytes: maximum bytes of the notifications waiting for the reports and being received
+        :param max_body_size: maximum size of a notification, in bytes
+        :param streaming_size: the notifications larger than this size, in bytes, are streamed
+        :param retry_after: seconds, sent in the Retry-After header of the 503 responses
+        :param queued_bytes: function returning the bytes of the notifications waiting for the reports, example
+        {ReportJobs.queued_bytes}
+        """
+        self.max_in_flight = max_in_flight
+        self.max_queued_bytes = max_queued_bytes
+        self.max_body_size = max_body_size
+        self.streaming_size = streaming_size
+        self.retry_after = retry_after
+        self.queued_bytes = queued_bytes or (lambda: 0)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.receiving_bytes = 0
+
+    def reject(self, reason, status=503):
+        """
+        Count the rejected notification
+        :param reason: the reason of the rejection, example queue_full
+        :param status: 400, 413, 415 or 503, Retry-After is sent with 503
+        :return: AdmissionRejected, to raise
+        """
+        ADMISSION_REJECTED.inc(reason)
+        return AdmissionRejected(reason, status, self.retry_after if status == 503 else None)
+
+    @contextlib.contextmanager
+    def admit(self, content_length, content_encoding=None):
+        """
+        Admit a notification until the context exits
+        :param content_length: the Content-Length of the request, or None if not sent
+        :param content_encoding: gzip or deflate if the notification is compressed, or None
+        :return: context manager, True if the notification must be streamed
+        :raises AdmissionRejected: if the notification is above the limits, or its encoding not supported
+        """
+        if content_length is not None and content_length > self.max_body_size:
+            raise self.reject('body_size', 413)
+        if content_encoding is not None and content_encoding not in CONTENT_ENCODINGS:
+            raise self.reject('content_encoding', 415)
+        reserved_bytes = content_length or 0
+        with self.lock:
+            if self.in_flight >= self.max_in_flight:
+                raise self.reject('in_flight')
+            if self.queued_bytes() + self.receiving_bytes + reserved_bytes > self.max_queued_bytes:
+                raise self.reject('queued_bytes')
+            self.in_flight += 1
+            self.receiving_bytes += reserved_bytes
+            IN_FLIGHT.set(self.in_flight)
+        try:
+            yield content_length is None or content_length > self.streaming_size or content_encoding is not None
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+                self.receiving_bytes -= reserved_bytes
+                IN_FLIGHT.set(self.in_flight)
+
+    def body_chunks(self, stream, content_encoding=None, chunk_size=CHUNK_SIZE):
+        """
+        Read the body of the notification, decompressed if compressed. The notifications without Content-Length, or
+        compressed, are limited to the maximum body size while read.
+        :param stream: binary file-like object, the request stream
+        :param content_encoding: gzip or deflate if the body is compressed, or None
+        :param chunk_size: number of bytes to read at a time
+        :return: generator of chunks, bytes
+        :raises AdmissionRejected: if the body is larger than the maximum body size, or not valid for its encoding
+        """
+        chunks = iter(lambda: stream.read(chunk_size), b'')
+        if content_encoding is not None:
+            chunks = decompress_chunks(chunks, content_encoding, chunk_size)
+        size = 0
+        try:
+            for chunk in chunks:
+                size += len(chunk)
+                if size > self.max_body_size:
+                    raise self.reject('body_size', 413)
+                yield chunk
+        except zlib.error:
+            raise self.reject('content_encoding', 400)
@@ -0,0 +1,287 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+# Rebuild the reports from the saved notifications, example after the report code changed or reports were lost.
+# The sources are the segments of the notifications store, or JSON Lines logs, example the "client_proximity_data.log"
+# downloaded from the receiver. The uncompressed files are split in byte ranges, the compressed segments are one chunk
+# each, and the chunks are processed by a process pool with the same report logic as the webhook receiver.
+# The chunks are saved to {<state folder>/manifest.json} at the first run, and the progress of each chunk to
+# {<state folder>/chunk-<index>.json}: an interrupted backfill resumes at the last checkpoint of each chunk. The
+# notifications after the last checkpoint are processed again.
+# The incremental user reports are rebuilt from scratch in {<state folder>/user_reports}, the time slices processed
+# before are not skipped, and moved to {USER_REPORTS_FOLDER} when all the chunks are completed.
+
+
+import argparse
+import gzip
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+
+from config import STORE_FOLDER, TIMEZONE, SITE_TIMEZONES, REPORT_FORMAT, INCREMENTAL_REPORTS, USER_REPORTS_FOLDER
+from config import CONTACT_GRAPH_DB, OCCUPANCY_DB, OCCUPANCY_RESOLUTION
+from proximity_model import loads_payload
+from proximity_reports import create_reports
+from proximity_store import SEGMENT_FILE
+from proximity_time import TimeZones
+
+
+CHUNK_SIZE = 64 * 1024 * 1024  # bytes of each chunk of the uncompressed files
+CHECKPOINT_RECORDS = 100  # notifications processed between two checkpoints of a chunk
+READ_BUFFER = 1024 * 1024
+
+worker_settings = {}  # the report settings of the worker process, see {init_worker}
+
+
+def source_files(paths):
+    """
+    Find the files to backfill, the segments of each store folder in order, and the log files
+    :param paths: list of store folders and log files
+    :return: list of file paths
+    """
+    files = []
+    for path in paths:
+        if not os.path.isdir(path):
+            files.append(path)
+            continue
+        segments = {}
+        for filename in os.listdir(path):
+            match = SEGMENT_FILE.match(filename)
+            if match:
+                # a segment not compressed yet is read uncompressed
+                segment = int(match.group(1))
+                if segment not in segments or not filename.endswith('.gz'):
+                    segments[segment] = os.path.join(path, filename)
+        files += [segments[segment] for segment in sorted(segments)]
+    return files
+
+
+def split_chunks(files, chunk_size=CHUNK_SIZE):
+    """
+    Split the files in chunks, byte ranges of {chunk_size} for the uncompressed files, one chunk for each compressed
+    file. A chunk has the notifications starting in its byte range.
+    :param files: list of file paths
+    :param chunk_size: size of each chunk, in bytes
+    :return: list of chunks, dicts with path, start and end (offsets in the uncompressed file, end None for the end
+    of the file)
+    """
+    chunks = []
+    for path in files:
+        if path.endswith('.gz'):
+            chunks.append({'path': path, 'start': 0, 'end': None})
+            continue
+        size = os.path.getsize(path)
+        for start in range(0, max(size, 1), chunk_size):
+            chunks.append({'path': path, 'start': start, 'end': min(start + chunk_size, size)})
+    return chunks
+
+
+def open_source(path):
+    """
+    Open the file, or its compressed version if compressed since the chunks were created, example the active segment
+    of the store
+    :param path: file path
+    :return: binary file object, the offsets are in the uncompressed file
+    """
+    if not path.endswith('.gz') and not os.path.exists(path) and os.path.exists(path + '.gz'):
+        path += '.gz'
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    return open(path, 'rb', buffering=READ_BUFFER)
+
+
+def load_json(path, default=None):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+
+
+def save_json(path, data):
+    with open(path + '.tmp', 'w') as f:
+        json.dump(data, f)
+    os.replace(path + '.tmp', path)
+
+
+def replace_folder(source, destination):
+    """
+    Move the folder {source} to {destination}, the previous {destination} folder is removed
+    :param source: folder path
+    :param destination: folder path
+    :return:
+    """
+    previous = destination.rstrip(os.sep) + '.previous'
+    shutil.rmtree(previous, ignore_errors=True)
+    if os.path.exists(destination):
+        os.replace(destination, previous)
+    shutil.move(source, destination)
+    shutil.rmtree(previous, ignore_errors=True)
+
+
+def init_worker(settings):
+    """
+    Create the report settings of the worker process, the reports are not printed
+    :param settings: dict with timezones, report_format, user_reports and indexes
+    :return:
+    """
+    indexers = []
+    if settings['indexes']:
+        from contact_graph import ContactGraph
+        from occupancy import OccupancyTimeline
+        indexers = [ContactGraph(CONTACT_GRAPH_DB), OccupancyTimeline(OCCUPANCY_DB, resolution=OCCUPANCY_RESOLUTION)]
+    worker_settings.update(settings, indexers=indexers)
+    sys.stdout = open(os.devnull, 'w')
+
+
+def process_chunk(task):
+    """
+    Create the reports for the notifications of one chunk, from its last checkpoint
+    :param task: (chunk index, chunk, checkpoint file path)
+    :return: the chunk checkpoint: offset, done, records, failed and bytes processed by this run
+    """
+    index, chunk, checkpoint_path = task
+    checkpoint = load_json(checkpoint_path, {'offset': chunk['start'], 'done': False, 'records': 0, 'failed': 0})
+    checkpoint['bytes'] = 0
+    if checkpoint['done']:
+        return checkpoint
+    end = chunk['end']
+    with open_source(chunk['path']) as f:
+        offset = checkpoint['offset']
+        f.seek(offset)
+        if offset == chunk['start'] and offset > 0:
+            # the notification crossing the chunk start is processed by the previous chunk
+            f.seek(offset - 1)
+            offset += len(f.readline()) - 1
+        since_checkpoint = 0
+        while end is None or offset < end:
+            line = f.readline()
+            if not line:
+                break
+            offset += len(line)
+            checkpoint['bytes'] += len(line)
+            if line.strip():
+                try:
+                    create_reports(loads_payload(line), 1, worker_settings['indexers'], worker_settings['timezones'],
+                                   worker_settings['report_format'], worker_settings['user_reports'])
+                    checkpoint['records'] += 1
+                except Exception as error:
+                    checkpoint['failed'] += 1
+                    print('Notification at offset ' + str(offset - len(line)) + ' of ' + chunk['path'] +
+                          ' failed: ' + repr(error), file=sys.stderr)
+            since_checkpoint += 1
+            if since_checkpoint >= CHECKPOINT_RECORDS:
+                checkpoint['offset'] = offset
+                save_json(checkpoint_path, checkpoint)
+                since_checkpoint = 0
+    checkpoint.update(offset=offset, done=True)
+    save_json(checkpoint_path, checkpoint)
+    return checkpoint
+
+
+def backfill(paths, state_folder, processes, chunk_size=CHUNK_SIZE, indexes=False, restart=False):
+    """
+    Create the reports for all the notifications of the {paths}, resumed from the last checkpoints
+    :param paths: list of store folders and log files, used at the first run only
+    :param state_folder: folder of the manifest and the checkpoints
+    :param processes: number of worker processes
+    :param chunk_size: size of each chunk, in bytes, used at the first run only
+    :param indexes: if True, the contact graph and the occupancy timeline are updated too
+    :param restart: if True, the previous manifest, checkpoints and user reports are removed
+    :return: summary: chunks, records, failed, bytes, elapsed (seconds) and throughput (MB/s)
+    """
+    os.makedirs(state_folder, exist_ok=True)
+    manifest_path = os.path.join(state_folder, 'manifest.json')
+    user_reports_folder = os.path.join(state_folder, 'user_reports')
+    if restart:
+        for filename in os.listdir(state_folder):
+            if filename.endswith('.json'):
+                os.remove(os.path.join(state_folder, filename))
+        shutil.rmtree(user_reports_folder, ignore_errors=True)
+    manifest = load_json(manifest_path)
+    if manifest is None:
+        # the chunks are not changed when resumed, the notifications received later are not included
+        manifest = {'paths': paths, 'chunks': split_chunks(source_files(paths), chunk_size)}
+        save_json(manifest_path, manifest)
+    else:
+        print('Resuming the backfill of ' + ', '.join(manifest['paths']))
+    tasks = [(index, chunk, os.path.join(state_folder, 'chunk-%06d.json' % index))
+             for index, chunk in enumerate(manifest['chunks'])]
+    settings = {
+        'timezones': TimeZones(TIMEZONE, SITE_TIMEZONES), 'report_format': REPORT_FORMAT, 'indexes': indexes,
+        'user_reports': None
+    }
+    if INCREMENTAL_REPORTS and not manifest.get('completed'):
+        from user_reports import UserReports
+        settings['user_reports'] = UserReports(user_reports_folder)
+
+    start = time.monotonic()
+    summary = {'chunks': len(tasks), 'records': 0, 'failed': 0, 'bytes': 0}
+    with multiprocessing.Pool(processes, initializer=init_worker, initargs=(settings,)) as pool:
+        for done, checkpoint in enumerate(pool.imap_unordered(process_chunk, tasks), 1):
+            for key in ('records', 'failed', 'bytes'):
+                summary[key] += checkpoint[key]
+            print('Chunks: {0}/{1}, notifications: {2}, failed: {3}'.format(
+                done, len(tasks), summary['records'], summary['failed']))
+    if settings['user_reports'] is not None:
+        # the user reports rebuilt replace the previous ones, once
+        replace_folder(user_reports_folder, USER_REPORTS_FOLDER)
+        manifest['completed'] = True
+        save_json(manifest_path, manifest)
+        print('User reports rebuilt in ' + USER_REPORTS_FOLDER)
+    summary['elapsed'] = time.monotonic() - start
+    summary['throughput'] = summary['bytes'] / 1024 / 1024 / summary['elapsed'] if summary['elapsed'] else 0
+    return summary
+
+
+def main():
+    """
+    Backfill the reports from the notifications store, or from JSON Lines logs.
+    Run again with the same state folder to resume an interrupted backfill.
+    """
+    parser = argparse.ArgumentParser(description='Rebuild the reports from the saved client proximity notifications')
+    parser.add_argument('paths', nargs='*', default=[STORE_FOLDER],
+                        help='store folders or JSON Lines logs, default the notifications store')
+    parser.add_argument('--state', default='backfill', help='folder of the manifest and checkpoints')
+    parser.add_argument('--processes', type=int, default=os.cpu_count(), help='worker processes')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE // 1024 // 1024, help='chunk size, in MB')
+    parser.add_argument('--indexes', action='store_true', help='also update the contact graph and the occupancy')
+    parser.add_argument('--restart', action='store_true', help='discard the checkpoints and start again')
+    args = parser.parse_args()
+
+    summary = backfill(args.paths, args.state, args.processes, args.chunk_size * 1024 * 1024, args.indexes,
+                       args.restart)
+    print('\nChunks: {chunks}, notifications: {records}, failed: {failed}, bytes: {bytes}, '
+          'elapsed: {elapsed:.1f} s, throughput: {throughput:.1f} MB/s'.format(**summary))
+
+
+if __name__ == '__main__':
+    main()
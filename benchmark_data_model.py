@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+
+import json
+import sys
+import time
+import tracemalloc
+
+from proximity_model import loads_payload
+from synthetic_payload import make_payload
+
+
+# number of devices of the reported client, each device has 4032 time slices (14 days, 5 minutes)
+DEVICES = [1, 4]
+
+
+def measure(parse, text):
+    """
+    Parse the notification {text} and measure the memory of the parsed notification
+    :param parse: function to parse the notification
+    :param text: the notification
+    :return: the memory kept by the parsed notification (in MB), the peak memory while parsing (in MB) and the
+    execution time (in seconds)
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    webhook_json = parse(text)
+    duration = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del webhook_json
+    return current / 1024 / 1024, peak / 1024 / 1024, duration
+
+
+def main():
+    """
+    Compare the memory of a 14 days, 5 minutes resolution notification parsed to dicts, with json.loads, and parsed
+    to the compact TimeSlice and Contact model.
+    Optional command line arguments: the number of devices for each notification, example {1 4 8}
+    """
+    devices_list = [int(arg) for arg in sys.argv[1:]] or DEVICES
+    print('{0:>8} {1:>8} {2:>13} {3:>12} {4:>11} {5:>9} {6:>13} {7:>11} {8:>9}'.format(
+        'Devices', 'Slices', 'Payload (MB)', 'Dicts (MB)', 'Peak (MB)', 'Time (s)', 'Compact (MB)', 'Peak (MB)',
+        'Time (s)'))
+    for devices in devices_list:
+        text = json.dumps(make_payload(days=14, resolution=5, devices=devices))
+        slices = devices * 14 * 24 * 12
+        dicts_memory, dicts_peak, dicts_time = measure(json.loads, text)
+        compact_memory, compact_peak, compact_time = measure(loads_payload, text)
+        print('{0:>8} {1:>8} {2:>13.1f} {3:>12.1f} {4:>11.1f} {5:>9.2f} {6:>13.1f} {7:>11.1f} {8:>9.2f}'.format(
+            devices, slices, len(text) / 1024 / 1024, dicts_memory, dicts_peak, dicts_time, compact_memory,
+            compact_peak, compact_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+from config import CONTACT_GRAPH_DB, OCCUPANCY_DB, OCCUPANCY_RESOLUTION
+from contact_graph import ContactGraph
+from occupancy import OccupancyTimeline
+from report_jobs import process_payload_file
+from synthetic_payload import write_payload
+
+
+# number of devices of the reported client, each device adds ~4 MB to the notification (14 days, 5 minutes)
+DEVICES = [2, 8, 32]
+
+
+def measure(payload_path, streaming, results):
+    """
+    Create the reports for the notification {payload_path}, in a new process, and measure the peak memory. The contact
+    graph and the occupancy timeline are updated too, as by the webhook receiver, saved to a temporary folder
+    :param payload_path: path to the notification
+    :param streaming: if True, use the streaming ingestion
+    :param results: queue to send the peak memory (in MB) and the execution time (in seconds) to
+    :return:
+    """
+    os.chdir(tempfile.mkdtemp(dir=os.path.dirname(payload_path)))
+    sys.stdout = open(os.devnull, 'w')
+    indexers = [ContactGraph(CONTACT_GRAPH_DB), OccupancyTimeline(OCCUPANCY_DB, resolution=OCCUPANCY_RESOLUTION)]
+    start = time.perf_counter()
+    process_payload_file(payload_path, streaming, indexers=indexers)
+    duration = time.perf_counter() - start
+    results.put((resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, duration))
+
+
+def run(payload_path, streaming):
+    """
+    :param payload_path: path to the notification
+    :param streaming: if True, use the streaming ingestion
+    :return: the peak memory (in MB) and the execution time (in seconds)
+    """
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=measure, args=(payload_path, streaming, results))
+    process.start()
+    process.join()
+    if process.exitcode != 0:
+        raise RuntimeError('The report process failed, exit code ' + str(process.exitcode))
+    return results.get()
+
+
+def main():
+    """
+    Compare the peak memory of the json.load and the streaming ingestion, for notifications of growing size.
+    Optional command line arguments: the number of devices for each notification, example {2 8 32 64}
+    """
+    devices_list = [int(arg) for arg in sys.argv[1:]] or DEVICES
+    print('{0:>8} {1:>13} {2:>16} {3:>12} {4:>18} {5:>14}'.format(
+        'Devices', 'Payload (MB)', 'json.load (MB)', 'Time (s)', 'Streaming (MB)', 'Time (s)'))
+    for devices in devices_list:
+        with tempfile.TemporaryDirectory() as folder:
+            payload_path = os.path.join(folder, 'payload.json')
+            with open(payload_path, 'w') as f:
+                write_payload(f, devices=devices)
+            payload_size = os.path.getsize(payload_path) / 1024 / 1024
+            load_memory, load_time = run(payload_path, False)
+            stream_memory, stream_time = run(payload_path, True)
+        print('{0:>8} {1:>13.1f} {2:>16.1f} {3:>12.2f} {4:>18.1f} {5:>14.2f}'.format(
+            devices, payload_size, load_memory, load_time, stream_memory, stream_time))
+
+
+if __name__ == '__main__':
+    main()
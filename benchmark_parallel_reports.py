@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+from proximity_reports import create_reports
+from synthetic_payload import make_payload
+
+
+DEVICES = 16  # number of devices of the reported client, each device is one data set
+RUNS = 3  # the best time of {RUNS} is reported
+
+
+def main():
+    """
+    Measure the report creation time for a notification with many devices, from 1 to N worker processes.
+    Optional command line argument: the maximum number of worker processes, default the number of cores
+    """
+    max_processes = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count()
+    payload = make_payload(devices=DEVICES, contacts=500, contacts_per_slice=20)
+    print('Devices: ' + str(DEVICES) + ', cores: ' + str(os.cpu_count()))
+    print('{0:>10} {1:>10} {2:>9}'.format('Processes', 'Time (s)', 'Speedup'))
+
+    single_process_time = None
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as folder:
+        os.chdir(folder)
+        try:
+            for processes in sorted({2 ** i for i in range(max_processes.bit_length())} | {max_processes}):
+                best_time = None
+                for run in range(RUNS):
+                    payload['details']['user_name'] = 'bench-' + str(processes) + '-' + str(run)
+                    start = time.perf_counter()
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        create_reports(payload, processes)
+                    duration = time.perf_counter() - start
+                    best_time = duration if best_time is None else min(best_time, duration)
+                single_process_time = single_process_time or best_time
+                print('{0:>10} {1:>10.3f} {2:>8.2f}x'.format(processes, best_time, single_process_time / best_time))
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+import argparse
+import gzip
+import json
+import logging
+import math
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from config import WEBHOOK_USERNAME, WEBHOOK_PASSWORD
+from synthetic_payload import make_payload
+
+
+def serve(folder, ports, stop, results):
+    """
+    Run the webhook receiver in this process, in the {folder}, until {stop} is set
+    :param folder: working folder of the receiver, for the spool, the store and the reports
+    :param ports: queue to send the receiver port to
+    :param stop: event set when the benchmark is completed
+    :param results: queue to send the peak memory (in MB) to
+    :return:
+    """
+    os.chdir(folder)
+    sys.stdout = open(os.devnull, 'w')
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    from werkzeug.serving import make_server
+    import pandemic_proximity_reporting
+    server = make_server('127.0.0.1', 0, pandemic_proximity_reporting.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    ports.put(server.port)
+    stop.wait()
+    pandemic_proximity_reporting.report_jobs.queue.join()
+    server.shutdown()
+    results.put(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+
+
+def percentile(values, percent):
+    """
+    :param values: list of values
+    :param percent: percentile, example {99}
+    :return: the nearest-rank percentile of the {values}
+    """
+    values = sorted(values)
+    return values[max(0, math.ceil(percent / 100 * len(values)) - 1)]
+
+
+def main():
+    """
+    Send synthetic client proximity notifications to the webhook receiver, running in a new process, and report the
+    throughput, the p50/p99 latency of the acknowledgement and of the report jobs, and the receiver peak memory
+    """
+    parser = argparse.ArgumentParser(description='Webhook receiver load benchmark')
+    parser.add_argument('--notifications', type=int, default=20, help='number of notifications sent')
+    parser.add_argument('--concurrency', type=int, default=4, help='notifications sent at the same time')
+    parser.add_argument('--days', type=int, default=1)
+    parser.add_argument('--resolution', type=int, default=5, help='time resolution, in minutes')
+    parser.add_argument('--contacts', type=int, default=200, help='unique wireless clients in proximity')
+    parser.add_argument('--devices', type=int, default=1, help='wireless devices of the reported client')
+    parser.add_argument('--gzip', action='store_true', help='send the notifications compressed, Content-Encoding gzip')
+    args = parser.parse_args()
+
+    # each notification is for a different user, the notifications are not skipped as duplicates
+    template = json.dumps(make_payload(user_name='bench-user', days=args.days, resolution=args.resolution,
+                                       contacts=args.contacts, devices=args.devices)).encode()
+    bodies = [template.replace(b'"bench-user"', b'"bench-user-%06d"' % index) for index in range(args.notifications)]
+    headers = {'content-type': 'application/json'}
+    if args.gzip:
+        bodies = [gzip.compress(body) for body in bodies]
+        headers['content-encoding'] = 'gzip'
+    print('Notifications: {0}, size: {1:.2f} MB, sent: {2:.2f} MB, concurrency: {3}'.format(
+        args.notifications, len(template) / 1024 / 1024, len(bodies[0]) / 1024 / 1024 if bodies else 0,
+        args.concurrency))
+
+    context = multiprocessing.get_context('spawn')
+    ports, results, stop = context.Queue(), context.Queue(), context.Event()
+    with tempfile.TemporaryDirectory() as folder:
+        receiver = context.Process(target=serve, args=(folder, ports, stop, results))
+        receiver.start()
+        receiver_url = 'http://127.0.0.1:' + str(ports.get(timeout=60))
+        auth = (WEBHOOK_USERNAME, WEBHOOK_PASSWORD)
+        sessions = threading.local()
+
+        def send(body):
+            if not hasattr(sessions, 'session'):
+                sessions.session = requests.Session()
+            start = time.time()
+            response = sessions.session.post(receiver_url + '/proximity', data=body, auth=auth, headers=headers)
+            return start, time.time() - start, response.status_code, response.headers.get('Location')
+
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            sent = list(executor.map(send, bodies))
+        send_time = time.time() - start
+
+        # wait for the report jobs
+        job_latencies = []
+        session = requests.Session()
+        last_completed = start
+        statuses = {}
+        for sent_time, _, status_code, location in sent:
+            if status_code != 202:
+                continue
+            while True:
+                job = session.get(receiver_url + location, auth=auth).json()
+                if job['status'] not in ('queued', 'running'):
+                    break
+                time.sleep(0.05)
+            statuses[job['status']] = statuses.get(job['status'], 0) + 1
+            if job['status'] == 'completed':
+                job_latencies.append(job['completed'] - sent_time)
+                last_completed = max(last_completed, job['completed'])
+        stop.set()
+        peak_memory = results.get(timeout=600)
+        receiver.join()
+
+    ack_latencies = [latency for _, latency, _, _ in sent]
+    accepted = sum(1 for _, _, status_code, _ in sent if status_code == 202)
+    print('Accepted: {0}, rejected: {1}, report jobs: {2}'.format(accepted, len(sent) - accepted, statuses))
+    print('Acknowledgement throughput: {0:.1f} notifications/s, latency p50: {1:.1f} ms, p99: {2:.1f} ms'.format(
+        len(sent) / send_time, percentile(ack_latencies, 50) * 1000, percentile(ack_latencies, 99) * 1000))
+    if job_latencies:
+        print('Report throughput: {0:.1f} notifications/s, latency p50: {1:.1f} ms, p99: {2:.1f} ms'.format(
+            len(job_latencies) / (last_completed - start), percentile(job_latencies, 50) * 1000,
+            percentile(job_latencies, 99) * 1000))
+    print('Receiver peak memory: {0:.1f} MB'.format(peak_memory))
+
+
+if __name__ == '__main__':
+    main()
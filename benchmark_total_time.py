@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+import time
+
+from proximity_model import PayloadDecoder
+from proximity_reports import TotalTimeAggregator
+from synthetic_payload import make_payload
+
+
+# payload sizes to benchmark: (days, unique contacts)
+PAYLOAD_SIZES = [(1, 50), (3, 100), (7, 250), (14, 500), (14, 1000)]
+
+
+def legacy_total_time(client_info):
+    """
+    The total time report, as implemented in {proximity_webhook} before the single pass aggregation
+    :param client_info: list of time slices
+    :return: list of users, sorted by the total time in proximity
+    """
+    users_list_time = []
+    users_unique_list = set()
+    for event in client_info:
+        time_length = int(event['end_time']) - int(event['start_time'])
+        for user in event['users_info']:
+            user_updated_with_time = {**user, **{'time_length': time_length}}
+            users_list_time.append(user_updated_with_time)
+            users_unique_list.add(user['client_mac'])
+
+    users_list_total_time = []
+    for unique_user in users_unique_list:
+        total_time = 0
+        for user in users_list_time:
+            if unique_user == user['client_mac']:
+                total_time += user['time_length']
+                try:
+                    user_details = {
+                        'client_mac': user['client_mac'], 'client_user': user['client_user'],
+                        'client_type': user['client_type']
+                    }
+                except:
+                    pass
+        user_details.update({'total_time': total_time})
+        users_list_total_time.append(user_details)
+
+    return sorted(users_list_total_time, key=lambda x: x['total_time'], reverse=True)
+
+
+def aggregated_total_time(client_info):
+    """
+    The total time report, using the single pass aggregation. The time slices are converted to TimeSlice as part of
+    the report, the legacy report converts the times and reads the users from the same dicts.
+    :param client_info: list of time slices
+    :return: list of users, sorted by the total time in proximity
+    """
+    payload_decoder = PayloadDecoder()
+    aggregator = TotalTimeAggregator()
+    for time_slice in client_info:
+        aggregator.add_slice(payload_decoder.time_slice(time_slice))
+    return aggregator.report()
+
+
+def timed(function, client_info):
+    """
+    Run the {function} and measure the execution time
+    :param function: report function
+    :param client_info: list of time slices
+    :return: the report and the execution time in seconds
+    """
+    start = time.perf_counter()
+    report = function(client_info)
+    return report, time.perf_counter() - start
+
+
+def main():
+    """
+    Compare the legacy and the single pass total time aggregation, using synthetic payloads of growing size
+    """
+    print('{0:>6} {1:>9} {2:>10} {3:>12} {4:>12} {5:>9}'.format(
+        'Days', 'Contacts', 'Events', 'Legacy (s)', 'Engine (s)', 'Speedup'))
+    for days, contacts in PAYLOAD_SIZES:
+        payload = make_payload(days=days, contacts=contacts)
+        client_info = payload['details']['client_proximity'][0]['client_info']
+        events = sum(len(time_slice['users_info']) for time_slice in client_info)
+
+        legacy_report, legacy_time = timed(legacy_total_time, client_info)
+        engine_report, engine_time = timed(aggregated_total_time, client_info)
+
+        # the sort order of the clients with the same total time is not defined by the legacy report
+        if sorted(map(sorted, map(dict.items, legacy_report))) != sorted(map(sorted, map(dict.items, engine_report))):
+            raise AssertionError('The reports do not match for ' + str(days) + ' days, ' + str(contacts) + ' contacts')
+
+        print('{0:>6} {1:>9} {2:>10} {3:>12.4f} {4:>12.4f} {5:>8.1f}x'.format(
+            days, contacts, events, legacy_time, engine_time, legacy_time / engine_time))
+
+
+if __name__ == '__main__':
+    main()
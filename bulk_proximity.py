@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+import asyncio
+import random
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from dnac_client import AsyncDNACClient, RateLimitError
+
+
+CONCURRENCY = 4  # client proximity requests sent at the same time
+RETRY_DELAY = 60  # seconds, first delay after a rejected request, doubled after each rejection
+MAX_RETRY_DELAY = 600  # seconds
+MAX_ATTEMPTS = 10  # requests for each username, before the username is reported as failed
+
+
+class BulkProximityRequests:
+    """
+    Send the client proximity requests for many usernames, {concurrency} requests at a time.
+    A request rejected by the rate limit, when too many requests are running on Cisco DNA Center or with 429, is
+    requeued with an exponential backoff. The backoff is shared: no request is sent until the backoff ends. The other
+    errors are not retried, the username is reported as failed.
+    """
+
+    def __init__(self, dnac_client, days, resolution, concurrency=CONCURRENCY, retry_delay=RETRY_DELAY,
+                 max_retry_delay=MAX_RETRY_DELAY, max_attempts=MAX_ATTEMPTS):
+        """
+        :param dnac_client: DNACClient
+        :param days: how many days in the past maximum 14
+        :param resolution: minimum time that will be reported for proximity, in minutes
+        :param concurrency: maximum number of requests sent at the same time
+        :param retry_delay: first delay after a rejected request, in seconds
+        :param max_retry_delay: maximum delay after a rejected request, in seconds
+        :param max_attempts: maximum number of requests for each username
+        """
+        self.dnac_client = dnac_client
+        self.days = days
+        self.resolution = resolution
+        self.concurrency = concurrency
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.max_attempts = max_attempts
+        self.paused_until = 0
+
+    def _backoff(self, attempt):
+        # full jitter, the requeued requests are not sent again all at the same time
+        delay = min(self.max_retry_delay, self.retry_delay * 2 ** (attempt - 1))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    async def _request(self, async_client, client_username):
+        result = {'username': client_username, 'attempts': 0}
+        start = time.monotonic()
+        while True:
+            # wait for the shared backoff to end, checked just before the request is sent
+            while time.monotonic() < self.paused_until:
+                await asyncio.sleep(self.paused_until - time.monotonic())
+            result['attempts'] += 1
+            try:
+                response = await async_client.client_proximity(client_username, self.days, self.resolution)
+            except RateLimitError as rate_limit_error:
+                response = None
+                error = str(rate_limit_error)
+            except Exception as request_error:
+                result.update(status='failed', error=repr(request_error))
+                break
+            if response is not None:
+                if 'executionStatusUrl' in response:
+                    result.update(status='submitted', execution_url=response['executionStatusUrl'],
+                                  submitted=time.time())
+                    break
+                if 'bapiExtendedStatusDescription' not in response:
+                    # not a rate limit rejection, the request is not sent again
+                    result.update(status='failed', error=str(response))
+                    break
+                error = response['bapiExtendedStatusDescription']
+            if result['attempts'] >= self.max_attempts:
+                result.update(status='failed', error=error)
+                break
+            delay = self._backoff(result['attempts'])
+            print('Client proximity request for ' + client_username + ' rejected: ' + error + ', requeued in ' +
+                  str(int(delay)) + ' seconds')
+            self.paused_until = max(self.paused_until, time.monotonic() + delay)
+        result['time'] = time.monotonic() - start
+        return result
+
+    async def run_async(self, usernames):
+        """
+        Send the client proximity requests for the {usernames}
+        :param usernames: list of client usernames
+        :return: list of results for each username: username, status (submitted or failed), attempts, time (seconds),
+        execution_url and submitted (epoch time in seconds), or error
+        """
+        # one thread for each request running, the requests are sent by the DNACClient in threads
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=self.concurrency))
+        async_client = AsyncDNACClient(self.dnac_client, self.concurrency)
+        # {concurrency} workers take the next username when their request is completed, the usernames waiting are not
+        # sent during the shared backoff
+        pending = iter(enumerate(usernames))
+        results = [None] * len(usernames)
+
+        async def worker():
+            for index, client_username in pending:
+                results[index] = await self._request(async_client, client_username)
+
+        await asyncio.gather(*[worker() for _ in range(min(self.concurrency, len(usernames)))])
+        return results
+
+    def run(self, usernames):
+        """
+        Send the client proximity requests for the {usernames}, see {run_async}
+        :param usernames: list of client usernames
+        :return: results and the summary: usernames, submitted, failed, requests, elapsed (seconds) and throughput
+        (submitted requests per minute)
+        """
+        start = time.monotonic()
+        results = asyncio.run(self.run_async(usernames))
+        elapsed = time.monotonic() - start
+        submitted = sum(1 for result in results if result['status'] == 'submitted')
+        summary = {
+            'usernames': len(results), 'submitted': submitted, 'failed': len(results) - submitted,
+            'requests': sum(result['attempts'] for result in results), 'elapsed': elapsed,
+            'throughput': submitted * 60 / elapsed if elapsed else 0
+        }
+        return results, summary
+
+
+def print_results(results, summary):
+    """
+    Print the result for each username and the summary
+    :param results: see {BulkProximityRequests.run}
+    :param summary: see {BulkProximityRequests.run}
+    :return:
+    """
+    print('\n{0:30} {1:10} {2:>8} {3:>9}  {4}'.format(
+        'User', 'Status', 'Attempts', 'Time (s)', 'Execution URL / Error'))
+    for result in results:
+        print('{0:30} {1:10} {2:>8} {3:>9.1f}  {4}'.format(
+            result['username'], result['status'], result['attempts'], result['time'],
+            result.get('execution_url') or result.get('error')))
+    print('\nUsers: {usernames}, submitted: {submitted}, failed: {failed}, requests: {requests}, '
+          'elapsed: {elapsed:.1f} s, throughput: {throughput:.1f} users/min'.format(**summary))
@@ -30,10 +30,72 @@ __license__ = "Cisco Sample Code License, Version 1.1"
 # Webhook URL
 WEBHOOK_URL = 'https://webhook_url'
 
+# Webhook receiver Basic Auth
+WEBHOOK_USERNAME = 'username'
+WEBHOOK_PASSWORD = 'password'
+
+# Webhook receiver report workers
+REPORT_EXECUTOR = 'thread'  # 'thread' or 'process', where to create the reports
+REPORT_WORKERS = 4  # number of reports created at the same time
+REPORT_PROCESSES = 1  # worker processes for the wireless clients of one notification, not used for streaming
+REPORT_QUEUE_SIZE = 100  # maximum number of notifications waiting for reports, 503 returned when full
+SPOOL_FOLDER = 'spool'  # notifications are saved here until the reports are created
+STREAMING_INGESTION = False  # parse the notifications one time slice at a time, for very large notifications
+REPORT_FORMAT = 'columnar'  # 'columnar', binary with typed columns, or 'jsonl', JSON Lines with formatted times
+INCREMENTAL_REPORTS = True  # update the reports of each user in place, else a new report folder for each notification
+USER_REPORTS_FOLDER = 'user_reports'  # the report folder of each user and the aggregates database
+
+# Webhook receiver admission control, for each receiver process. Above the limits the notifications are rejected,
+# before the body is read, with 503 and Retry-After, or 413 if too large
+ADMISSION_MAX_IN_FLIGHT = 8  # notifications received at the same time
+ADMISSION_MAX_QUEUED_BYTES = 1024 * 1024 * 1024  # bytes of the notifications received and waiting for the reports
+ADMISSION_MAX_BODY_SIZE = 512 * 1024 * 1024  # bytes, maximum size of a notification
+ADMISSION_STREAMING_SIZE = 32 * 1024 * 1024  # bytes, larger notifications, or without Content-Length, are streamed
+ADMISSION_RETRY_AFTER = 30  # seconds
+
+# Webhook receiver notifications store, full details of each notification
+STORE_FOLDER = 'client_proximity_data'  # compressed segments and index
+STORE_SEGMENT_SIZE = 64 * 1024 * 1024  # segment size (in bytes) that will start a new segment
+
+# Webhook receiver contact graph, the contacts of all the notifications received
+CONTACT_GRAPH_DB = 'contact_graph.db'
+
+# Webhook receiver location occupancy timeline
+OCCUPANCY_DB = 'occupancy.db'
+OCCUPANCY_RESOLUTION = 5  # time bucket size, in minutes, same as the Proximity API time resolution
+
+# Webhook receiver deduplication, the notifications redelivered by Cisco DNA Center are skipped
+DEDUP_DB = 'dedup.db'
+DEDUP_MAX_ENTRIES = 100000  # notifications kept in the index, the oldest are removed
+
+# Webhook receiver PDF reports, "/reports/<user_name or report folder>/pdf", rendered at the first request
+PDF_CACHE_FOLDER = 'pdf_cache'
+PDF_CACHE_SIZE = 256 * 1024 * 1024  # bytes, the least recently used PDFs are removed
+
+# Webhook receiver exposure ranking, "/exposure/top", the top clients in proximity of the reported clients
+EXPOSURE_CACHE_SIZE = 128  # query results kept, cleared when new contact events are saved
+
+# Webhook receiver compressed transfers, the responses are sent with gzip to the clients accepting it
+COMPRESSION_LEVEL = 6  # 1 (fastest) to 9 (smallest)
+COMPRESSION_MIN_SIZE = 1024  # bytes, the smaller responses are not compressed
+
+# Webhook receiver report timezones, the {tz} query parameter of a notification overrides both
+TIMEZONE = 'America/Los_Angeles'  # IANA timezone name, for the locations not matching any site
+SITE_TIMEZONES = {}  # site: IANA timezone name, example {'Global/New York': 'America/New_York'}
+
 # Cisco DNA Center dnalive
 DNAC_URL = 'https://dnac_url'
 DNAC_USER = 'username'
 DNAC_PASS = 'password'
+DNAC_TOKEN_CACHE = 'dnac_token.json'  # the API token is saved here and reused until it expires
+
+# Cisco DNA Center fleet, the scripts run with "--fleet" on all the clusters at the same time, the DNAC_URL cluster if
+# none configured. The API token of each cluster is saved to "dnac_token_<name>.json"
+DNAC_CLUSTERS = [
+    # {'name': 'campus-east', 'url': 'https://dnac_east_url', 'username': 'username', 'password': 'password'},
+]
+FLEET_TIMEOUT = 45 * 60  # seconds, for each cluster, the other clusters are not stopped
+FLEET_CONCURRENCY = 8  # clusters at the same time
 
 # Proximity API config params
 DAYS = 14  # number of days to search for contact tracing
@@ -45,4 +107,17 @@ username = 'gabiz'
 EVENT_ID = 'NETWORK-CLIENTS-3-506'
 SUBSCRIPTION_NAME = 'Proximity Event Subscription'
 
+# Proximity API bulk mode, "pandemic_proximity_call.py <usernames>"
+BULK_CONCURRENCY = 4  # client proximity requests sent at the same time
+BULK_RETRY_DELAY = 60  # seconds, first delay after a rejected request, doubled after each rejection
+BULK_MAX_RETRY_DELAY = 600  # seconds
+BULK_MAX_ATTEMPTS = 10  # requests for each username, before the username is reported as failed
+
+# Proximity API execution tracking, the executions not completed are tracked again at the next run
+EXECUTIONS_FILE = 'executions.json'
+EXECUTION_POLL_INTERVAL = 5  # seconds, first delay before polling the execution status, doubled after each poll
+EXECUTION_MAX_POLL_INTERVAL = 120  # seconds
+EXECUTION_TIMEOUT = 30 * 60  # seconds, time to wait for each execution, from the time submitted or resumed
+EXECUTION_MAX_AGE = 24 * 60 * 60  # seconds, the executions not completed are not resumed after this time
+
 
@@ -0,0 +1,258 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+# The contact graph is saved to a sqlite database:
+#   clients        - the nodes, each {client_mac} with the last seen {client_user} and {client_type}
+#   contact_events - each time slice a wireless client was in proximity of a reported client, with the location
+#   contact_edges  - the total time in proximity of each pair of clients, saved in both directions
+#   contact_exposure - the running total time each wireless client was in proximity of any reported client, per hour,
+#                    for the exposure ranking, see {exposure}
+
+
+import sqlite3
+
+from proximity_model import normalize_mac
+from report_format import format_mac as format_packed_mac
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS clients (
+    client_mac TEXT PRIMARY KEY,
+    client_user TEXT,
+    client_type TEXT
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS contact_events (
+    client_mac TEXT NOT NULL,
+    contact_mac TEXT NOT NULL,
+    start_time INTEGER NOT NULL,
+    end_time INTEGER NOT NULL,
+    location TEXT,
+    PRIMARY KEY (client_mac, contact_mac, start_time)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS contact_edges (
+    client_mac TEXT NOT NULL,
+    contact_mac TEXT NOT NULL,
+    total_time INTEGER NOT NULL,
+    first_seen INTEGER NOT NULL,
+    last_seen INTEGER NOT NULL,
+    PRIMARY KEY (client_mac, contact_mac)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS contact_edges_total_time ON contact_edges (client_mac, total_time);
+CREATE TABLE IF NOT EXISTS contact_exposure (
+    bucket_start INTEGER NOT NULL,
+    contact_mac TEXT NOT NULL,
+    total_time INTEGER NOT NULL,
+    PRIMARY KEY (bucket_start, contact_mac)
+) WITHOUT ROWID;
+'''
+
+EXPOSURE_BUCKET = 60 * 60 * 1000  # msec, the contact events are added to the exposure of the hour they start in
+
+# the new contact events, the events already saved from previous notifications are not added again to the edges
+NEW_EVENTS_SCHEMA = '''
+CREATE TEMP TABLE IF NOT EXISTS new_events (
+    client_mac TEXT NOT NULL,
+    contact_mac TEXT NOT NULL,
+    start_time INTEGER NOT NULL,
+    end_time INTEGER NOT NULL,
+    location TEXT,
+    PRIMARY KEY (client_mac, contact_mac, start_time)
+) WITHOUT ROWID;
+'''
+
+UPDATE_EDGES = '''
+INSERT INTO contact_edges (client_mac, contact_mac, total_time, first_seen, last_seen)
+SELECT {0}, {1}, SUM(end_time - start_time), MIN(start_time), MAX(end_time) FROM new_events WHERE true
+GROUP BY client_mac, contact_mac
+ON CONFLICT (client_mac, contact_mac) DO UPDATE SET
+    total_time = total_time + excluded.total_time,
+    first_seen = MIN(first_seen, excluded.first_seen),
+    last_seen = MAX(last_seen, excluded.last_seen)
+'''
+
+UPDATE_EXPOSURE = '''
+INSERT INTO contact_exposure (bucket_start, contact_mac, total_time)
+SELECT start_time - start_time % ?, contact_mac, SUM(end_time - start_time) FROM {0} WHERE true
+GROUP BY 1, 2
+ON CONFLICT (bucket_start, contact_mac) DO UPDATE SET total_time = total_time + excluded.total_time
+'''
+
+
+def format_mac(mac_address):
+    """
+    Format the MAC address the same way as in the client proximity notifications
+    :param mac_address: MAC address, example {AABB.CC00.1122}
+    :return: MAC address, example {aa:bb:cc:00:11:22}
+    """
+    value = normalize_mac(mac_address)
+    return ':'.join(value[i:i + 2] for i in range(0, len(value), 2))
+
+
+class ContactGraph:
+    """
+    Contact graph of the wireless clients, updated with each client proximity notification
+    """
+
+    def __init__(self, db_path):
+        """
+        :param db_path: path to the sqlite database
+        """
+        self.db_path = db_path
+        db = self.connect()
+        try:
+            db.execute('PRAGMA journal_mode=WAL')  # the queries are not blocked by the notifications being saved
+            db.executescript(SCHEMA)
+            with db:
+                # the exposure of the contact graphs saved before the exposure ranking, added once
+                db.execute('BEGIN IMMEDIATE')
+                if db.execute('SELECT NOT EXISTS (SELECT 1 FROM contact_exposure) '
+                              'AND EXISTS (SELECT 1 FROM contact_events)').fetchone()[0]:
+                    db.execute(UPDATE_EXPOSURE.format('contact_events'), (EXPOSURE_BUCKET,))
+        finally:
+            db.close()
+
+    def connect(self):
+        """
+        Open a new connection to the database, each thread and process uses its own connection
+        :return: sqlite connection
+        """
+        return sqlite3.connect(self.db_path, timeout=60)
+
+    def client_writer(self):
+        """
+        :return: ContactGraphWriter, to add the time slices of one reported wireless client
+        """
+        return ContactGraphWriter(self)
+
+    def contacts(self, client_mac, min_time=0, degree=2):
+        """
+        Find the wireless clients in proximity of the client {client_mac}, for at least {min_time}
+        :param client_mac: MAC address of the client
+        :param min_time: minimum total time in proximity, in msec
+        :param degree: 1 for the direct contacts, 2 to add the contacts of the direct contacts
+        :return: dict with the first_degree and second_degree contacts, sorted by the total time in proximity
+        """
+        client_mac = format_mac(client_mac)
+        db = self.connect()
+        try:
+            first_degree = []
+            for contact_mac, total_time, first_seen, last_seen, client_user, client_type in db.execute(
+                    'SELECT e.contact_mac, e.total_time, e.first_seen, e.last_seen, c.client_user, c.client_type '
+                    'FROM contact_edges e LEFT JOIN clients c ON c.client_mac = e.contact_mac '
+                    'WHERE e.client_mac = ? AND e.total_time >= ? ORDER BY e.total_time DESC',
+                    (client_mac, min_time)):
+                first_degree.append({
+                    'client_mac': contact_mac, 'client_user': client_user, 'client_type': client_type,
+                    'total_time': total_time, 'first_seen': first_seen, 'last_seen': last_seen
+                })
+
+            second_degree = {}
+            if degree >= 2:
+                excluded = {client_mac} | {contact['client_mac'] for contact in first_degree}
+                for contact_mac, via_mac, total_time, client_user, client_type in db.execute(
+                        'SELECT e2.contact_mac, e1.contact_mac, e2.total_time, c.client_user, c.client_type '
+                        'FROM contact_edges e1 JOIN contact_edges e2 ON e2.client_mac = e1.contact_mac '
+                        'LEFT JOIN clients c ON c.client_mac = e2.contact_mac '
+                        'WHERE e1.client_mac = ? AND e1.total_time >= ? AND e2.total_time >= ?',
+                        (client_mac, min_time, min_time)):
+                    if contact_mac in excluded:
+                        continue
+                    contact = second_degree.setdefault(contact_mac, {
+                        'client_mac': contact_mac, 'client_user': client_user, 'client_type': client_type,
+                        'total_time': 0, 'via': []
+                    })
+                    contact['total_time'] = max(contact['total_time'], total_time)
+                    contact['via'].append(via_mac)
+        finally:
+            db.close()
+        return {
+            'client_mac': client_mac, 'min_time': min_time, 'first_degree': first_degree,
+            'second_degree': sorted(second_degree.values(), key=lambda x: x['total_time'], reverse=True)
+        }
+
+
+class ContactGraphWriter:
+    """
+    Collect the contact events of one reported wireless client, saved to the contact graph in one transaction
+    """
+
+    def __init__(self, contact_graph):
+        self.contact_graph = contact_graph
+        self.events = []
+        self.clients = {}
+
+    def add_slice(self, time_slice):
+        """
+        Add the contact events for all the users in the {time_slice}
+        :param time_slice: TimeSlice
+        :return:
+        """
+        location = time_slice.location
+        start_time = time_slice.start_time
+        end_time = time_slice.end_time
+        for user in time_slice.users_info:
+            # the packed MAC addresses are formatted when saved
+            self.events.append((user.client_mac, start_time, end_time, location))
+            if user.client_user is not None:
+                self.clients[user.client_mac] = (user.client_user, user.client_type)
+
+    def save(self, wireless_mac_address):
+        """
+        Save the contact events of the reported wireless client {wireless_mac_address}
+        :param wireless_mac_address: MAC address of the reported wireless client
+        :return:
+        """
+        # the same format as the contact MAC addresses, the notifications may use any MAC address format
+        client_mac = format_mac(wireless_mac_address)
+        db = self.contact_graph.connect()
+        try:
+            db.executescript(NEW_EVENTS_SCHEMA)
+            with db:
+                # the write lock is taken first, the contact events read are not changed by other writers before the
+                # new events are saved
+                db.execute('BEGIN IMMEDIATE')
+                db.executemany(
+                    'INSERT OR IGNORE INTO new_events (client_mac, contact_mac, start_time, end_time, location) '
+                    'VALUES (?, ?, ?, ?, ?)',
+                    [(client_mac, format_packed_mac(contact_mac), start_time, end_time, location)
+                     for contact_mac, start_time, end_time, location in self.events])
+                db.execute(
+                    'DELETE FROM new_events WHERE EXISTS (SELECT 1 FROM contact_events e '
+                    'WHERE e.client_mac = new_events.client_mac AND e.contact_mac = new_events.contact_mac '
+                    'AND e.start_time = new_events.start_time)')
+                db.execute('INSERT INTO contact_events SELECT * FROM new_events')
+                db.execute(UPDATE_EDGES.format('client_mac', 'contact_mac'))
+                db.execute(UPDATE_EDGES.format('contact_mac', 'client_mac'))
+                db.execute(UPDATE_EXPOSURE.format('new_events'), (EXPOSURE_BUCKET,))
+                db.executemany(
+                    'INSERT INTO clients (client_mac, client_user, client_type) VALUES (?, ?, ?) '
+                    'ON CONFLICT (client_mac) DO UPDATE SET client_user = excluded.client_user, '
+                    'client_type = excluded.client_type',
+                    [(format_packed_mac(contact_mac),) + client for contact_mac, client in self.clients.items()])
+        finally:
+            db.close()
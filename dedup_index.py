@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+# The deduplication index is saved to a sqlite database, one row for each notification received:
+#   content_hash - SHA-256 of the notification, the redelivered notifications have the same hash
+#   user_name, start_time, end_time - the reported client and time interval, for the notifications redelivered with
+#                                      other fields changed, example the event {timestamp}
+#   job_id - the report job of the first delivery
+
+
+import sqlite3
+import threading
+
+
+MAX_ENTRIES = 100000  # notifications kept in the index, the oldest are removed
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS notifications (
+    entry_id INTEGER PRIMARY KEY,
+    content_hash TEXT NOT NULL UNIQUE,
+    job_id TEXT NOT NULL,
+    user_name TEXT,
+    start_time INTEGER,
+    end_time INTEGER
+);
+CREATE INDEX IF NOT EXISTS notifications_details ON notifications (user_name, start_time, end_time);
+'''
+
+
+class DedupIndex:
+    """
+    Bounded, persistent index of the notifications received, to skip the redelivered notifications
+    """
+
+    def __init__(self, db_path, max_entries=MAX_ENTRIES):
+        """
+        :param db_path: path to the sqlite database
+        :param max_entries: maximum number of notifications kept in the index
+        """
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(db_path, timeout=60, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.executescript(SCHEMA)
+        self.counters = {'notifications': 0, 'duplicate_content': 0, 'duplicate_details': 0}
+
+    def claim(self, content_hash, job_id):
+        """
+        Add the notification to the index, if not already received
+        :param content_hash: SHA-256 of the notification
+        :param job_id: the report job of the notification
+        :return: the job id of the first delivery if already received, or None
+        """
+        with self.lock, self.db:
+            # the write lock is taken first, the same notification is claimed once by all the receiver processes
+            self.db.execute('BEGIN IMMEDIATE')
+            row = self.db.execute('SELECT job_id FROM notifications WHERE content_hash = ?', (content_hash,)).fetchone()
+            if row is not None:
+                self.counters['duplicate_content'] += 1
+                return row[0]
+            cursor = self.db.execute('INSERT INTO notifications (content_hash, job_id) VALUES (?, ?)',
+                                     (content_hash, job_id))
+            # bounded, the oldest notifications are removed
+            self.db.execute('DELETE FROM notifications WHERE entry_id <= ?', (cursor.lastrowid - self.max_entries,))
+            self.counters['notifications'] += 1
+            return None
+
+    def claim_details(self, content_hash, user_name, start_time, end_time):
+        """
+        Add the {user_name}, {start_time} and {end_time} of the notification, if no other notification was received
+        for the same client and time interval
+        :param content_hash: SHA-256 of the notification, added by {claim}
+        :param user_name: the username of the reported client
+        :param start_time: epoch time in msec
+        :param end_time: epoch time in msec
+        :return: the job id of the first delivery if already received, or None
+        """
+        with self.lock, self.db:
+            self.db.execute('BEGIN IMMEDIATE')
+            row = self.db.execute(
+                'SELECT job_id FROM notifications WHERE user_name = ? AND start_time = ? AND end_time = ? '
+                'AND content_hash != ?', (user_name, int(start_time), int(end_time), content_hash)).fetchone()
+            # the next deliveries of this notification are found by {claim} as duplicates of the first delivery
+            job_id = None if row is None else row[0]
+            if job_id is not None:
+                self.counters['duplicate_details'] += 1
+            self.db.execute(
+                'UPDATE notifications SET job_id = COALESCE(?, job_id), user_name = ?, start_time = ?, end_time = ? '
+                'WHERE content_hash = ?', (job_id, user_name, int(start_time), int(end_time), content_hash))
+            return job_id
+
+    def release(self, content_hash):
+        """
+        Remove the notification from the index, example if the reports could not be created, the notification will be
+        processed again if redelivered
+        :param content_hash: SHA-256 of the notification
+        :return:
+        """
+        with self.lock, self.db:
+            self.db.execute('DELETE FROM notifications WHERE content_hash = ?', (content_hash,))
+
+    def stats(self):
+        """
+        :return: the counters of the notifications received and skipped since start, and the index size
+        """
+        with self.lock:
+            entries = self.db.execute('SELECT COUNT(*) FROM notifications').fetchone()[0]
+            return dict(self.counters, entries=entries, max_entries=self.max_entries)
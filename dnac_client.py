@@ -0,0 +1,296 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+# One Cisco DNA Center API client, shared by the scripts:
+#   - a requests Session, the connections are kept alive and reused from a connection pool
+#   - the JWT token is cached until it expires, in memory and optionally in a token cache file shared by the runs,
+#     and refreshed if an API call returns 401
+#   - AsyncDNACClient runs the API calls in threads, for asyncio batch tools
+
+
+import asyncio
+import base64
+import json
+import os
+import threading
+import time
+
+import requests
+import urllib3
+
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPBasicAuth  # for Basic Auth
+from urllib3.exceptions import InsecureRequestWarning  # for insecure https warnings
+
+from config import DNAC_URL, DNAC_USER, DNAC_PASS, DNAC_TOKEN_CACHE
+
+urllib3.disable_warnings(InsecureRequestWarning)  # disable insecure https warnings
+
+
+TIMEOUT = 30  # seconds, for each API call
+POOL_SIZE = 10  # connections kept alive
+TOKEN_LIFETIME = 60 * 60  # seconds, if the token expiration time is not found in the token
+TOKEN_MARGIN = 60  # seconds, the token is refreshed before it expires
+PAGE_SIZE = 100  # items of each page of the paginated APIs
+
+
+def token_expiration(token):
+    """
+    Find the expiration time of the JWT token
+    :param token: Cisco DNA Center JWT token
+    :return: epoch time in seconds, or None if not found
+    """
+    try:
+        payload = token.split('.')[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+        return float(claims['exp'])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+class RateLimitError(Exception):
+    """
+    The API call was rejected with 429, too many requests
+    """
+
+
+class DNACClient:
+    """
+    Cisco DNA Center API client, with connection pooling and a cached, auto-refreshed JWT token.
+    Thread safe, one client may be shared by many threads.
+    """
+
+    def __init__(self, dnac_url, username, password, verify=False, timeout=TIMEOUT, pool_size=POOL_SIZE,
+                 token_cache=None):
+        """
+        :param dnac_url: Cisco DNA Center URL, example {https://dnac_url}
+        :param username: Cisco DNA Center username
+        :param password: Cisco DNA Center password
+        :param verify: verify the Cisco DNA Center certificate
+        :param timeout: timeout for each API call, in seconds
+        :param pool_size: number of connections kept alive
+        :param token_cache: optional, file to save the token to, reused by the next runs until it expires
+        """
+        self.dnac_url = dnac_url
+        self.username = username
+        self.dnac_auth = HTTPBasicAuth(username, password)
+        self.timeout = timeout
+        self.token_cache = token_cache
+        self.token = None
+        self.token_expires = 0
+        self.token_lock = threading.Lock()
+        self.session = requests.Session()
+        self.session.verify = verify
+        self.session.headers.update({'content-type': 'application/json'})
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._load_token()
+
+    def _load_token(self):
+        if self.token_cache is None:
+            return
+        try:
+            with open(self.token_cache) as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return
+        if cached.get('dnac_url') == self.dnac_url and cached.get('username') == self.username:
+            self.token = cached['token']
+            self.token_expires = cached['expires']
+
+    def _save_token(self):
+        if self.token_cache is None:
+            return
+        # the token file is only readable by the user running the scripts, also if the file was left by a previous run
+        fd = os.open(self.token_cache + '.tmp', os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        if hasattr(os, 'fchmod'):  # not available on Windows
+            os.fchmod(fd, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'dnac_url': self.dnac_url, 'username': self.username, 'token': self.token,
+                       'expires': self.token_expires}, f)
+        os.replace(self.token_cache + '.tmp', self.token_cache)
+
+    def get_token(self, expired_token=None):
+        """
+        Find the JWT token, a new token is created if none is cached or the cached token expires
+        Call to Cisco DNA Center - /dna/system/api/v1/auth/token
+        :param expired_token: the token rejected by Cisco DNA Center, replaced if still cached
+        :return: Cisco DNA Center JWT token
+        """
+        with self.token_lock:
+            if self.token is None or self.token == expired_token or time.time() > self.token_expires - TOKEN_MARGIN:
+                url = self.dnac_url + '/dna/system/api/v1/auth/token'
+                response = self.session.post(url, auth=self.dnac_auth, timeout=self.timeout)
+                response.raise_for_status()
+                self.token = response.json()['Token']
+                self.token_expires = token_expiration(self.token) or time.time() + TOKEN_LIFETIME
+                self._save_token()
+            return self.token
+
+    def request(self, method, path, **kwargs):
+        """
+        Send the API call, with the JWT token. The token is refreshed and the call sent again if the response is 401.
+        :param method: HTTP method, example {GET}
+        :param path: API path, example {/dna/intent/api/v1/event/subscription}
+        :param kwargs: optional requests arguments, example {params}, {json}
+        :return: the response
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        token = self.get_token()
+        response = self.session.request(method, self.dnac_url + path, headers={'x-auth-token': token}, **kwargs)
+        if response.status_code == 401:
+            token = self.get_token(expired_token=token)
+            response = self.session.request(method, self.dnac_url + path, headers={'x-auth-token': token}, **kwargs)
+        return response
+
+    @staticmethod
+    def _json(response):
+        if response.status_code == 429:
+            raise RateLimitError('Rate limited, HTTP 429, Retry-After: ' + response.headers.get('Retry-After', '-'))
+        return response.json()
+
+    def get(self, path, params=None):
+        """
+        :param path: API path
+        :param params: optional query parameters
+        :return: the response JSON, raises RateLimitError if the response is 429
+        """
+        return self._json(self.request('GET', path, params=params))
+
+    def post(self, path, json_data):
+        """
+        :param path: API path
+        :param json_data: the request JSON
+        :return: the response JSON, raises RateLimitError if the response is 429
+        """
+        return self._json(self.request('POST', path, json=json_data))
+
+    def get_event_subscriptions(self, event_id, offset=0, limit=PAGE_SIZE):
+        """
+        This function will find one page of the event subscriptions for the {event_id}, see {SubscriptionDiscovery}
+        for all the pages
+        :param event_id: Cisco DNA Center event id, example {NETWORK-CLIENTS-3-506}
+        :param offset: index of the first subscription
+        :param limit: maximum number of subscriptions
+        :return: existing subscriptions info, or [] if none
+        """
+        return self.get('/dna/intent/api/v1/event/subscription',
+                        params={'eventIds': event_id, 'offset': offset, 'limit': limit})
+
+    def get_destination_details(self, offset=0, limit=PAGE_SIZE):
+        """
+        The function will retrieve one page of the REST based (webhooks) destinations configured, see
+        {SubscriptionDiscovery} for all the pages
+        :param offset: index of the first destination
+        :param limit: maximum number of destinations
+        :return: list with the configured webhooks
+        """
+        return self.get('/dna/intent/api/v1/event/subscription-details',
+                        params={'connectorType': 'REST', 'offset': offset, 'limit': limit})
+
+    def create_event_subscription(self, subscription_info):
+        """
+        This function will create a new event subscription
+        :param subscription_info: subscription info required for the subscription
+        :return: the API call result
+        """
+        return self.post('/dna/intent/api/v1/event/subscription', subscription_info)
+
+    def client_proximity(self, client_username, days, resolution):
+        """
+        This function will start the task to collect the client proximity info for the {client_username}
+        for {days} in the past, and a time resolution {resolution}. The data that will be generated will be sent to the
+        webhook destination subscribed to the event id {NETWORK-CLIENTS-3-506}.
+        :param client_username: client username
+        :param days: how many days in the past maximum 14
+        :param resolution: minimum time that will be reported for proximity, recommended 15 min, minimum 5 minutes
+        :return: execution id information
+        """
+        return self.get('/dna/intent/api/v1/client-proximity',
+                        params={'username': client_username, 'number_days': days, 'time_resolution': resolution})
+
+    def get_execution_status(self, execution_url):
+        """
+        :param execution_url: the {executionStatusUrl} returned by the API call
+        :return: execution status info
+        """
+        return self.get(execution_url)
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncDNACClient:
+    """
+    asyncio variant of the DNACClient, the API calls run in threads and share the client connection pool and token
+    """
+
+    def __init__(self, client, concurrency=POOL_SIZE):
+        """
+        :param client: DNACClient
+        :param concurrency: maximum number of API calls running at the same time
+        """
+        self.client = client
+        self.semaphore = asyncio.Semaphore(concurrency)
+
+    async def _run(self, function, *args, **kwargs):
+        async with self.semaphore:
+            return await asyncio.to_thread(function, *args, **kwargs)
+
+    async def request(self, method, path, **kwargs):
+        return await self._run(self.client.request, method, path, **kwargs)
+
+    async def get(self, path, params=None):
+        return await self._run(self.client.get, path, params)
+
+    async def post(self, path, json_data):
+        return await self._run(self.client.post, path, json_data)
+
+    async def get_event_subscriptions(self, event_id, offset=0, limit=PAGE_SIZE):
+        return await self._run(self.client.get_event_subscriptions, event_id, offset, limit)
+
+    async def get_destination_details(self, offset=0, limit=PAGE_SIZE):
+        return await self._run(self.client.get_destination_details, offset, limit)
+
+    async def create_event_subscription(self, subscription_info):
+        return await self._run(self.client.create_event_subscription, subscription_info)
+
+    async def client_proximity(self, client_username, days, resolution):
+        return await self._run(self.client.client_proximity, client_username, days, resolution)
+
+    async def get_execution_status(self, execution_url):
+        return await self._run(self.client.get_execution_status, execution_url)
+
+
+def create_client():
+    """
+    Create the client for the Cisco DNA Center configured in {config}, the token is cached in {DNAC_TOKEN_CACHE}
+    :return: DNACClient
+    """
+    return DNACClient(DNAC_URL, DNAC_USER, DNAC_PASS, token_cache=DNAC_TOKEN_CACHE)
@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+# Local stand-in for Cisco DNA Center, to run the scripts and the webhook receiver without a Cisco DNA Center:
+#   POST /dna/system/api/v1/auth/token                         - Basic Auth, returns a JWT token
+#   GET  /dna/intent/api/v1/client-proximity                   - starts a client proximity execution, the synthetic
+#                                                                notification is sent to the event subscriptions
+#   GET  /dna/intent/api/v1/event/subscription                 - event subscriptions, pages with offset and limit
+#   POST /dna/intent/api/v1/event/subscription                 - create event subscriptions
+#   GET  /dna/intent/api/v1/event/subscription-details          - the webhook destinations, pages with offset and limit
+#   GET  /dna/platform/management/business-api/v1/execution-status/<execution_id>
+
+
+import argparse
+import base64
+import json
+import threading
+import time
+import uuid
+
+import requests
+import urllib3
+
+from flask import Flask, request, jsonify
+from urllib3.exceptions import InsecureRequestWarning  # for insecure https warnings
+
+from config import DNAC_USER, DNAC_PASS, WEBHOOK_USERNAME, WEBHOOK_PASSWORD
+from synthetic_payload import make_payload
+
+urllib3.disable_warnings(InsecureRequestWarning)  # disable insecure https warnings
+
+
+TOKEN_LIFETIME = 60 * 60  # seconds
+EXECUTION_STATUS_PATH = '/dna/platform/management/business-api/v1/execution-status/'
+
+
+def create_token(lifetime=TOKEN_LIFETIME):
+    """
+    :param lifetime: token lifetime, in seconds
+    :return: a JWT token, not signed, with the expiration time
+    """
+    def encode(value):
+        return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip('=')
+    return encode({'alg': 'none'}) + '.' + encode({'exp': int(time.time()) + lifetime, 'jti': uuid.uuid4().hex}) + '.'
+
+
+def post_notification(webhook_url, body, webhook_auth=None, timeout=60):
+    """
+    Send the notification to the webhook receiver
+    :param webhook_url: webhook URL, example {https://webhook_url/proximity}
+    :param body: the notification, bytes
+    :param webhook_auth: optional, (username, password) for Basic Auth
+    :param timeout: timeout, in seconds
+    :return: the response
+    """
+    return requests.post(webhook_url, data=body, auth=webhook_auth, headers={'content-type': 'application/json'},
+                         verify=False, timeout=timeout)
+
+
+def create_app(dnac_user='username', dnac_pass='password', webhook_url=None, webhook_auth=None, days=14, resolution=5,
+               contacts=200, devices=1, delay=1.0, max_executions=2, extra_destinations=0):
+    """
+    Create the Cisco DNA Center simulator
+    :param dnac_user: username for the auth token
+    :param dnac_pass: password for the auth token
+    :param webhook_url: optional, a webhook destination, subscribed to the event {NETWORK-CLIENTS-3-506}
+    :param webhook_auth: optional, (username, password) for the webhook destinations
+    :param days: maximum number of days of the synthetic notifications, the requested days if lower
+    :param resolution: minimum time resolution of the synthetic notifications, in minutes
+    :param contacts: number of unique wireless clients in proximity, in each notification
+    :param devices: number of wireless devices of the reported client
+    :param delay: time to collect the client proximity data, in seconds, before the notification is sent
+    :param max_executions: maximum number of client proximity executions running, the requests are rejected if more
+    :param extra_destinations: number of other webhook destinations, each subscribed to another event, for the
+    discovery of large deployments
+    :return: the Flask app
+    """
+    app = Flask(__name__)
+    lock = threading.Lock()
+    tokens = set()
+    executions = {}
+    destinations = []
+    subscriptions = []
+
+    def add_destination(url):
+        destination = {'instanceId': uuid.uuid4().hex, 'name': 'Webhook ' + url, 'url': url, 'connectorType': 'REST'}
+        destinations.append(destination)
+        return destination
+
+    def add_subscription(destination, name, event_id):
+        subscriptions.append({
+            'subscriptionId': uuid.uuid4().hex, 'name': name,
+            'subscriptionEndpoints': [{'instanceId': destination['instanceId'], 'subscriptionDetails': {
+                'connectorType': 'REST', 'name': destination['name'], 'url': destination['url']}}],
+            'filter': {'eventIds': [event_id]}
+        })
+
+    for index in range(extra_destinations):
+        add_subscription(add_destination('https://webhook' + str(index) + '.example.com/events'),
+                         'Event Subscription ' + str(index), 'NETWORK-CLIENTS-3-' + str(1000 + index))
+    if webhook_url is not None:
+        add_subscription(add_destination(webhook_url), 'Proximity Event Subscription', 'NETWORK-CLIENTS-3-506')
+
+    def page(items):
+        offset = int(request.args.get('offset', 0))
+        return items[offset:offset + int(request.args.get('limit', 100))]
+
+    def authorized():
+        return request.headers.get('x-auth-token') in tokens
+
+    def run_execution(execution_id, username, number_days, time_resolution):
+        time.sleep(delay)
+        body = json.dumps(make_payload(user_name=username, days=number_days, resolution=time_resolution,
+                                       contacts=contacts, devices=devices)).encode()
+        error = None
+        for subscription in list(subscriptions):
+            if 'NETWORK-CLIENTS-3-506' not in subscription['filter']['eventIds']:
+                continue
+            for endpoint in subscription['subscriptionEndpoints']:
+                try:
+                    post_notification(endpoint['subscriptionDetails']['url'], body, webhook_auth).raise_for_status()
+                except requests.RequestException as request_error:
+                    error = repr(request_error)
+        with lock:
+            executions[execution_id].update(status='FAILURE' if error else 'SUCCESS', endTime=int(time.time() * 1000),
+                                            bapiError=error)
+
+    @app.route('/dna/system/api/v1/auth/token', methods=['POST'])
+    def auth_token():
+        if request.authorization is None or (request.authorization.username, request.authorization.password) != (
+                dnac_user, dnac_pass):
+            return jsonify({'error': 'Authentication has failed'}), 401
+        token = create_token()
+        tokens.add(token)
+        return jsonify({'Token': token}), 200
+
+    @app.route('/dna/intent/api/v1/client-proximity', methods=['GET'])
+    def client_proximity():
+        if not authorized():
+            return jsonify({'error': 'Unauthorized'}), 401
+        with lock:
+            running = sum(1 for execution in executions.values() if execution['status'] == 'IN_PROGRESS')
+            if running >= max_executions:
+                return jsonify({'bapiExtendedStatusDescription': 'Too many client proximity requests running'}), 200
+            execution_id = uuid.uuid4().hex
+            executions[execution_id] = {'bapiExecutionId': execution_id, 'status': 'IN_PROGRESS',
+                                        'startTime': int(time.time() * 1000)}
+        number_days = min(days, int(request.args.get('number_days', days)))
+        time_resolution = max(resolution, int(request.args.get('time_resolution', resolution)))
+        threading.Thread(target=run_execution, daemon=True,
+                         args=(execution_id, request.args['username'], number_days, time_resolution)).start()
+        return jsonify({'executionId': execution_id, 'executionStatusUrl': EXECUTION_STATUS_PATH + execution_id,
+                        'message': 'The request has been accepted for execution'}), 202
+
+    @app.route(EXECUTION_STATUS_PATH + '<execution_id>', methods=['GET'])
+    def execution_status(execution_id):
+        if not authorized():
+            return jsonify({'error': 'Unauthorized'}), 401
+        with lock:
+            execution = executions.get(execution_id)
+            if execution is None:
+                return jsonify({'error': 'Execution not found'}), 404
+            return jsonify(execution), 200
+
+    @app.route('/dna/intent/api/v1/event/subscription', methods=['GET', 'POST'])
+    def event_subscription():
+        if not authorized():
+            return jsonify({'error': 'Unauthorized'}), 401
+        if request.method == 'GET':
+            event_ids = request.args.get('eventIds')
+            return jsonify(page([subscription for subscription in subscriptions
+                                 if event_ids is None or event_ids in subscription['filter']['eventIds']])), 200
+        for subscription_info in request.get_json():
+            endpoint = subscription_info['subscriptionEndpoints'][0]
+            destination = next(destination for destination in destinations
+                               if destination['instanceId'] == endpoint['instanceId'])
+            endpoint['subscriptionDetails'].update(name=destination['name'], url=destination['url'])
+            subscriptions.append(dict(subscription_info, subscriptionId=uuid.uuid4().hex))
+        return jsonify({'statusUri': '/event/api/v1/status/' + uuid.uuid4().hex}), 202
+
+    @app.route('/dna/intent/api/v1/event/subscription-details', methods=['GET'])
+    def subscription_details():
+        if not authorized():
+            return jsonify({'error': 'Unauthorized'}), 401
+        return jsonify(page(destinations)), 200
+
+    return app
+
+
+def main():
+    """
+    Run the Cisco DNA Center simulator, set {DNAC_URL} in {config} to the simulator URL, example {http://127.0.0.1:9443}
+    """
+    parser = argparse.ArgumentParser(description='Cisco DNA Center simulator, for the client proximity API')
+    parser.add_argument('--port', type=int, default=9443)
+    parser.add_argument('--webhook-url', help='webhook destination subscribed to the client proximity event, '
+                                              'example http://127.0.0.1:5000/proximity')
+    parser.add_argument('--days', type=int, default=14, help='maximum number of days of the notifications')
+    parser.add_argument('--resolution', type=int, default=5, help='minimum time resolution, in minutes')
+    parser.add_argument('--contacts', type=int, default=200, help='unique wireless clients in proximity')
+    parser.add_argument('--devices', type=int, default=1, help='wireless devices of the reported client')
+    parser.add_argument('--delay', type=float, default=1.0, help='seconds before the notification is sent')
+    parser.add_argument('--max-executions', type=int, default=2, help='client proximity executions running at a time')
+    parser.add_argument('--extra-destinations', type=int, default=0,
+                        help='other webhook destinations and subscriptions')
+    args = parser.parse_args()
+
+    app = create_app(DNAC_USER, DNAC_PASS, args.webhook_url, (WEBHOOK_USERNAME, WEBHOOK_PASSWORD), days=args.days,
+                     resolution=args.resolution, contacts=args.contacts, devices=args.devices, delay=args.delay,
+                     max_executions=args.max_executions, extra_destinations=args.extra_destinations)
+    app.run(port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+import asyncio
+import json
+import os
+import random
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from dnac_client import AsyncDNACClient
+
+
+POLL_INTERVAL = 5  # seconds, first delay before polling the execution status, doubled after each poll
+MAX_POLL_INTERVAL = 120  # seconds
+EXECUTION_TIMEOUT = 30 * 60  # seconds, the executions still running are tracked again at the next run
+MAX_AGE = 24 * 60 * 60  # seconds, the executions not completed after this time are not tracked again
+CONCURRENCY = 4  # execution status API calls sent at the same time
+
+RUNNING_STATUSES = ('IN_PROGRESS', 'PENDING', 'RUNNING')
+
+
+class ExecutionTracker:
+    """
+    Track the Cisco DNA Center executions, example the client proximity requests, until completed.
+    The executions are polled concurrently, each with an exponential backoff with jitter. The executions in flight are
+    saved to the {state_file}, the executions not completed are tracked again after a restart, for another {timeout},
+    until {max_age} after they were submitted.
+    """
+
+    def __init__(self, dnac_client, state_file, poll_interval=POLL_INTERVAL, max_poll_interval=MAX_POLL_INTERVAL,
+                 timeout=EXECUTION_TIMEOUT, concurrency=CONCURRENCY, max_age=MAX_AGE):
+        """
+        :param dnac_client: DNACClient
+        :param state_file: file to save the executions in flight to
+        :param poll_interval: first delay before polling, in seconds
+        :param max_poll_interval: maximum delay between polls, in seconds
+        :param timeout: time to wait for each execution, in seconds, from the time submitted, or from the start of the
+        tracking for the executions tracked again
+        :param concurrency: maximum number of execution status API calls sent at the same time
+        :param max_age: time after which an execution not completed is removed from the {state_file}, in seconds, from
+        the time submitted
+        """
+        self.dnac_client = dnac_client
+        self.state_file = state_file
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.max_age = max_age
+        try:
+            with open(state_file) as f:
+                self.executions = json.load(f)
+        except FileNotFoundError:
+            self.executions = {}
+
+    def _save(self):
+        with open(self.state_file + '.tmp', 'w') as f:
+            json.dump(self.executions, f, indent=4)
+        os.replace(self.state_file + '.tmp', self.state_file)
+
+    def add(self, execution_url, username=None, submitted=None):
+        """
+        Track the execution {execution_url}, saved to the state file
+        :param execution_url: the {executionStatusUrl} returned by the API call
+        :param username: the client username, for the reports
+        :param submitted: epoch time in seconds the execution was submitted, now if None
+        :return:
+        """
+        self.executions[execution_url] = {'username': username, 'submitted': submitted or time.time()}
+        self._save()
+
+    def _next_interval(self, interval):
+        # jitter, the executions submitted at the same time are not polled at the same time
+        return min(self.max_poll_interval, interval * 2) * random.uniform(0.8, 1.2)
+
+    async def _track(self, async_client, execution_url, started):
+        execution = self.executions[execution_url]
+        result = {'execution_url': execution_url, 'username': execution['username'], 'polls': 0}
+        # the executions tracked again, after a restart, are polled for another {timeout}
+        deadline = max(execution['submitted'], started) + self.timeout
+        interval = self.poll_interval
+        while True:
+            await asyncio.sleep(max(0.0, min(interval, deadline - time.time())))
+            result['polls'] += 1
+            try:
+                response = await async_client.get_execution_status(execution_url)
+                status = response.get('status')
+            except Exception as error:
+                response = {'error': repr(error)}
+                status = None
+            if status is not None and status not in RUNNING_STATUSES:
+                result.update(status=status, latency=time.time() - execution['submitted'],
+                              error=response.get('bapiError'))
+                del self.executions[execution_url]
+                self._save()
+                return result
+            if time.time() >= deadline:
+                result.update(status='TIMEOUT', latency=None, error=response.get('error'))
+                if time.time() - execution['submitted'] >= self.max_age:
+                    # not tracked again, the state file does not keep the executions never completed
+                    result['status'] = 'EXPIRED'
+                    del self.executions[execution_url]
+                    self._save()
+                return result
+            interval = self._next_interval(interval)
+
+    async def run_async(self):
+        """
+        Poll all the executions in flight until completed, or until the timeout
+        :return: list of results for each execution: execution_url, username, status (TIMEOUT if not completed, to be
+        tracked again, EXPIRED if not completed after {max_age}), latency (seconds from the time submitted, None if not
+        completed), polls and error
+        """
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=self.concurrency))
+        async_client = AsyncDNACClient(self.dnac_client, self.concurrency)
+        started = time.time()
+        return await asyncio.gather(*[self._track(async_client, execution_url, started)
+                                      for execution_url in list(self.executions)])
+
+    def run(self):
+        """
+        Poll all the executions in flight, see {run_async}
+        :return: list of results for each execution
+        """
+        return asyncio.run(self.run_async())
+
+
+def print_execution_results(results):
+    """
+    Print the status and the completion latency of each execution
+    :param results: see {ExecutionTracker.run}
+    :return:
+    """
+    print('\n{0:30} {1:12} {2:>12} {3:>6}  {4}'.format('User', 'Status', 'Latency (s)', 'Polls', 'Execution URL'))
+    for result in results:
+        latency = '-' if result['latency'] is None else '{0:.1f}'.format(result['latency'])
+        print('{0:30} {1:12} {2:>12} {3:>6}  {4}'.format(
+            str(result['username']), result['status'], latency, result['polls'], result['execution_url']))
+        if result.get('error'):
+            print('    Error: ' + str(result['error']))
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+# Exposure ranking: the wireless clients in proximity of any reported client for the longest total time, in a time
+# window. The running totals of each client, per hour, are updated by the contact graph as each notification is saved,
+# see {contact_graph.contact_exposure}. The top clients of a window are selected with a heap, the results are kept in
+# an LRU cache, cleared when new contact events are saved by any process.
+
+
+import heapq
+import sqlite3
+import threading
+
+from collections import OrderedDict
+from operator import itemgetter
+
+from contact_graph import EXPOSURE_BUCKET
+from metrics import EXPOSURE_CACHE
+
+
+CACHE_SIZE = 128  # results of the top exposure queries kept
+MAX_LIMIT = 500  # maximum number of clients returned
+
+
+class ExposureRanking:
+    """
+    Top-N exposure queries over the running totals of the contact graph, with an LRU result cache
+    """
+
+    def __init__(self, contact_graph, cache_size=CACHE_SIZE):
+        """
+        :param contact_graph: ContactGraph, with the running totals
+        :param cache_size: number of query results kept in the cache
+        """
+        self.contact_graph = contact_graph
+        self.cache_size = cache_size
+        self.cache = OrderedDict()  # (start_time, end_time, limit): result, the least recently used first
+        self.lock = threading.Lock()
+        # the data version of this connection changes when the database is changed by any other connection, used with
+        # the {lock}
+        self.version_db = sqlite3.connect(contact_graph.db_path, check_same_thread=False)
+        self.data_version = None
+
+    def top(self, start_time, end_time, limit=20):
+        """
+        Find the wireless clients with the longest total time in proximity of the reported clients, in the time window.
+        The window is extended to whole hours, the contact events are counted in the hour they start in.
+        :param start_time: epoch time in msec
+        :param end_time: epoch time in msec
+        :param limit: number of clients, maximum {MAX_LIMIT}
+        :return: dict with the start_time and end_time of the window, in whole hours, and the clients: client_mac,
+        client_user, client_type and total_time (in msec), sorted by total_time
+        """
+        start_time -= start_time % EXPOSURE_BUCKET
+        end_time += -end_time % EXPOSURE_BUCKET
+        limit = max(0, min(limit, MAX_LIMIT))
+        key = (start_time, end_time, limit)
+        with self.lock:
+            data_version = self.version_db.execute('PRAGMA data_version').fetchone()[0]
+            if data_version != self.data_version:
+                # new contact events saved, the results are computed again
+                self.cache.clear()
+                self.data_version = data_version
+            elif key in self.cache:
+                self.cache.move_to_end(key)
+                EXPOSURE_CACHE.inc('hit')
+                return self.cache[key]
+        EXPOSURE_CACHE.inc('miss')
+        result = {'start_time': start_time, 'end_time': end_time, 'clients': self._top(start_time, end_time, limit)}
+        with self.lock:
+            if data_version == self.data_version:
+                self.cache[key] = result
+                while len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+        return result
+
+    def _top(self, start_time, end_time, limit):
+        db = self.contact_graph.connect()
+        try:
+            # one total per client, the hourly totals are summed by sqlite, the top clients selected by the heap, the
+            # clients with the same total time in the MAC address order
+            totals = db.execute('SELECT contact_mac, SUM(total_time) FROM contact_exposure '
+                                'WHERE bucket_start >= ? AND bucket_start < ? '
+                                'GROUP BY contact_mac ORDER BY contact_mac', (start_time, end_time))
+            top_clients = heapq.nlargest(limit, totals, key=itemgetter(1))
+            macs = [client_mac for client_mac, _ in top_clients]
+            clients = {client_mac: (client_user, client_type) for client_mac, client_user, client_type in db.execute(
+                'SELECT client_mac, client_user, client_type FROM clients WHERE client_mac IN (' +
+                ','.join('?' * len(macs)) + ')', macs)}
+        finally:
+            db.close()
+        ranking = []
+        for client_mac, total_time in top_clients:
+            client_user, client_type = clients.get(client_mac, (None, None))
+            ranking.append({'client_mac': client_mac, 'client_user': client_user, 'client_type': client_type,
+                            'total_time': total_time})
+        return ranking
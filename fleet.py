@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+# Fleet mode, the scripts run on all the Cisco DNA Center clusters configured in {DNAC_CLUSTERS} at the same time.
+# Each cluster has its own API client and token cache, and its own timeout: a cluster failing or not responding does
+# not stop the other clusters. The results and timings of all the clusters are collected in one summary.
+# The threads of a cluster not completed in time are not stopped, the API calls are limited to the cluster timeout, the
+# script ends when the last API call of the cluster times out.
+
+
+import threading
+import time
+
+from config import DNAC_URL, DNAC_USER, DNAC_PASS, DNAC_CLUSTERS, FLEET_TIMEOUT, FLEET_CONCURRENCY
+from dnac_client import DNACClient, TIMEOUT
+
+
+def fleet_clusters():
+    """
+    :return: list of the clusters configured in {DNAC_CLUSTERS}, each with name, url, username and password, or the
+    {DNAC_URL} cluster if none
+    """
+    if DNAC_CLUSTERS:
+        return DNAC_CLUSTERS
+    return [{'name': 'default', 'url': DNAC_URL, 'username': DNAC_USER, 'password': DNAC_PASS}]
+
+
+def create_cluster_client(cluster, timeout=TIMEOUT):
+    """
+    Create the client of the {cluster}, the auth token is cached in {dnac_token_<name>.json}
+    :param cluster: dict with name, url, username and password
+    :param timeout: timeout for each API call, in seconds
+    :return: DNACClient
+    """
+    return DNACClient(cluster['url'], cluster['username'], cluster['password'], timeout=timeout,
+                      token_cache='dnac_token_' + cluster['name'] + '.json')
+
+
+def _run_cluster(function, cluster, result, timeout):
+    start = time.monotonic()
+    dnac_client = None
+    try:
+        dnac_client = create_cluster_client(cluster, min(TIMEOUT, timeout))
+        result.update(status='ok', result=function(cluster, dnac_client))
+    except Exception as error:
+        result.update(status='failed', error=repr(error))
+    finally:
+        result['time'] = time.monotonic() - start
+        if dnac_client is not None:
+            dnac_client.close()
+
+
+def run_fleet(function, clusters=None, timeout=FLEET_TIMEOUT, concurrency=FLEET_CONCURRENCY):
+    """
+    Run the {function} for each cluster, {concurrency} clusters at the same time
+    :param function: function(cluster, dnac_client) returning the result of the cluster
+    :param clusters: list of the clusters, see {fleet_clusters}, all the configured clusters if None
+    :param timeout: time to wait for each cluster, in seconds, the cluster is reported as timeout if not completed
+    :param concurrency: maximum number of clusters running at the same time
+    :return: list of results for each cluster: cluster, status (ok, failed or timeout), time (seconds), and the result
+    of the {function} or the error
+    """
+    clusters = fleet_clusters() if clusters is None else clusters
+    semaphore = threading.Semaphore(concurrency)
+    results = [{'cluster': cluster['name'], 'status': 'pending', 'time': None} for cluster in clusters]
+
+    def supervise(cluster, result):
+        with semaphore:
+            # the cluster thread is not stopped at the timeout, it is a daemon thread and does not keep the run alive
+            worker = threading.Thread(target=_run_cluster, args=(function, cluster, result, timeout), daemon=True)
+            start = time.monotonic()
+            worker.start()
+            worker.join(timeout)
+            if worker.is_alive():
+                result.update(status='timeout', time=time.monotonic() - start,
+                              error='Not completed in ' + str(timeout) + ' seconds')
+
+    supervisors = [threading.Thread(target=supervise, args=(cluster, result))
+                   for cluster, result in zip(clusters, results)]
+    for supervisor in supervisors:
+        supervisor.start()
+    for supervisor in supervisors:
+        supervisor.join()
+    # a snapshot, the timed out clusters may still update their results
+    return [dict(result) for result in results]
+
+
+def print_fleet_summary(results, columns=()):
+    """
+    Print the status and time of each cluster, and the totals
+    :param results: see {run_fleet}
+    :param columns: list of (header, key, total) of the cluster results to print, the total is a function of the
+    values of all the clusters, example [('Submitted', 'submitted', sum), ('Max latency', 'max_latency', max)]
+    :return:
+    """
+    print('\n{0:20} {1:8} {2:>9}'.format('Cluster', 'Status', 'Time (s)') +
+          ''.join(' {0:>12}'.format(header) for header, _, _ in columns))
+    column_values = [[] for _ in columns]
+    for result in results:
+        values = [(result.get('result') or {}).get(key) for _, key, _ in columns]
+        for index, value in enumerate(values):
+            if value is not None:
+                column_values[index].append(value)
+        print('{0:20} {1:8} {2:>9}'.format(result['cluster'], result['status'],
+                                            '-' if result['time'] is None else '{0:.1f}'.format(result['time'])) +
+              ''.join(' {0:>12}'.format('-' if value is None else str(value)) for value in values))
+        if result.get('error'):
+            print('    Error: ' + result['error'])
+    statuses = [result['status'] for result in results]
+    print('\nClusters: {0}, ok: {1}, failed: {2}, timeout: {3}'.format(
+        len(results), statuses.count('ok'), statuses.count('failed'), statuses.count('timeout')) +
+          ''.join(', {0}: {1}'.format(header.lower(), total(values) if values else '-')
+                  for (header, _, total), values in zip(columns, column_values)))
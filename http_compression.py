@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+
+# Compressed transfers of the webhook receiver, the notifications and the log are repetitive JSON, the same MAC
+# addresses, locations and usernames repeated. The notifications sent with "Content-Encoding: gzip" or "deflate" are
+# decompressed while read, one chunk at a time, the size limits are applied to the decompressed bytes. The responses
+# are sent with "Content-Encoding: gzip" to the clients accepting it, the streamed responses compressed one chunk at a
+# time. The bytes saved, uncompressed minus compressed, are counted by direction in {COMPRESSION_SAVED}.
+
+
+import gzip
+import zlib
+
+from metrics import COMPRESSION_SAVED
+from proximity_stream import CHUNK_SIZE
+
+
+CONTENT_ENCODINGS = ('gzip', 'deflate')
+COMPRESSION_LEVEL = 6
+COMPRESSION_MIN_SIZE = 1024  # bytes, the smaller responses are not compressed
+COMPRESSIBLE_MIMETYPES = ('application/json', 'application/x-ndjson', 'text/plain', 'text/html')
+
+
+def content_encoding(header):
+    """
+    :param header: the Content-Encoding header of the request, or None
+    :return: the encoding, lower case, or None if not compressed
+    """
+    encoding = (header or '').strip().lower()
+    return None if encoding in ('', 'identity') else encoding
+
+
+def _decompressor(encoding, data):
+    if encoding == 'gzip':
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    # deflate is the zlib format, some clients send the raw deflate data, without the zlib header
+    if len(data) >= 2 and (data[0] & 0x0f) == 8 and (data[0] << 8 | data[1]) % 31 == 0:
+        return zlib.decompressobj(zlib.MAX_WBITS)
+    return zlib.decompressobj(-zlib.MAX_WBITS)
+
+
+def decompress_chunks(chunks, encoding, chunk_size=CHUNK_SIZE):
+    """
+    Decompress the body while read, at most {chunk_size} bytes decompressed at a time. The gzip bodies with several
+    members, example concatenated files, are decompressed as one.
+    :param chunks: the compressed body, iterable of bytes
+    :param encoding: gzip or deflate
+    :param chunk_size: maximum size of each decompressed chunk, in bytes
+    :return: generator of the decompressed chunks, bytes
+    :raises zlib.error: if the body is not valid or truncated
+    """
+    decompressor = None
+    header = b''  # the first byte of a deflate body, until the zlib header can be found
+    compressed = decompressed = 0
+    for data in chunks:
+        compressed += len(data)
+        data = header + data
+        header = b''
+        while data:
+            if decompressor is None:
+                if encoding != 'gzip' and len(data) < 2:
+                    header = data
+                    break
+                decompressor = _decompressor(encoding, data)
+            chunk = decompressor.decompress(data, chunk_size)
+            decompressed += len(chunk)
+            if chunk:
+                yield chunk
+            data = decompressor.unconsumed_tail
+            if decompressor.eof:
+                # the next gzip member, the data after a zlib stream is not valid
+                data = decompressor.unused_data
+                if data and encoding != 'gzip':
+                    raise zlib.error('Data after the end of the deflate stream')
+                decompressor = None
+    if decompressor is not None or header:
+        raise zlib.error('Incomplete ' + encoding + ' body')
+    if not compressed:
+        return
+    COMPRESSION_SAVED.inc('request', max(0, decompressed - compressed))
+
+
+def accepts_gzip(accept_encodings):
+    """
+    :param accept_encodings: the Accept-Encoding of the request, {request.accept_encodings}
+    :return: True if the response can be compressed with gzip
+    """
+    return accept_encodings.quality('gzip') > 0
+
+
+def gzip_chunks(chunks, level=COMPRESSION_LEVEL):
+    """
+    Compress a streamed response, in the gzip format
+    :param chunks: the response, iterable of bytes
+    :param level: compression level, 1 (fastest) to 9 (smallest)
+    :return: generator of the compressed chunks, bytes
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    size = compressed = 0
+    for chunk in chunks:
+        size += len(chunk)
+        data = compressor.compress(chunk)
+        if data:
+            compressed += len(data)
+            yield data
+    data = compressor.flush()
+    compressed += len(data)
+    yield data
+    COMPRESSION_SAVED.inc('response', max(0, size - compressed))
+
+
+def compress_response(response, accept_encodings, level=COMPRESSION_LEVEL, min_size=COMPRESSION_MIN_SIZE):
+    """
+    Compress the body of a response with gzip, if accepted by the client. The streamed responses, the files sent and
+    the responses already encoded are not changed.
+    :param response: the Flask response
+    :param accept_encodings: the Accept-Encoding of the request, {request.accept_encodings}
+    :param level: compression level, 1 (fastest) to 9 (smallest)
+    :param min_size: the responses smaller than this size, in bytes, are not compressed
+    :return: the response
+    """
+    if (response.direct_passthrough or response.is_streamed or response.status_code != 200 or
+            'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    if len(data) < min_size or not accepts_gzip(accept_encodings):
+        return response
+    compressed = gzip.compress(data, level, mtime=0)
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = 'gzip'
+    COMPRESSION_SAVED.inc('response', max(0, len(data) - len(compressed)))
+    return response
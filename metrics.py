@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+# Metrics of the webhook receiver, exposed in the Prometheus text format. The report jobs record the time spent in
+# each stage to the {STAGE_SECONDS} histogram, the gauges are set for each job or computed when the metrics are read.
+# The metrics are kept in memory for each process, the reports created with REPORT_EXECUTOR = 'process' only record
+# the job stages measured in the receiver process.
+
+
+import bisect
+import contextlib
+import threading
+import time
+
+
+# seconds
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def format_value(value):
+    """
+    :param value: metric value
+    :return: the value in the Prometheus text format
+    """
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def format_labels(label_name, label_value, extra=''):
+    """
+    :return: the labels in the Prometheus text format, example {{stage="parse"}}
+    """
+    labels = [] if label_name is None else [label_name + '="' + str(label_value).replace('"', '\\"') + '"']
+    if extra:
+        labels.append(extra)
+    return '{' + ','.join(labels) + '}' if labels else ''
+
+
+class Metric:
+    """
+    A metric with an optional label, one value for each label value
+    """
+    metric_type = None
+
+    def __init__(self, name, documentation, label_name=None):
+        """
+        :param name: metric name, example {proximity_stage_seconds}
+        :param documentation: metric help
+        :param label_name: optional, the label name, example {stage}
+        """
+        self.name = name
+        self.documentation = documentation
+        self.label_name = label_name
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def header(self):
+        return ['# HELP ' + self.name + ' ' + self.documentation, '# TYPE ' + self.name + ' ' + self.metric_type]
+
+    def collect(self):
+        """
+        :return: the metric lines in the Prometheus text format
+        """
+        with self.lock:
+            values = sorted(self.values.items(), key=lambda x: str(x[0]))
+        return self.header() + [self.name + format_labels(self.label_name, label) + ' ' + format_value(value)
+                                for label, value in values]
+
+
+class Counter(Metric):
+    metric_type = 'counter'
+
+    def inc(self, label=None, amount=1):
+        with self.lock:
+            self.values[label] = self.values.get(label, 0) + amount
+
+
+class Gauge(Metric):
+    metric_type = 'gauge'
+
+    def set(self, value, label=None):
+        with self.lock:
+            self.values[label] = value
+
+
+class Histogram(Metric):
+    """
+    Histogram with fixed buckets, the count for each bucket, the sum and the count of the values observed
+    """
+    metric_type = 'histogram'
+
+    def __init__(self, name, documentation, label_name=None, buckets=STAGE_BUCKETS):
+        super().__init__(name, documentation, label_name)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, label=None):
+        """
+        :param value: the value observed, example the time in seconds
+        :param label: optional, the label value
+        :return:
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            histogram = self.values.get(label)
+            if histogram is None:
+                histogram = self.values[label] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            histogram[0][index] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    @contextlib.contextmanager
+    def time(self, label=None):
+        """
+        Observe the time spent in the {with} block, in seconds
+        :param label: optional, the label value
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, label)
+
+    def collect(self):
+        with self.lock:
+            values = sorted(((label, (list(counts), total, count)) for label, (counts, total, count) in
+                             self.values.items()), key=lambda x: str(x[0]))
+        lines = self.header()
+        for label, (counts, total, count) in values:
+            cumulative = 0
+            for bucket, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                lines.append(self.name + '_bucket' + format_labels(
+                    self.label_name, label, 'le="' + format_value(float(bucket)) + '"') + ' ' + str(cumulative))
+            lines.append(self.name + '_sum' + format_labels(self.label_name, label) + ' ' + format_value(total))
+            lines.append(self.name + '_count' + format_labels(self.label_name, label) + ' ' + str(count))
+        return lines
+
+
+class Registry:
+    """
+    The metrics of the process, and the collectors called when the metrics are read
+    """
+
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        """
+        :param collector: function called when the metrics are read, to update the gauges, example the queue depth
+        :return:
+        """
+        self.collectors.append(collector)
+
+    def exposition(self):
+        """
+        :return: all the metrics, in the Prometheus text format
+        """
+        for collector in self.collectors:
+            collector()
+        lines = []
+        for metric in self.metrics:
+            lines += metric.collect()
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    'proximity_stage_seconds', 'Time spent in each stage of the notifications processing', 'stage'))
+PAYLOAD_BYTES = REGISTRY.register(Gauge('proximity_payload_bytes', 'Size of the last notification processed'))
+PAYLOAD_SLICES = REGISTRY.register(Gauge('proximity_payload_slices', 'Time slices of the last notification processed'))
+QUEUE_DEPTH = REGISTRY.register(Gauge('proximity_queue_depth', 'Notifications waiting for the report workers'))
+JOBS = REGISTRY.register(Counter('proximity_jobs_total', 'Report jobs processed, by status', 'status'))
+PDF_CACHE = REGISTRY.register(Counter('proximity_pdf_cache_total', 'PDF report requests, by cache result', 'result'))
+IN_FLIGHT = REGISTRY.register(Gauge('proximity_in_flight', 'Notifications being received'))
+QUEUED_BYTES = REGISTRY.register(Gauge('proximity_queued_bytes', 'Bytes of the notifications waiting for the reports'))
+ADMISSION_REJECTED = REGISTRY.register(Counter('proximity_admission_rejected_total',
+                                               'Notifications rejected by the admission control, by reason', 'reason'))
+EXPOSURE_CACHE = REGISTRY.register(Counter('proximity_exposure_cache_total',
+                                           'Exposure ranking queries, by cache result', 'result'))
+COMPRESSION_SAVED = REGISTRY.register(Counter('proximity_compression_saved_bytes_total',
+                                              'Bytes saved by the compressed transfers, by direction', 'direction'))
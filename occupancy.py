@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+# The location occupancy is saved to a sqlite database, in time buckets of {resolution} minutes:
+#   occupancy - each wireless client present at each location in each time bucket
+
+
+import sqlite3
+
+from proximity_model import pack_mac
+from proximity_reports import DwellTimeAggregator
+from report_format import format_mac
+
+
+HOUR = 60 * 60 * 1000
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS occupancy (
+    location TEXT NOT NULL,
+    bucket_start INTEGER NOT NULL,
+    client_mac TEXT NOT NULL,
+    PRIMARY KEY (location, bucket_start, client_mac)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS occupancy_bucket_start ON occupancy (bucket_start);
+'''
+
+
+class OccupancyTimeline:
+    """
+    Occupancy timeline of each location, updated with each client proximity notification
+    """
+
+    def __init__(self, db_path, resolution=5):
+        """
+        :param db_path: path to the sqlite database
+        :param resolution: time bucket size, in minutes
+        """
+        self.db_path = db_path
+        self.bucket_size = resolution * 60 * 1000
+        db = self.connect()
+        try:
+            db.execute('PRAGMA journal_mode=WAL')  # the queries are not blocked by the notifications being saved
+            db.executescript(SCHEMA)
+        finally:
+            db.close()
+
+    def connect(self):
+        """
+        Open a new connection to the database, each thread and process uses its own connection
+        :return: sqlite connection
+        """
+        return sqlite3.connect(self.db_path, timeout=60)
+
+    def buckets(self, start_time, end_time):
+        """
+        :param start_time: epoch time in msec
+        :param end_time: epoch time in msec
+        :return: the start time of each time bucket overlapping {start_time} - {end_time}
+        """
+        bucket_start = int(start_time) - int(start_time) % self.bucket_size
+        return range(bucket_start, max(int(end_time), bucket_start + 1), self.bucket_size)
+
+    def client_writer(self):
+        """
+        :return: OccupancyWriter, to add the time slices of one reported wireless client
+        """
+        return OccupancyWriter(self)
+
+    def clients(self, location, start_time, end_time):
+        """
+        Find the wireless clients present at the {location} between {start_time} and {end_time}
+        :param location: location, example {Global/San Jose/Building 24/Floor 1}
+        :param start_time: epoch time in msec
+        :param end_time: epoch time in msec
+        :return: list of client_mac and time present (in msec), sorted by the time present
+        """
+        db = self.connect()
+        try:
+            rows = db.execute(
+                'SELECT client_mac, COUNT(*) FROM occupancy WHERE location = ? AND bucket_start >= ? '
+                'AND bucket_start < ? GROUP BY client_mac ORDER BY COUNT(*) DESC',
+                (location, int(start_time) - int(start_time) % self.bucket_size, int(end_time))).fetchall()
+        finally:
+            db.close()
+        return [{'client_mac': client_mac, 'time': buckets * self.bucket_size} for client_mac, buckets in rows]
+
+    def peak_occupancy(self, start_time, end_time, location=None):
+        """
+        Find the peak number of wireless clients present at each location, for each hour
+        :param start_time: epoch time in msec
+        :param end_time: epoch time in msec
+        :param location: optional, only this location
+        :return: list of location, hour (epoch time in msec) and peak_occupancy, sorted by location and hour
+        """
+        query = ('SELECT location, bucket_start, COUNT(*) AS clients FROM occupancy '
+                 'WHERE bucket_start >= ? AND bucket_start < ?')
+        params = [int(start_time) - int(start_time) % HOUR, int(end_time)]
+        if location is not None:
+            query += ' AND location = ?'
+            params.append(location)
+        query = ('SELECT location, bucket_start - bucket_start % ' + str(HOUR) + ' AS hour, MAX(clients) FROM (' +
+                 query + ' GROUP BY location, bucket_start) GROUP BY location, hour ORDER BY location, hour')
+        db = self.connect()
+        try:
+            rows = db.execute(query, params).fetchall()
+        finally:
+            db.close()
+        return [{'location': location, 'hour': hour, 'peak_occupancy': clients} for location, hour, clients in rows]
+
+
+class OccupancyWriter:
+    """
+    Collect the presence of one reported wireless client and of the clients in proximity, saved to the occupancy
+    timeline in one transaction
+    """
+
+    def __init__(self, occupancy_timeline):
+        self.occupancy_timeline = occupancy_timeline
+        self.dwell_time_aggregator = DwellTimeAggregator()
+        self.presence = set()
+
+    def add_slice(self, time_slice):
+        """
+        Add the presence of all the users in the {time_slice} at the time slice location
+        :param time_slice: TimeSlice
+        :return:
+        """
+        self.dwell_time_aggregator.add_slice(time_slice)
+        location = time_slice.location
+        buckets = self.occupancy_timeline.buckets(time_slice.start_time, time_slice.end_time)
+        for user in time_slice.users_info:
+            # the packed MAC addresses are formatted when saved
+            client_mac = user.client_mac
+            for bucket_start in buckets:
+                self.presence.add((location, bucket_start, client_mac))
+
+    def save(self, wireless_mac_address):
+        """
+        Save the presence of the reported wireless client {wireless_mac_address}, using the dwell time at each
+        location, and of the clients in proximity
+        :param wireless_mac_address: MAC address of the reported wireless client
+        :return:
+        """
+        # the same format as the contact MAC addresses and the contact graph, example {aa:bb:cc:00:11:22}
+        client_mac = format_mac(pack_mac(wireless_mac_address))
+        presence = {(location, bucket_start, format_mac(contact_mac))
+                    for location, bucket_start, contact_mac in self.presence}
+        for dwell in self.dwell_time_aggregator.report():
+            for bucket_start in self.occupancy_timeline.buckets(dwell['start_time'], dwell['end_time']):
+                presence.add((dwell['location'], bucket_start, client_mac))
+        db = self.occupancy_timeline.connect()
+        try:
+            with db:
+                db.executemany('INSERT OR IGNORE INTO occupancy (location, bucket_start, client_mac) VALUES (?, ?, ?)',
+                               presence)
+        finally:
+            db.close()
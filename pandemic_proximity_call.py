@@ -26,24 +26,24 @@ __copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
 __license__ = "Cisco Sample Code License, Version 1.1"
 
 
-import requests
-import urllib3
+import argparse
 import datetime
 import json
-import time
 import logging
+import os
 
-from urllib3.exceptions import InsecureRequestWarning  # for insecure https warnings
-from requests.auth import HTTPBasicAuth  # for Basic Auth
 from datetime import datetime
 
-from config import DNAC_URL, DNAC_PASS, DNAC_USER
 from config import EVENT_ID
 from config import username, DAYS, TIME_RESOLUTION
-
-urllib3.disable_warnings(InsecureRequestWarning)  # disable insecure https warnings
-
-DNAC_AUTH = HTTPBasicAuth(DNAC_USER, DNAC_PASS)
+from config import BULK_CONCURRENCY, BULK_RETRY_DELAY, BULK_MAX_RETRY_DELAY, BULK_MAX_ATTEMPTS
+from dnac_client import create_client
+from config import EXECUTIONS_FILE, EXECUTION_POLL_INTERVAL, EXECUTION_MAX_POLL_INTERVAL, EXECUTION_TIMEOUT
+from config import EXECUTION_MAX_AGE
+from bulk_proximity import BulkProximityRequests, print_results
+from execution_tracker import ExecutionTracker, print_execution_results
+from subscription_discovery import SubscriptionDiscovery
+from fleet import run_fleet, print_fleet_summary
 
 
 def pprint(json_data):
@@ -55,54 +55,108 @@ def pprint(json_data):
     print(json.dumps(json_data, indent=4, separators=(' , ', ' : ')))
 
 
-def get_dnac_jwt_token(dnac_auth):
+def parse_args():
+    """
+    Parse the command line arguments, the usernames for the bulk mode
+    :return: the arguments
     """
-    Create the authorization token required to access DNA C
-    Call to Cisco DNA Center - /api/system/v1/auth/login
-    :param dnac_auth - Cisco DNA Center Basic Auth string
-    :return: Cisco DNA Center JWT token
+    parser = argparse.ArgumentParser(description='Request the client proximity information from Cisco DNA Center')
+    parser.add_argument('usernames', nargs='*',
+                        help='bulk mode, request the client proximity for these usernames, without confirmation')
+    parser.add_argument('--users-file', help='bulk mode, file with one username per line')
+    parser.add_argument('--concurrency', type=int, default=BULK_CONCURRENCY,
+                        help='bulk mode, maximum number of requests sent at the same time')
+    parser.add_argument('--resume', action='store_true',
+                        help='only track the executions not completed at the last run, until completed')
+    parser.add_argument('--fleet', action='store_true',
+                        help='send the requests to all the clusters in DNAC_CLUSTERS at the same time, without '
+                             'confirmation, for the usernames or the configured username')
+    return parser.parse_args()
+
+
+def read_usernames(args):
     """
-    url = DNAC_URL + '/dna/system/api/v1/auth/token'
-    header = {'content-type': 'application/json'}
-    response = requests.post(url, auth=dnac_auth, headers=header, verify=False)
-    dnac_jwt_token = response.json()['Token']
-    return dnac_jwt_token
+    :param args: the command line arguments
+    :return: the usernames for the bulk mode, in order and without duplicates, or [] if none
+    """
+    usernames = list(args.usernames)
+    if args.users_file:
+        with open(args.users_file) as f:
+            usernames += [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    return list(dict.fromkeys(usernames))
 
 
-def get_event_subscriptions(event_id, dnac_auth):
+def create_execution_tracker(dnac_client, cluster=None):
     """
-    This function will find the event subscription for the {event_id}
-    :param event_id: Cisco DNA Center event id, example {NETWORK-CLIENTS-3-506}
-    :param dnac_auth: Cisco DNA Center auth token
-    :return: existing subscriptions info, or [] if none
+    :param dnac_client: DNACClient
+    :param cluster: optional, the fleet cluster, the executions are saved to {EXECUTIONS_FILE} with the cluster name
+    :return: ExecutionTracker
     """
-    url = DNAC_URL + '/dna/intent/api/v1/event/subscription?eventIds=' + event_id + '&limit=100'
-    header = {'content-type': 'application/json', 'x-auth-token': dnac_auth}
-    response = requests.get(url, headers=header, verify=False)
-    response_json = response.json()
-    return response_json
+    executions_file = EXECUTIONS_FILE
+    if cluster is not None:
+        name, extension = os.path.splitext(EXECUTIONS_FILE)
+        executions_file = name + '_' + cluster['name'] + extension
+    return ExecutionTracker(dnac_client, executions_file, poll_interval=EXECUTION_POLL_INTERVAL,
+                            max_poll_interval=EXECUTION_MAX_POLL_INTERVAL, timeout=EXECUTION_TIMEOUT,
+                            max_age=EXECUTION_MAX_AGE)
 
 
-def client_proximity(client_username, days, resolution, dnac_auth):
+def execution_summary(execution_results):
     """
-    This function will start the task to collect the client proximity info for the {client_username}
-    for {days} in the past, and a time resolution {resolution}. The data that will be generated will be sent to the
-    webhook destination subscribed to the event id {NETWORK-CLIENTS-3-506}.
-    Proximity is defined as presence on the same floor and building, at the same time with the specified client
-    :param client_username: client username
-    :param days: how many days in the past maximum 14
-    :param resolution: minimum time that will be reported for proximity, recommended 15 min, minimum 5 minutes
-    :param dnac_auth: Cisco DNA Center auth token
-    :return: execution id information
+    :param execution_results: see {ExecutionTracker.run}
+    :return: dict with the number of executions completed, failed and timeout, and the maximum latency (seconds)
     """
-    url = DNAC_URL + '/dna/intent/api/v1/client-proximity'
-    url += '?username=' + client_username
-    url += '&number_days=' + str(days)
-    url += '&time_resolution=' + str(resolution)
-    header = {'content-type': 'application/json', 'x-auth-token': dnac_auth}
-    response = requests.get(url, headers=header, verify=False)
-    response_json = response.json()
-    return response_json
+    statuses = [result['status'] for result in execution_results]
+    latencies = [result['latency'] for result in execution_results if result['latency'] is not None]
+    return {
+        'completed': statuses.count('SUCCESS'), 'timeout': statuses.count('TIMEOUT'),
+        'execution_failed': len(statuses) - statuses.count('SUCCESS') - statuses.count('TIMEOUT'),
+        'max_latency': round(max(latencies), 1) if latencies else None
+    }
+
+
+def request_cluster(cluster, dnac_client, usernames, concurrency):
+    """
+    Send the client proximity requests for the {usernames} to one cluster of the fleet, and track the executions
+    until completed
+    :param cluster: the fleet cluster
+    :param dnac_client: DNACClient of the cluster
+    :param usernames: list of client usernames
+    :param concurrency: maximum number of requests sent at the same time
+    :return: dict with the number of subscriptions, the request summary, see {BulkProximityRequests.run}, and the
+    execution summary, see {execution_summary}
+    """
+    subscriptions = SubscriptionDiscovery(dnac_client).discover(EVENT_ID).subscriptions
+    if not subscriptions:
+        raise ValueError('No subscription to the event "' + EVENT_ID + '" found')
+    bulk_requests = BulkProximityRequests(dnac_client, DAYS, TIME_RESOLUTION, concurrency=concurrency,
+                                          retry_delay=BULK_RETRY_DELAY, max_retry_delay=BULK_MAX_RETRY_DELAY,
+                                          max_attempts=BULK_MAX_ATTEMPTS)
+    results, summary = bulk_requests.run(usernames)
+    execution_tracker = create_execution_tracker(dnac_client, cluster)
+    for result in results:
+        if result['status'] == 'submitted':
+            execution_tracker.add(result['execution_url'], result['username'], result['submitted'])
+    return dict(summary, subscriptions=len(subscriptions), **execution_summary(execution_tracker.run()))
+
+
+def request_fleet(usernames, concurrency, resume=False):
+    """
+    Send the client proximity requests to all the clusters of the fleet at the same time, and print the summary
+    :param usernames: list of client usernames
+    :param concurrency: maximum number of requests sent at the same time, to each cluster
+    :param resume: if True, only track the executions not completed at the last run
+    :return:
+    """
+    if resume:
+        results = run_fleet(lambda cluster, dnac_client: execution_summary(
+            create_execution_tracker(dnac_client, cluster).run()))
+    else:
+        results = run_fleet(lambda cluster, dnac_client: request_cluster(cluster, dnac_client, usernames,
+                                                                         concurrency))
+    print_fleet_summary(results, [('Submitted', 'submitted', sum), ('Failed', 'failed', sum),
+                                  ('Completed', 'completed', sum), ('Exec failed', 'execution_failed', sum),
+                                  ('Timeout', 'timeout', sum), ('Max latency', 'max_latency', max)])
 
 
 def main():
@@ -113,7 +167,12 @@ def main():
     All of the configured event destinations will receive the client proximity information
     The app will also update the user if the Cisco DNA Center task of processing all the required data has been
     successful, or is any errors.
+    In bulk mode, with the usernames as command line arguments or in a file, the requests are sent for all the
+    usernames without confirmation, the rejected requests are requeued with backoff.
+    In fleet mode, "--fleet", the requests are sent to all the clusters in {DNAC_CLUSTERS} at the same time.
     """
+    args = parse_args()
+    usernames = read_usernames(args)
 
     # logging, debug level, to file {application_run.log}
     logging.basicConfig(
@@ -125,16 +184,34 @@ def main():
     current_time = str(datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
     print('\n"pandemic_proximity_call.py" App Run Start, ', current_time)
 
-    # obtain a Cisco DNA Center auth token
-    dnac_auth = get_dnac_jwt_token(DNAC_AUTH)
+    if args.fleet:
+        print('\nA new client proximity data will be generated on all the clusters for: ' +
+              ', '.join(usernames or [username]))
+        request_fleet(usernames or [username], args.concurrency, args.resume)
+        current_time = str(datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        print('\n"pandemic_proximity_call.py" App Run End, ', current_time)
+        return
+
+    # the Cisco DNA Center API client, the auth token is cached until it expires
+    dnac_client = create_client()
+
+    # the executions not completed at the last run are tracked again
+    execution_tracker = create_execution_tracker(dnac_client)
+    if args.resume:
+        print('\nTracking the Client Proximity API calls status, executions: ' + str(len(execution_tracker.executions)))
+        print_execution_results(execution_tracker.run())
+        current_time = str(datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        print('\n"pandemic_proximity_call.py" App Run End, ', current_time)
+        return
 
-    # verify we have existing event subscriptions
+    # verify we have existing event subscriptions, all the pages and all the endpoints
     subscription_list = []
-    event_subscriptions = get_event_subscriptions(EVENT_ID, dnac_auth)
+    event_subscriptions = SubscriptionDiscovery(dnac_client).discover(EVENT_ID).subscriptions
 
     for sub in event_subscriptions:
-        details = sub['subscriptionEndpoints'][0]['subscriptionDetails']
-        subscription_list.append({'url': details['url'], 'name': details['name']})
+        for endpoint in sub['subscriptionEndpoints']:
+            details = endpoint['subscriptionDetails']
+            subscription_list.append({'url': details['url'], 'name': details['name']})
 
     if len(subscription_list) == 0:
         print('\nNo subscription to the event "' + EVENT_ID + '" found, please subscribe to this event to receive the '
@@ -146,6 +223,25 @@ def main():
     for sub in subscription_list:
         print('{0:40} {1:80}'.format(sub['name'], sub['url']))
 
+    if usernames:
+        print('\nA new client proximity data will be generated for ' + str(len(usernames)) + ' users, ' +
+              str(DAYS) + ' days, time resolution ' + str(TIME_RESOLUTION) + ' minutes')
+        bulk_requests = BulkProximityRequests(dnac_client, DAYS, TIME_RESOLUTION, concurrency=args.concurrency,
+                                              retry_delay=BULK_RETRY_DELAY, max_retry_delay=BULK_MAX_RETRY_DELAY,
+                                              max_attempts=BULK_MAX_ATTEMPTS)
+        results, summary = bulk_requests.run(usernames)
+        print_results(results, summary)
+
+        # track the executions until completed
+        for result in results:
+            if result['status'] == 'submitted':
+                execution_tracker.add(result['execution_url'], result['username'], result['submitted'])
+        print('\nTracking the Client Proximity API calls status')
+        print_execution_results(execution_tracker.run())
+        current_time = str(datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        print('\n"pandemic_proximity_call.py" App Run End, ', current_time)
+        return
+
     print('\nA new client proximity data will be generated for:')
     print('{0:30} {1:20}'.format('User:', username))
     print('{0:30} {1:20}'.format('Number of Days:', str(DAYS)))
@@ -159,7 +255,7 @@ def main():
         return
 
     # request the client proximity information
-    proximity_call_result = client_proximity(username, DAYS, TIME_RESOLUTION, dnac_auth)
+    proximity_call_result = dnac_client.client_proximity(username, DAYS, TIME_RESOLUTION)
     try:
         execution_error = proximity_call_result['bapiExtendedStatusDescription']
         print('\nThe client proximity API call encountered an error:\n' + execution_error)
@@ -169,17 +265,11 @@ def main():
         pass
     execution_url = proximity_call_result['executionStatusUrl']
 
-    # check the execution status in 30 seconds
-    time.sleep(15)
-
-    url = DNAC_URL + execution_url
-    header = {'content-type': 'application/json', 'x-auth-token': dnac_auth}
-    response = requests.get(url, headers=header, verify=False)
-    response_json = response.json()
-    execution_status = response_json['status']
-
-    print('\nClient Proximity API call status: ', execution_status)
-    print('The client proximity data will be sent to your webhook destination, when task completed. It may take up to 30 minutes for all the data to be collected')
+    # track the execution until completed, it may take up to 30 minutes for all the data to be collected
+    execution_tracker.add(execution_url, username)
+    print('\nThe client proximity data will be sent to your webhook destination, when task completed. Tracking the '
+          'Client Proximity API call status, it may take up to 30 minutes for all the data to be collected')
+    print_execution_results(execution_tracker.run())
 
     current_time = str(datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
     print('\n"pandemic_proximity_call.py" App Run End, ', current_time)
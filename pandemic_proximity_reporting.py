@@ -26,27 +26,42 @@ __copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
 __license__ = "Cisco Sample Code License, Version 1.1"
 
 
-import urllib3
-import json
 import os
 import time
-import datetime
-
-
-from fpdf import FPDF  # for creating pdf files
+import urllib3
 
-from flask import Flask, request, send_from_directory
+from flask import Flask, request, jsonify, Response, stream_with_context, send_file
 from flask_basicauth import BasicAuth
 
 from urllib3.exceptions import InsecureRequestWarning  # for insecure https warnings
 
 
-os.environ['TZ'] = 'America/Los_Angeles'  # define the timezone for PST
-time.tzset()  # adjust the timezone, more info https://help.pythonanywhere.com/pages/SettingTheTimezone/
-
 urllib3.disable_warnings(InsecureRequestWarning)  # disable insecure https warnings
 
 from config import WEBHOOK_USERNAME, WEBHOOK_PASSWORD
+from config import REPORT_EXECUTOR, REPORT_WORKERS, REPORT_QUEUE_SIZE, SPOOL_FOLDER, REPORT_PROCESSES
+from config import STREAMING_INGESTION, STORE_FOLDER, STORE_SEGMENT_SIZE, REPORT_FORMAT
+from config import CONTACT_GRAPH_DB, OCCUPANCY_DB, OCCUPANCY_RESOLUTION
+from config import TIMEZONE, SITE_TIMEZONES
+from config import DEDUP_DB, DEDUP_MAX_ENTRIES
+from config import INCREMENTAL_REPORTS, USER_REPORTS_FOLDER
+from config import PDF_CACHE_FOLDER, PDF_CACHE_SIZE, EXPOSURE_CACHE_SIZE
+from config import ADMISSION_MAX_IN_FLIGHT, ADMISSION_MAX_QUEUED_BYTES, ADMISSION_MAX_BODY_SIZE
+from config import ADMISSION_STREAMING_SIZE, ADMISSION_RETRY_AFTER
+from config import COMPRESSION_LEVEL, COMPRESSION_MIN_SIZE
+from admission import AdmissionControl, AdmissionRejected
+from http_compression import content_encoding, accepts_gzip, gzip_chunks, compress_response
+from report_jobs import ReportJobs
+from proximity_reports import get_process_pool
+from proximity_store import ProximityStore
+from contact_graph import ContactGraph
+from exposure import ExposureRanking
+from occupancy import OccupancyTimeline
+from dedup_index import DedupIndex
+from user_reports import UserReports
+from pdf_reports import PDFReports
+from metrics import REGISTRY, QUEUE_DEPTH, QUEUED_BYTES, STAGE_SECONDS
+from proximity_time import TimeZones, valid_timezone
 
 
 app = Flask(__name__)
@@ -57,6 +72,35 @@ app.config['BASIC_AUTH_PASSWORD'] = WEBHOOK_PASSWORD
 
 basic_auth = BasicAuth(app)
 
+# the report processes are forked first, before the threads are started and the files are opened
+if REPORT_EXECUTOR == 'process':
+    get_process_pool(REPORT_WORKERS)
+elif REPORT_PROCESSES > 1:
+    get_process_pool(REPORT_PROCESSES)
+proximity_store = ProximityStore(STORE_FOLDER, segment_size=STORE_SEGMENT_SIZE)
+contact_graph = ContactGraph(CONTACT_GRAPH_DB)
+exposure_ranking = ExposureRanking(contact_graph, EXPOSURE_CACHE_SIZE)
+occupancy_timeline = OccupancyTimeline(OCCUPANCY_DB, resolution=OCCUPANCY_RESOLUTION)
+dedup_index = DedupIndex(DEDUP_DB, max_entries=DEDUP_MAX_ENTRIES)
+user_reports = UserReports(USER_REPORTS_FOLDER) if INCREMENTAL_REPORTS else None
+report_jobs = ReportJobs(SPOOL_FOLDER, workers=REPORT_WORKERS, queue_size=REPORT_QUEUE_SIZE, executor=REPORT_EXECUTOR,
+                         streaming=STREAMING_INGESTION, store=proximity_store, processes=REPORT_PROCESSES,
+                         indexers=[contact_graph, occupancy_timeline],
+                         timezones=TimeZones(TIMEZONE, SITE_TIMEZONES), report_format=REPORT_FORMAT, dedup=dedup_index,
+                         user_reports=user_reports)
+pdf_reports = PDFReports(PDF_CACHE_FOLDER, PDF_CACHE_SIZE)
+admission_control = AdmissionControl(max_in_flight=ADMISSION_MAX_IN_FLIGHT, max_queued_bytes=ADMISSION_MAX_QUEUED_BYTES,
+                                     max_body_size=ADMISSION_MAX_BODY_SIZE, streaming_size=ADMISSION_STREAMING_SIZE,
+                                     retry_after=ADMISSION_RETRY_AFTER, queued_bytes=report_jobs.queued_bytes)
+REGISTRY.add_collector(lambda: QUEUE_DEPTH.set(report_jobs.queue.qsize()))
+REGISTRY.add_collector(lambda: QUEUED_BYTES.set(report_jobs.queued_bytes()))
+
+
+@app.after_request
+def compress(response):
+    # the responses are compressed with gzip if accepted by the client, the streamed responses by their route
+    return compress_response(response, request.accept_encodings, COMPRESSION_LEVEL, COMPRESSION_MIN_SIZE)
+
 
 @app.route('/')  # create a page for testing the flask framework
 # @basic_auth.required
@@ -67,8 +111,126 @@ def index():
 @app.route('/client_proximity_data', methods=['GET'])  # create a return detailed logs file
 @basic_auth.required
 def detailed_logs():
-    print('File client_proximity_data.log requested, transfer started')
-    return send_from_directory('', 'client_proximity_data.log', as_attachment=True)
+    # optional filters: user_name, mac_address, start_time and end_time (epoch time in msec)
+    filters = {key: request.args[key] for key in ('user_name', 'mac_address', 'start_time', 'end_time')
+               if key in request.args}
+    try:
+        records = proximity_store.find(**filters)
+    except ValueError:
+        return 'The start_time and end_time must be epoch time in msec', 400
+    print('File client_proximity_data.log requested, transfer started, notifications: ' + str(len(records)))
+    headers = {'Content-Disposition': 'attachment; filename=client_proximity_data.log', 'Accept-Ranges': 'bytes',
+               'Vary': 'Accept-Encoding'}
+    length = sum(record_length for _, _, record_length in records)
+    # a byte range of the log, uncompressed, example to resume a download. The notifications are only appended to the
+    # store, a range of the same filters is still valid later. If-Range is not matched, no validators are sent
+    byte_range = request.range if 'If-Range' not in request.headers else None
+    if byte_range is not None and byte_range.units == 'bytes' and len(byte_range.ranges) == 1:
+        content_range = byte_range.range_for_length(length)
+        if content_range is None:
+            return 'Requested range not satisfiable', 416, {'Content-Range': 'bytes */' + str(length)}
+        start, end = content_range
+        headers.update({'Content-Range': 'bytes %d-%d/%d' % (start, end - 1, length),
+                        'Content-Length': str(end - start)})
+        return Response(stream_with_context(proximity_store.iter_records(records, start, end)), 206,
+                        mimetype='application/x-ndjson', headers=headers)
+    if accepts_gzip(request.accept_encodings):
+        headers['Content-Encoding'] = 'gzip'
+        chunks = gzip_chunks(proximity_store.iter_records(records), COMPRESSION_LEVEL)
+    else:
+        headers['Content-Length'] = str(length)
+        chunks = proximity_store.iter_records(records)
+    return Response(stream_with_context(chunks), mimetype='application/x-ndjson', headers=headers)
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])  # create a route for the report job status
+@basic_auth.required
+def job_status(job_id):
+    job = report_jobs.status(job_id)
+    if job is None:
+        return 'Job not found', 404
+    return jsonify(job), 200
+
+
+@app.route('/dedup', methods=['GET'])  # the counters of the notifications received and skipped as duplicates
+@basic_auth.required
+def dedup_stats():
+    return jsonify(dedup_index.stats()), 200
+
+
+@app.route('/metrics', methods=['GET'])  # the receiver metrics, in the Prometheus text format
+@basic_auth.required
+def metrics():
+    return Response(REGISTRY.exposition(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/reports/<name>/pdf', methods=['GET'])  # the PDF of the reports of a user or of a report folder
+@basic_auth.required
+def report_pdf(name):
+    # optional: tz, IANA timezone name for the dwell times, instead of the site timezones
+    timezone = request.args.get('tz')
+    if timezone is not None and not valid_timezone(timezone):
+        return 'Unknown timezone: ' + timezone, 400
+    if name != os.path.basename(name) or name.startswith('.'):
+        return 'Reports not found', 404
+    folders = [os.path.join(USER_REPORTS_FOLDER, name)] if INCREMENTAL_REPORTS else []
+    for folder in folders + [name]:
+        if os.path.isdir(folder):
+            # the PDF is opened by the cache, not removed from the cache before it is sent
+            pdf_file = pdf_reports.pdf(name, folder, report_jobs.timezones.for_request(timezone))
+            if pdf_file is not None:
+                return send_file(pdf_file, mimetype='application/pdf', download_name=name + '.pdf')
+    return 'Reports not found', 404
+
+
+@app.route('/contacts/<client_mac>', methods=['GET'])  # create a route for the contact tracing queries
+@basic_auth.required
+def contacts(client_mac):
+    # optional: min_minutes, minimum total time in proximity, and degree, 1 or 2 (default)
+    try:
+        min_minutes = float(request.args.get('min_minutes', 0))
+        degree = int(request.args.get('degree', 2))
+    except ValueError:
+        return 'The min_minutes and degree must be numbers', 400
+    return jsonify(contact_graph.contacts(client_mac, min_time=int(min_minutes * 60 * 1000), degree=degree)), 200
+
+
+@app.route('/exposure/top', methods=['GET'])  # create a route for the clients with the longest time in proximity
+@basic_auth.required
+def exposure_top():
+    # optional: start_time and end_time (epoch time in msec), default the last 7 days, and n, number of clients
+    try:
+        end_time = int(request.args.get('end_time', time.time() * 1000))
+        start_time = int(request.args.get('start_time', end_time - 7 * 24 * 60 * 60 * 1000))
+        limit = int(request.args.get('n', 20))
+    except ValueError:
+        return 'The start_time and end_time (epoch time in msec) and n must be integers', 400
+    return jsonify(exposure_ranking.top(start_time, end_time, limit)), 200
+
+
+@app.route('/occupancy', methods=['GET'])  # create a route for the location occupancy queries
+@basic_auth.required
+def occupancy():
+    # location, start_time and end_time (epoch time in msec) are required
+    try:
+        location = request.args['location']
+        start_time = int(request.args['start_time'])
+        end_time = int(request.args['end_time'])
+    except (KeyError, ValueError):
+        return 'The location, start_time and end_time (epoch time in msec) are required', 400
+    return jsonify(occupancy_timeline.clients(location, start_time, end_time)), 200
+
+
+@app.route('/occupancy/peak', methods=['GET'])  # create a route for the peak occupancy per location per hour
+@basic_auth.required
+def peak_occupancy():
+    # start_time and end_time (epoch time in msec) are required, location is optional
+    try:
+        start_time = int(request.args['start_time'])
+        end_time = int(request.args['end_time'])
+    except (KeyError, ValueError):
+        return 'The start_time and end_time (epoch time in msec) are required', 400
+    return jsonify(occupancy_timeline.peak_occupancy(start_time, end_time, request.args.get('location'))), 200
 
 
 @app.route('/proximity', methods=['POST'])  # create a route for /proximity, method POST, to receive the webhook with
@@ -76,147 +238,45 @@ def detailed_logs():
 def proximity_webhook():
     if request.method == 'POST':
         print('Proximity Webhook Received')
-        webhook_json = request.json
-
-        # save as a file, create new file if not existing, append to existing file, full details of each notification
-        with open('client_proximity_data.log', 'a') as filehandle:
-            filehandle.write('%s\n' % json.dumps(webhook_json))
-
-        # print the received notification
-        print('Payload: ')
-        print(webhook_json)
-
-        # create reports with the data received
-
-        proximity_details = webhook_json['details']
-        username = proximity_details['user_name']
-        time_resolution = proximity_details['time_resolution']
-        number_days = proximity_details['number_days']
-        start_time_epoch = int(proximity_details['start_time'])
-        start_time = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(int(start_time_epoch/1000)))
-        end_time_epoch = int(proximity_details['end_time'])
-        end_time = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(int(end_time_epoch/1000)))
-        proximity_data = proximity_details['client_proximity']
-
-        # create a folder to save the reports to
-        current_time = str(datetime.datetime.now().strftime('%Y%m%d-%H%M%S'))
-        folder_name = username + '-' + current_time
-        os.mkdir(folder_name)
-
-        # create reports for each wireless client in the list of devices
-        for data_set in proximity_data:
-            wireless_mac_address = data_set['mac_address']
-            client_info = data_set['client_info']
-
-            # create report for proximity time for each client
-            # data structure that will be used to report:
-            # user_info: client_mac, username, device type, total time in proximity of pandemic positive employee
-
-            users_list_time = []
-            users_unique_list = set()
-            # loop through all time intervals, collect all wireless clients and length of time in proximity
-            for event in client_info:
-                time_length = int(event['end_time']) - int(event['start_time'])
-                # loop through all users in each time interval
-                for user in event['users_info']:
-                    user_updated_with_time = {**user, **{'time_length': time_length}}
-                    users_list_time.append(user_updated_with_time)
-                    users_unique_list.add(user['client_mac'])
-
-            # add all time intervals
-            users_list_total_time = []
-            for unique_user in users_unique_list:
-                total_time = 0
-                for user in users_list_time:
-                    if unique_user == user['client_mac']:
-                        total_time += user['time_length']
-                        try:
-                            user_details = {
-                                'client_mac': user['client_mac'], 'client_user': user['client_user'],
-                                'client_type': user['client_type']
-                            }
-                        except:
-                            pass
-                user_details.update({'total_time': total_time})
-                users_list_total_time.append(user_details)
-
-            # sort the list by using the total time (in msec)
-            sorted_users_total_time = sorted(users_list_total_time, key=lambda x: x['total_time'], reverse=True)
-
-            # convert the list to use the time in: days hh:mm:ss
-            for user in sorted_users_total_time:
-                total_time_dhms = str(datetime.timedelta(seconds=int(user['total_time']/1000)))
-                user['total_time'] = total_time_dhms
-
-            # save proximity tracing report by total time
-            filename = wireless_mac_address.replace(':','')
-            with open(folder_name + '/proximity_total_time_' + filename + '.json', 'w') as f:
-                for item in sorted_users_total_time:
-                    f.write("%s\n" % item)
-
-            print('Total time for each employee in proximity report completed')
-
-            # report for pandemic employee dwell time at each floor/location
-            employee_dwell_info = []
-
-            for time_slice in client_info:
-                employee_dwell_info.append({
-                                               'location': time_slice['location'],
-                                               'start_time': time_slice['start_time'],
-                                               'end_time': time_slice['end_time']
-                                           })
-
-            employee_dwell_time = []
-
-            last_start_timestamp = employee_dwell_info[0]['start_time']
-            last_end_timestamp = employee_dwell_info[0]['start_time']
-            last_location = employee_dwell_info[0]['location']
-            for time_slice in employee_dwell_info:
-                if last_location == time_slice['location']:
-                    if last_end_timestamp == time_slice['start_time']:
-                        last_end_timestamp = time_slice['end_time']
+        # optional: tz, IANA timezone name for the reports of this notification, instead of the site timezones
+        timezone = request.args.get('tz')
+        if timezone is not None and not valid_timezone(timezone):
+            return 'Unknown timezone: ' + timezone, 400
+
+        # optional: Content-Encoding gzip or deflate, the notification is decompressed while read
+        encoding = content_encoding(request.headers.get('Content-Encoding'))
+        try:
+            # admitted before the body is read, the notifications above the limits are rejected, 503 with Retry-After
+            with admission_control.admit(request.content_length, encoding) as streaming:
+                # save the notification to the spool folder, streamed in chunks if configured, or if large or compressed
+                with STAGE_SECONDS.time('receive'):
+                    if STREAMING_INGESTION or streaming:
+                        job_id = report_jobs.save(admission_control.body_chunks(request.stream, encoding), timezone,
+                                                  streaming=streaming)
                     else:
-                        employee_dwell_time.append({
-                                                       'location': last_location, 'start_time': last_start_timestamp,
-                                                       'end_time': last_end_timestamp
-                                                   })
-                        last_start_timestamp = time_slice['start_time']
-                        last_end_timestamp = time_slice['end_time']
-                        last_location = time_slice['location']
-                else:
-                    employee_dwell_time.append({
-                        'location': last_location, 'start_time': last_start_timestamp,
-                        'end_time': last_end_timestamp
-                    })
-                    last_start_timestamp = time_slice['start_time']
-                    last_end_timestamp = time_slice['end_time']
-                    last_location = time_slice['location']
-            employee_dwell_time.append({
-                'location': last_location, 'start_time': last_start_timestamp,
-                'end_time': last_end_timestamp
-            })
-
-            # convert timestamps to local time
-            for time_slice in employee_dwell_time:
-                start_time_local = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(int(int(time_slice[
-                                                                                             'start_time'])/1000)))
-                end_time_local = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(int(int(time_slice[
-                                                                                               'end_time'])/1000)))
-                time_slice.update({'start_time': start_time_local, 'end_time': end_time_local})
-
-            print('Employee dwell time at each location report completed')
-
-            # save employee dwell time report
-            filename = wireless_mac_address.replace(':', '')
-            with open(folder_name + '/dwell_total_time_' + filename + '.json', 'w') as f:
-                for item in employee_dwell_time:
-                    f.write("%s\n" % item)
-
-        # send the response message
-        return 'Webhook Received', 202
+                        job_id = report_jobs.save([request.get_data()], timezone)
+
+                # the notifications redelivered by Cisco DNA Center are acknowledged, the reports are created once
+                original_job_id = report_jobs.deduplicate(job_id)
+                if original_job_id is not None:
+                    print('Duplicate notification, already received as: ' + original_job_id)
+                    return 'Webhook Received', 200, {'Location': '/jobs/' + original_job_id}
+
+                # queue the notification, the reports will be created by the report workers
+                if not report_jobs.submit(job_id):
+                    raise admission_control.reject('queue_full')
+        except AdmissionRejected as rejected:
+            print('Notification rejected: ' + rejected.reason)
+            return rejected.response()
+        print('Report job queued: ' + job_id)
+
+        # send the response message, the job status is available at {Location}
+        return 'Webhook Received', 202, {'Location': '/jobs/' + job_id}
     else:
         return 'POST Method not supported', 405
 
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    # a single process, the report workers are started at import. Several processes, see the README: gunicorn
+    # --workers 4 pandemic_proximity_reporting:app
+    app.run(debug=True, use_reloader=False)
@@ -26,24 +26,19 @@ __copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
 __license__ = "Cisco Sample Code License, Version 1.1"
 
 
-import requests
-import urllib3
+import argparse
 import datetime
 import json
 import logging
 
-from urllib3.exceptions import InsecureRequestWarning  # for insecure https warnings
-from requests.auth import HTTPBasicAuth  # for Basic Auth
 from datetime import datetime
 
-from config import DNAC_URL, DNAC_PASS, DNAC_USER
 from config import EVENT_ID
 from config import SUBSCRIPTION_NAME
 from config import WEBHOOK_URL
-
-urllib3.disable_warnings(InsecureRequestWarning)  # disable insecure https warnings
-
-DNAC_AUTH = HTTPBasicAuth(DNAC_USER, DNAC_PASS)
+from dnac_client import create_client
+from subscription_discovery import SubscriptionDiscovery
+from fleet import run_fleet, print_fleet_summary
 
 
 def pprint(json_data):
@@ -55,59 +50,68 @@ def pprint(json_data):
     print(json.dumps(json_data, indent=4, separators=(' , ', ' : ')))
 
 
-def get_dnac_jwt_token(dnac_auth):
+def subscribe(dnac_client, webhook_url=WEBHOOK_URL):
     """
-    Create the authorization token required to access DNA C
-    Call to Cisco DNA Center - /api/system/v1/auth/login
-    :param dnac_auth - Cisco DNA Center Basic Auth string
-    :return: Cisco DNA Center JWT token
+    Create the event subscription for the destination {webhook_url}, if not existing
+    :param dnac_client: DNACClient
+    :param webhook_url: the webhook destination URL, configured on Cisco DNA Center
+    :return: dict with the number of destinations and of subscriptions for the event {EVENT_ID}, destination_found,
+    existing_subscription, created (1 if a new subscription was created) and the new_subscription API call result
     """
-    url = DNAC_URL + '/dna/system/api/v1/auth/token'
-    header = {'content-type': 'application/json'}
-    response = requests.post(url, auth=dnac_auth, headers=header, verify=False)
-    dnac_jwt_token = response.json()['Token']
-    return dnac_jwt_token
+    # get all the configured webhooks destinations and the subscriptions for the event, all the pages
+    discovery = SubscriptionDiscovery(dnac_client).discover(EVENT_ID)
+    result = {'destinations': len(discovery.destinations), 'subscriptions': len(discovery.subscriptions),
+              'destination_found': False, 'existing_subscription': None, 'created': 0, 'new_subscription': None}
 
+    # identify the one matching the desired url
+    destination = discovery.destination(webhook_url)
+    if destination is None:
+        return result
+    result['destination_found'] = True
+    destination_id = destination['instanceId']
 
-def get_event_subscriptions(event_id, dnac_auth):
-    """
-    This function will find the event subscription for the {event_id}
-    :param event_id: Cisco DNA Center event id, example {NETWORK-CLIENTS-3-506}
-    :param dnac_auth: Cisco DNA Center auth token
-    :return: existing subscriptions info, or [] if none
-    """
-    url = DNAC_URL + '/dna/intent/api/v1/event/subscription?eventIds=' + event_id + '&limit=100'
-    header = {'content-type': 'application/json', 'x-auth-token': dnac_auth}
-    response = requests.get(url, headers=header, verify=False)
-    response_json = response.json()
-    return response_json
+    # verify if existing destination is configured for event, in any of the subscription endpoints
+    if discovery.destination_subscriptions(destination_id):
+        result['existing_subscription'] = True
+        return result
 
+    subscription_info = [
+        {
+            'name': SUBSCRIPTION_NAME,
+            'subscriptionEndpoints': [
+                {
+                    'instanceId': destination_id,
+                    'subscriptionDetails': {
+                        'connectorType': 'REST'
+                    }
+                }
+            ],
+            'filter': {
+                'eventIds': [
+                     EVENT_ID
+                ]
+            }
+        }
+    ]
 
-def get_destination_details(dnac_auth):
-    """
-    The function will retrieve all REST based (webhooks) destinations configured
-    :param dnac_auth: Cisco DNA Center auth token
-    :return: list with all the configured webhooks
-    """
-    url = DNAC_URL + '/dna/intent/api/v1/event/subscription-details?connectorType=REST'
-    header = {'content-type': 'application/json', 'x-auth-token': dnac_auth}
-    response = requests.get(url, headers=header, verify=False)
-    response_json = response.json()
-    return response_json
+    result['new_subscription'] = dnac_client.create_event_subscription(subscription_info)
+    result['created'] = 1
+    return result
 
 
-def create_event_subscription(subscription_info, dnac_auth):
+def subscribe_fleet():
     """
-    This function will create a new event subscription
-    :param subscription_info: subscription info required for the subscription
-    :param dnac_auth: Cisco DNA Center auth token
+    Create the event subscription on all the clusters of the fleet, at the same time, the {webhook_url} of each
+    cluster or {WEBHOOK_URL}
     :return:
     """
-    url = DNAC_URL + '/dna/intent/api/v1/event/subscription'
-    header = {'content-type': 'application/json', 'x-auth-token': dnac_auth}
-    response = requests.post(url, headers=header, data=json.dumps(subscription_info), verify=False)
-    response_json = response.json()
-    return response_json
+    results = run_fleet(lambda cluster, dnac_client: subscribe(dnac_client, cluster.get('webhook_url', WEBHOOK_URL)))
+    print_fleet_summary(results, [('Destinations', 'destinations', sum), ('Subscriptions', 'subscriptions', sum),
+                                  ('Created', 'created', sum)])
+    for result in results:
+        if result['status'] == 'ok' and not result['result']['destination_found']:
+            print('\nDestination not found on the cluster ' + result['cluster'] + ', please configure the new '
+                  'destination using the Cisco DNA Center UI: System --> Settings --> Destinations')
 
 
 def main():
@@ -118,7 +122,11 @@ def main():
         System --> Settings --> Destinations
     - will find existing subscriptions for the event with the id {EVENT_ID}
     - create new event subscription (if not existing) for the destination {WEBHOOK_URL}
+    With "--fleet", the subscriptions are created on all the clusters configured in {DNAC_CLUSTERS}.
     """
+    parser = argparse.ArgumentParser(description='Subscribe the webhook destination to the client proximity event')
+    parser.add_argument('--fleet', action='store_true', help='subscribe on all the clusters in DNAC_CLUSTERS')
+    args = parser.parse_args()
 
     # logging, debug level, to file {application_run.log}
     logging.basicConfig(
@@ -130,64 +138,29 @@ def main():
     current_time = str(datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
     print('\n"pandemic_proximity_subscription.py" App Run Start, ', current_time)
 
-    # obtain a Cisco DNA Center auth token
-    dnac_auth = get_dnac_jwt_token(DNAC_AUTH)
-
-    # get all the configured webhooks destinations
-    destinations_list = get_destination_details(dnac_auth)
+    if args.fleet:
+        subscribe_fleet()
+        current_time = str(datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        print('\n"pandemic_proximity_subscription.py" App Run End, ', current_time)
+        return
 
-    # identify the one matching the desired url
-    destination_id = ''
-    for destination in destinations_list:
-        if destination['url'] == WEBHOOK_URL:
-            destination_id = destination['instanceId']
+    # the Cisco DNA Center API client, the auth token is cached until it expires
+    dnac_client = create_client()
+    result = subscribe(dnac_client)
+    print('\nDestinations found: ' + str(result['destinations']) + ', subscriptions for the event ' + EVENT_ID +
+          ': ' + str(result['subscriptions']))
 
-    if destination_id is '':
+    if not result['destination_found']:
         print('\nDestination for the url ' + WEBHOOK_URL + ' not found')
         print('\nPlease configure the new destination using the Cisco DNA Center UI: ')
         print('System --> Settings --> Destinations')
-        current_time = str(datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
-        print('\n"pandemic_proximity_subscription.py" App Run End, ', current_time)
-        return
     else:
         print('\nDestination for the url ' + WEBHOOK_URL + ' found')
-
-    # verify if existing destination is configured for event
-    event_subscriptions = get_event_subscriptions(EVENT_ID, dnac_auth)
-
-    existing_subscription = None
-    for subscription in event_subscriptions:
-        subscription_id = subscription['subscriptionEndpoints'][0]['instanceId']
-        if subscription_id == destination_id:
-            existing_subscription = True
-            print('\nExisting subscription: ', existing_subscription, ', will not add new subscription')
-            current_time = str(datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
-            print('\n"pandemic_proximity_subscription.py" App Run End, ', current_time)
-            return
-
-    print('\nExisting subscription: ', existing_subscription, ', will add new subscription')
-
-    subscription_info = [
-        {
-            'name': SUBSCRIPTION_NAME,
-            'subscriptionEndpoints': [
-                {
-                    'instanceId': destination_id,
-                    'subscriptionDetails': {
-                        'connectorType': 'REST'
-                    }
-                }
-            ],
-            'filter': {
-                'eventIds': [
-                     EVENT_ID
-                ]
-            }
-        }
-    ]
-
-    new_subscription = create_event_subscription(subscription_info, dnac_auth)
-    print('\nNew subscription API call result:', new_subscription)
+        if result['existing_subscription']:
+            print('\nExisting subscription: ', result['existing_subscription'], ', will not add new subscription')
+        else:
+            print('\nExisting subscription: ', result['existing_subscription'], ', will add new subscription')
+            print('\nNew subscription API call result:', result['new_subscription'])
 
     current_time = str(datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
     print('\n"pandemic_proximity_subscription.py" App Run End, ', current_time)
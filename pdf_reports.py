@@ -0,0 +1,252 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+# The PDF of the reports of a user or report folder is rendered on the first request and saved to a disk cache, the
+# cache key is the hash of the report files, a PDF is rendered again only when the reports change. The least recently
+# used PDFs are removed when the cache is larger than its maximum size. {fpdf} is imported when the first PDF is
+# rendered.
+
+
+import hashlib
+import io
+import json
+import os
+import threading
+
+from metrics import PDF_CACHE
+from proximity_time import TimeZones
+from report_format import REPORT_EXTENSIONS, load_report
+
+
+RENDER_VERSION = 1  # part of the cache key, changed when the PDF layout changes
+REPORT_PREFIXES = ('proximity_total_time_', 'dwell_total_time_')
+
+PAGE_WIDTH = 190  # mm, A4 without the margins
+TOTAL_TIME_COLUMNS = [('Client MAC', 'client_mac', 40), ('User', 'client_user', 60), ('Type', 'client_type', 45),
+                      ('Total time', 'total_time', 45)]
+DWELL_TIME_COLUMNS = [('Location', 'location', 110), ('Start', 'start_time', 40), ('End', 'end_time', 40)]
+
+
+def report_files(folder):
+    """
+    :param folder: report folder
+    :return: sorted list of the report file names in the {folder}
+    """
+    extensions = tuple(REPORT_EXTENSIONS.values())
+    return sorted(filename for filename in os.listdir(folder)
+                  if filename.startswith(REPORT_PREFIXES) and filename.endswith(extensions))
+
+
+def load_rows(file_path, timezones=None):
+    """
+    Load a report with the formatted times
+    :param file_path: report file path, columnar or JSON Lines
+    :param timezones: TimeZones for the dwell times of the columnar reports, see {ColumnarReport.formatted_rows}
+    :return: list of the report items
+    """
+    if file_path.endswith(REPORT_EXTENSIONS['columnar']):
+        return load_report(file_path).formatted_rows(timezones)
+    with open(file_path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def reports_hash(folder, filenames, timezones):
+    """
+    :param folder: report folder
+    :param filenames: the report file names
+    :param timezones: TimeZones of the dwell times
+    :return: hash of the report files and the timezones, the cache key of the PDF
+    """
+    content_hash = hashlib.sha256(repr((RENDER_VERSION, timezones.default, timezones.sites)).encode('utf-8'))
+    for filename in filenames:
+        content_hash.update(filename.encode('utf-8') + b'\0')
+        with open(os.path.join(folder, filename), 'rb') as f:
+            data = f.read()
+        content_hash.update(str(len(data)).encode('utf-8') + b'\0' + data)
+    return content_hash.hexdigest()
+
+
+def pdf_text(value):
+    """
+    :param value: report value
+    :return: the value as text, the characters not supported by the PDF core fonts replaced
+    """
+    return ('' if value is None else str(value)).encode('latin-1', 'replace').decode('latin-1')
+
+
+def _table(pdf, columns, rows):
+    pdf.set_font('Arial', 'B', 9)
+    for header, _, width in columns:
+        pdf.cell(width, 6, header, border=1)
+    pdf.ln()
+    pdf.set_font('Arial', '', 9)
+    for row in rows:
+        for _, key, width in columns:
+            text = pdf_text(row.get(key))
+            # truncated to the column width
+            while text and pdf.get_string_width(text) > width - 2:
+                text = text[:-1]
+            pdf.cell(width, 5, text, border=1)
+        pdf.ln()
+    pdf.ln(4)
+
+
+def render_pdf(title, folder, filenames, timezones=None):
+    """
+    Render the total time in proximity and the dwell time reports of each wireless client
+    :param title: the PDF title, example the username
+    :param folder: report folder
+    :param filenames: the report file names
+    :param timezones: TimeZones for the dwell times, see {load_rows}
+    :return: the PDF, bytes
+    """
+    from fpdf import FPDF  # loaded with the first PDF, the receiver does not import it at start
+
+    clients = {}
+    for filename in filenames:
+        prefix = next(prefix for prefix in REPORT_PREFIXES if filename.startswith(prefix))
+        clients.setdefault(os.path.splitext(filename[len(prefix):])[0], {})[prefix] = filename
+
+    pdf = FPDF()
+    pdf.set_auto_page_break(True, margin=15)
+    pdf.add_page()
+    pdf.set_font('Arial', 'B', 16)
+    pdf.cell(PAGE_WIDTH, 10, pdf_text('Proximity report: ' + title), ln=1)
+    for client, reports in sorted(clients.items()):
+        pdf.set_font('Arial', 'B', 12)
+        pdf.cell(PAGE_WIDTH, 8, pdf_text('Wireless client ' + ':'.join(client[i:i + 2] for i in range(0, 12, 2))),
+                 ln=1)
+        if 'proximity_total_time_' in reports:
+            pdf.set_font('Arial', 'I', 10)
+            pdf.cell(PAGE_WIDTH, 6, 'Total time for each client in proximity', ln=1)
+            _table(pdf, TOTAL_TIME_COLUMNS,
+                   load_rows(os.path.join(folder, reports['proximity_total_time_']), timezones))
+        if 'dwell_total_time_' in reports:
+            pdf.set_font('Arial', 'I', 10)
+            pdf.cell(PAGE_WIDTH, 6, 'Dwell time at each location', ln=1)
+            _table(pdf, DWELL_TIME_COLUMNS, load_rows(os.path.join(folder, reports['dwell_total_time_']), timezones))
+    return pdf.output(dest='S').encode('latin-1')
+
+
+class PDFReports:
+    """
+    Disk cache of the rendered PDFs, keyed by the hash of the reports
+    """
+
+    def __init__(self, cache_folder, max_size):
+        """
+        :param cache_folder: folder to save the PDFs to
+        :param max_size: maximum size of the cache, in bytes, the least recently used PDFs are removed
+        """
+        self.cache_folder = cache_folder
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.rendering = {}  # cache key: lock, a PDF is rendered once if requested by many clients at the same time
+        os.makedirs(cache_folder, exist_ok=True)
+
+    def cache_path(self, key):
+        """
+        :param key: cache key
+        :return: path of the cached PDF
+        """
+        return os.path.join(self.cache_folder, key + '.pdf')
+
+    def _open(self, cache_path):
+        # the PDF is opened with the lock held, not removed by {evict} before it is opened, an open PDF removed later is
+        # still read to the end
+        with self.lock:
+            try:
+                pdf_file = open(cache_path, 'rb')
+            except FileNotFoundError:
+                return None
+            # the access time of the cache entry, used for the eviction
+            os.utime(pdf_file.fileno())
+            return pdf_file
+
+    def pdf(self, title, folder, timezones=None):
+        """
+        Find the PDF of the reports in the {folder}, rendered if not cached
+        :param title: the PDF title, example the username
+        :param folder: report folder
+        :param timezones: TimeZones for the dwell times, the default timezone if None
+        :return: the cached PDF, a binary file opened, to be closed by the caller, or None if no reports found in the
+        {folder}
+        """
+        timezones = timezones or TimeZones()
+        filenames = report_files(folder)
+        if not filenames:
+            return None
+        key = reports_hash(folder, filenames, timezones)
+        cache_path = self.cache_path(key)
+        with self.lock:
+            render_lock = self.rendering.setdefault(key, threading.Lock())
+        with render_lock:
+            pdf_file = self._open(cache_path)
+            if pdf_file is not None:
+                PDF_CACHE.inc('hit')
+            else:
+                PDF_CACHE.inc('miss')
+                data = render_pdf(title, folder, filenames, timezones)
+                # rendered at the same time by the other processes, each one writes its own temporary file
+                temporary_path = '%s.%d.tmp' % (cache_path, os.getpid())
+                with open(temporary_path, 'wb') as f:
+                    f.write(data)
+                os.replace(temporary_path, cache_path)
+                pdf_file = self._open(cache_path) or io.BytesIO(data)
+                self.evict(keep=cache_path)
+        with self.lock:
+            self.rendering.pop(key, None)
+        return pdf_file
+
+    def evict(self, keep=None):
+        """
+        Remove the least recently used PDFs, until the cache size is not larger than {max_size}
+        :param keep: path of a PDF not to remove, example the PDF just rendered
+        :return:
+        """
+        with self.lock:
+            entries = []
+            for filename in os.listdir(self.cache_folder):
+                if filename.endswith('.pdf'):
+                    path = os.path.join(self.cache_folder, filename)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+            cache_size = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if cache_size <= self.max_size:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                cache_size -= size
@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+# Compact in-memory model of the client proximity time slices:
+#   TimeSlice - one {client_info} time slice, the times parsed to int once
+#   Contact   - one {users_info} entry, the MAC address packed to a 48-bit int
+# The location, client_user and client_type strings are interned, and the same Contact object is shared by all the
+# time slices of a notification with the same client_mac, client_user and client_type.
+
+
+import json
+import re
+import sys
+
+
+class Contact:
+    """
+    One wireless client in proximity, in a time slice
+    """
+
+    __slots__ = ('client_mac', 'client_user', 'client_type')
+
+    def __init__(self, client_mac, client_user=None, client_type=None):
+        """
+        :param client_mac: MAC address, packed to a 48-bit int, see {pack_mac} and {report_format.format_mac}
+        :param client_user: the username of the client, or None if not reported
+        :param client_type: the device type of the client, or None if not reported
+        """
+        self.client_mac = client_mac
+        self.client_user = client_user
+        self.client_type = client_type
+
+
+class TimeSlice:
+    """
+    One client_info time slice: the location of the reported client and the wireless clients in proximity
+    """
+
+    __slots__ = ('location', 'start_time', 'end_time', 'users_info')
+
+    def __init__(self, location, start_time, end_time, users_info):
+        """
+        :param location: the location of the reported client
+        :param start_time: epoch time in msec, int
+        :param end_time: epoch time in msec, int
+        :param users_info: tuple of Contact
+        """
+        self.location = location
+        self.start_time = start_time
+        self.end_time = end_time
+        self.users_info = users_info
+
+
+def normalize_mac(mac_address):
+    """
+    Normalize the MAC address, example {AA:BB:CC:00:11:22} or {aabb.cc00.1122} to {aabbcc001122}
+    :param mac_address: MAC address
+    :return: normalized MAC address
+    """
+    return re.sub(r'[^0-9a-f]', '', mac_address.lower())
+
+
+def pack_mac(mac_address):
+    """
+    :param mac_address: MAC address, example {AA:BB:CC:00:11:22} or {aabb.cc00.1122}
+    :return: the MAC address as a 48-bit int
+    """
+    return int(normalize_mac(mac_address), 16)
+
+
+class PayloadDecoder:
+    """
+    Convert the time slices of one notification to TimeSlice, as they are parsed. The Contact objects are cached by
+    client_mac, client_user and client_type, a wireless client found in many time slices is stored once.
+    """
+
+    def __init__(self):
+        self.contacts = {}
+
+    def contact(self, user):
+        """
+        :param user: one users_info entry, dict with client_mac and the optional client_user and client_type
+        :return: Contact
+        """
+        client_user = user.get('client_user')
+        client_type = user.get('client_type')
+        key = (user['client_mac'], client_user, client_type)
+        contact = self.contacts.get(key)
+        if contact is None:
+            contact = self.contacts[key] = Contact(
+                pack_mac(user['client_mac']), client_user if client_user is None else sys.intern(client_user),
+                client_type if client_type is None else sys.intern(client_type))
+        return contact
+
+    def time_slice(self, time_slice):
+        """
+        :param time_slice: one client_info time slice, dict with location, start_time, end_time and users_info, or
+        TimeSlice
+        :return: TimeSlice
+        """
+        if type(time_slice) is TimeSlice:
+            return time_slice
+        contact = self.contact
+        return TimeSlice(sys.intern(time_slice['location']), int(time_slice['start_time']),
+                         int(time_slice['end_time']), tuple([contact(user) for user in time_slice['users_info']]))
+
+    def object_hook(self, obj):
+        """
+        json object_hook, the time slices are converted when parsed, the other objects are not changed
+        :param obj: the parsed JSON object
+        :return: TimeSlice or the object
+        """
+        if 'users_info' in obj:
+            return self.time_slice(obj)
+        return obj
+
+    def json_decoder(self):
+        """
+        :return: json.JSONDecoder converting the time slices to TimeSlice
+        """
+        return json.JSONDecoder(object_hook=self.object_hook)
+
+
+def load_payload(f):
+    """
+    Parse the client proximity notification, with the time slices as TimeSlice
+    :param f: file-like object, with the notification
+    :return: the notification
+    """
+    return json.load(f, object_hook=PayloadDecoder().object_hook)
+
+
+def loads_payload(text):
+    """
+    Parse the client proximity notification, see {load_payload}
+    :param text: the notification, str or bytes
+    :return: the notification
+    """
+    return json.loads(text, object_hook=PayloadDecoder().object_hook)
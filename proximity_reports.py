@@ -0,0 +1,564 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+import os
+import time
+import datetime
+import contextlib
+import functools
+import threading
+import multiprocessing
+
+from concurrent.futures import ProcessPoolExecutor
+
+from metrics import STAGE_SECONDS
+from proximity_model import PayloadDecoder
+from proximity_stream import iter_payload_events
+from report_format import COLUMNAR, REPORT_EXTENSIONS, format_mac
+from report_format import encode_total_time_report, encode_dwell_time_report, encode_json_lines
+from report_format import format_total_time_report, format_dwell_time_report
+from user_reports import check_folder_name
+
+
+process_pools = {}
+process_pools_lock = threading.Lock()
+
+
+class TotalTimeAggregator:
+    """
+    Aggregate the total time each wireless client spent in proximity of the reported client.
+    Each time slice is processed once, the per client totals are kept in a dict keyed by {client_mac}, packed to an
+    int. The last seen {client_user} and {client_type} are reported for each client.
+    """
+
+    def __init__(self):
+        # client_mac: [client_mac, client_user, client_type, total_time]
+        self.contacts = {}
+
+    def add_slice(self, time_slice):
+        """
+        Add the time in proximity for all the users in the {time_slice}
+        :param time_slice: TimeSlice
+        :return:
+        """
+        time_length = time_slice.end_time - time_slice.start_time
+        contacts = self.contacts
+        for user in time_slice.users_info:
+            client_mac = user.client_mac
+            contact = contacts.get(client_mac)
+            if contact is None:
+                contact = contacts[client_mac] = [client_mac, None, None, 0]
+            contact[3] += time_length
+            if user.client_user is not None and user.client_type is not None:
+                contact[1] = user.client_user
+                contact[2] = user.client_type
+
+    def report(self):
+        """
+        Create the total time report, sorted by the total time in proximity (in msec)
+        :return: list with client_mac, client_user, client_type and total_time for each client
+        """
+        sorted_contacts = sorted(self.contacts.values(), key=lambda x: x[3], reverse=True)
+        users_list_total_time = []
+        for client_mac, client_user, client_type, total_time in sorted_contacts:
+            if client_user is None:
+                user_details = {'client_mac': format_mac(client_mac)}
+            else:
+                user_details = {'client_mac': format_mac(client_mac), 'client_user': client_user,
+                                'client_type': client_type}
+            user_details['total_time'] = total_time
+            users_list_total_time.append(user_details)
+        return users_list_total_time
+
+
+class DwellTimeAggregator:
+    """
+    Merge the adjacent time slices with the same location and contiguous timestamps, to create the dwell time of
+    the reported client at each location
+    """
+
+    def __init__(self):
+        self.dwell_time = []
+        self.last_location = None
+        self.last_start_timestamp = None
+        self.last_end_timestamp = None
+
+    def add_slice(self, time_slice):
+        """
+        Add the {time_slice} to the dwell timeline
+        :param time_slice: TimeSlice
+        :return:
+        """
+        location = time_slice.location
+        start_timestamp = time_slice.start_time
+        end_timestamp = time_slice.end_time
+        if self.last_location is not None:
+            if location == self.last_location and start_timestamp == self.last_end_timestamp:
+                self.last_end_timestamp = end_timestamp
+                return
+            self.dwell_time.append({
+                'location': self.last_location, 'start_time': self.last_start_timestamp,
+                'end_time': self.last_end_timestamp
+            })
+        self.last_location = location
+        self.last_start_timestamp = start_timestamp
+        self.last_end_timestamp = end_timestamp
+
+    def report(self):
+        """
+        Create the dwell time report, with epoch timestamps (in msec)
+        :return: list with location, start_time and end_time for each dwell interval
+        """
+        employee_dwell_time = list(self.dwell_time)
+        if self.last_location is not None:
+            employee_dwell_time.append({
+                'location': self.last_location, 'start_time': self.last_start_timestamp,
+                'end_time': self.last_end_timestamp
+            })
+        return employee_dwell_time
+
+
+def write_report(file_path, report):
+    """
+    Save the report, in one write to a temporary file renamed to {file_path}: the report is replaced at once, a
+    partial report is never read by the other threads and processes
+    :param file_path: report file path
+    :param report: the encoded report, bytes
+    :return:
+    """
+    temporary_path = '%s.%d-%d.tmp' % (file_path, os.getpid(), threading.get_ident())
+    with open(temporary_path, 'wb') as f:
+        f.write(report)
+    os.replace(temporary_path, file_path)
+
+
+def client_reports(total_time_aggregator, dwell_time_aggregator, timezones=None, report_format=COLUMNAR):
+    """
+    Create the total time in proximity and the dwell time reports for one wireless client
+    :param total_time_aggregator: TotalTimeAggregator with all the time slices of the client
+    :param dwell_time_aggregator: DwellTimeAggregator with all the time slices of the client
+    :param timezones: TimeZones to convert the dwell times to the local time of each location, default timezone if None,
+    used for the JSON Lines format
+    :param report_format: COLUMNAR, with the times in msec, or JSON_LINES, with the total times in: days hh:mm:ss and
+    the dwell times in local time
+    :return: the total time report and the dwell time report, encoded in the {report_format}
+    """
+    sorted_users_total_time = total_time_aggregator.report()
+    employee_dwell_time = dwell_time_aggregator.report()
+    if report_format == COLUMNAR:
+        return encode_total_time_report(sorted_users_total_time), encode_dwell_time_report(employee_dwell_time)
+    return (encode_json_lines(format_total_time_report(sorted_users_total_time)),
+            encode_json_lines(format_dwell_time_report(employee_dwell_time, timezones)))
+
+
+def aggregate_data_set(data_set, windows=None, indexers=()):
+    """
+    Aggregate the time slices of one client proximity data set, and add them to the indexers
+    :param data_set: client proximity data set, with the mac_address and client_info
+    :param windows: optional, ProcessedWindows of the client, the time slices processed before are skipped or cut, see
+    {user_reports.ProcessedWindows.new_slices}
+    :param indexers: indexers to add the time slices to, see {create_reports_from_events}
+    :return: TotalTimeAggregator, DwellTimeAggregator, the number of time slices and of new time slices
+    """
+    total_time_aggregator = TotalTimeAggregator()
+    dwell_time_aggregator = DwellTimeAggregator()
+    index_writers = [indexer.client_writer() for indexer in indexers]
+    payload_decoder = PayloadDecoder()
+    slices = new_slices = 0
+    for time_slice in data_set['client_info']:
+        slices += 1
+        time_slice = payload_decoder.time_slice(time_slice)
+        parts = (time_slice,) if windows is None else windows.new_slices(time_slice)
+        new_slices += bool(parts)
+        for part in parts:
+            total_time_aggregator.add_slice(part)
+            dwell_time_aggregator.add_slice(part)
+            for index_writer in index_writers:
+                index_writer.add_slice(part)
+    for index_writer in index_writers:
+        index_writer.save(data_set['mac_address'])
+    return total_time_aggregator, dwell_time_aggregator, slices, new_slices
+
+
+def create_chunk_reports(data_sets, windows=None, indexers=(), timezones=None, report_format=COLUMNAR):
+    """
+    Create the reports for a chunk of client proximity data sets, run by the report process pool
+    :param data_sets: list of client proximity data sets, with the mac_address and client_info
+    :param windows: dict of MAC address: ProcessedWindows of the clients, for the incremental reports, or None
+    :param indexers: indexers to add the time slices to, see {create_reports_from_events}
+    :param timezones: TimeZones for the dwell time reports, see {client_reports}
+    :param report_format: COLUMNAR or JSON_LINES, see {client_reports}
+    :return: list of (MAC address, total time report, dwell time report, slices, new slices), one for each data set.
+    With {windows}, the TotalTimeAggregator and DwellTimeAggregator of the new time slices instead of the reports, to
+    merge to the user reports
+    """
+    clients = []
+    for data_set in data_sets:
+        mac_address = data_set['mac_address']
+        total_time_aggregator, dwell_time_aggregator, slices, new_slices = aggregate_data_set(
+            data_set, None if windows is None else windows[mac_address], indexers)
+        if windows is None:
+            reports = client_reports(total_time_aggregator, dwell_time_aggregator, timezones, report_format)
+        else:
+            reports = total_time_aggregator, dwell_time_aggregator
+        clients.append((mac_address,) + reports + (slices, new_slices))
+    return clients
+
+
+def save_client_reports(folder_name, wireless_mac_address, total_time_report, dwell_time_report,
+                        report_format=COLUMNAR):
+    """
+    Save the total time in proximity and the dwell time reports for one wireless client
+    :param folder_name: folder to save the reports to
+    :param wireless_mac_address: MAC address of the wireless client
+    :param total_time_report: the encoded total time report
+    :param dwell_time_report: the encoded dwell time report
+    :param report_format: COLUMNAR or JSON_LINES, the format of the reports
+    :return:
+    """
+    filename = wireless_mac_address.replace(':', '') + REPORT_EXTENSIONS[report_format]
+    with STAGE_SECONDS.time('write'):
+        write_report(os.path.join(folder_name, 'proximity_total_time_' + filename), total_time_report)
+        write_report(os.path.join(folder_name, 'dwell_total_time_' + filename), dwell_time_report)
+    print('Total time for each employee in proximity report completed')
+    print('Employee dwell time at each location report completed')
+
+
+def write_client_reports(folder_name, wireless_mac_address, total_time_aggregator, dwell_time_aggregator,
+                         timezones=None, report_format=COLUMNAR):
+    """
+    Create and save the reports for one wireless client
+    :param folder_name: folder to save the reports to
+    :param wireless_mac_address: MAC address of the wireless client
+    :param total_time_aggregator: TotalTimeAggregator with all the time slices of the client
+    :param dwell_time_aggregator: DwellTimeAggregator with all the time slices of the client
+    :param timezones: TimeZones for the dwell time report, see {client_reports}
+    :param report_format: COLUMNAR or JSON_LINES, see {client_reports}
+    :return:
+    """
+    with STAGE_SECONDS.time('encode'):
+        reports = client_reports(total_time_aggregator, dwell_time_aggregator, timezones, report_format)
+    save_client_reports(folder_name, wireless_mac_address, *reports, report_format=report_format)
+
+
+def get_process_pool(processes):
+    """
+    Find the report process pool with {processes} workers, created at first use. All the workers are forked when the
+    pool is created: create it when the application starts, before its threads and files are opened, a process forked
+    while another thread holds a lock can deadlock, and the files open at the fork, example the locked files, are kept
+    open by the workers.
+    :param processes: number of worker processes
+    :return: ProcessPoolExecutor
+    """
+    with process_pools_lock:
+        process_pool = process_pools.get(processes)
+        if process_pool is None:
+            context = multiprocessing.get_context('fork') if 'fork' in multiprocessing.get_all_start_methods() else None
+            process_pool = process_pools[processes] = ProcessPoolExecutor(max_workers=processes, mp_context=context)
+            process_pool.submit(int).result()
+        return process_pool
+
+
+def create_reports_parallel(webhook_json, processes, indexers=(), timezones=None, report_format=COLUMNAR,
+                            user_reports=None):
+    """
+    Create the reports for each wireless client in the client proximity notification, using the persistent pool of
+    {processes} worker processes. The data sets are sent to the workers in chunks, each worker aggregates its data
+    sets, adds the time slices to the indexers and creates the reports. The reports are saved in the order of the
+    data sets in the notification.
+    :param webhook_json: client proximity notification
+    :param processes: number of worker processes
+    :param indexers: indexers to add the time slices to, see {create_reports_from_events}
+    :param timezones: TimeZones for the dwell time reports, see {client_reports}
+    :param report_format: COLUMNAR or JSON_LINES, see {client_reports}
+    :param user_reports: optional, UserReports to update the reports of each user: the processed windows of each
+    client are sent with its data set, the aggregates of the new time slices are merged in this process
+    :return: report info, see {create_reports_from_events}
+    """
+    proximity_details = webhook_json['details']
+    proximity_data = proximity_details['client_proximity']
+    username = proximity_details['user_name']
+    start_time = int(proximity_details['start_time'])
+    end_time = int(proximity_details['end_time'])
+    mac_addresses = [data_set['mac_address'] for data_set in proximity_data]
+    chunk_size = -(-len(proximity_data) // (processes * 4))
+    chunks = [proximity_data[index:index + chunk_size] for index in range(0, len(proximity_data), chunk_size)]
+    create = functools.partial(create_chunk_reports, indexers=tuple(indexers), timezones=timezones,
+                               report_format=report_format)
+    # created before the user is locked, the forked workers would keep the lock file open
+    process_pool = get_process_pool(processes)
+    with contextlib.ExitStack() as user_lock:
+        chunk_windows = [None] * len(chunks)
+        if user_reports is not None:
+            # locked until the user reports are saved, the windows are not changed by other notifications
+            user_lock.enter_context(user_reports.lock(username))
+            chunk_windows = [{data_set['mac_address']: user_reports.windows(username, data_set['mac_address'])
+                              for data_set in chunk} for chunk in chunks]
+        clients = []
+        with STAGE_SECONDS.time('parallel_reports'):
+            for chunk_clients in process_pool.map(create, chunks, chunk_windows):
+                clients += chunk_clients
+        if user_reports is not None:
+            folder_name = update_user_reports(user_reports, username, start_time, end_time,
+                                              [client[:3] for client in clients], timezones, report_format)
+        else:
+            folder_name = create_report_folder(username)
+            for client in clients:
+                save_client_reports(folder_name, *client[:3], report_format=report_format)
+    return {
+        'folder': folder_name, 'user_name': username, 'start_time': start_time, 'end_time': end_time,
+        'mac_addresses': mac_addresses, 'slices': sum(client[3] for client in clients),
+        'new_slices': sum(client[4] for client in clients)
+    }
+
+
+def client_aggregators(contacts, dwell_time):
+    """
+    Create the report aggregators from saved aggregates, see {UserReports.client_aggregates}
+    :param contacts: dict of client_mac: [client_mac, client_user, client_type, total_time], the client_mac packed to
+    an int
+    :param dwell_time: list of the dwell time intervals, sorted by time
+    :return: TotalTimeAggregator and DwellTimeAggregator
+    """
+    total_time_aggregator = TotalTimeAggregator()
+    total_time_aggregator.contacts = contacts
+    dwell_time_aggregator = DwellTimeAggregator()
+    dwell_time_aggregator.dwell_time = dwell_time
+    return total_time_aggregator, dwell_time_aggregator
+
+
+def create_report_folder(username):
+    """
+    Create a new folder to save the reports to, {username}-{date}-{time}. The folders created in the same second, by
+    any thread or process, are numbered: {username}-{date}-{time}-2, -3...
+    :param username: the username of the reported client
+    :return: the folder name
+    :raises ValueError: if the {username} is not valid in a folder name, see {user_reports.check_folder_name}
+    """
+    current_time = str(datetime.datetime.now().strftime('%Y%m%d-%H%M%S'))
+    folder_name = check_folder_name(username) + '-' + current_time
+    number = 1
+    while True:
+        try:
+            os.mkdir(folder_name)
+            return folder_name
+        except FileExistsError:
+            number += 1
+            folder_name = username + '-' + current_time + '-' + str(number)
+
+
+def create_reports_from_events(events, indexers=(), timezones=None, report_format=COLUMNAR, user_reports=None):
+    """
+    Create the reports for each wireless client, from the client proximity notification events.
+    The time slices are added to the aggregators as they are received, the notification is not kept in memory.
+    The indexers, example {ContactGraph}, provide a {client_writer} for each wireless client, the time slices are
+    added to the writer and saved with the MAC address of the client.
+    The time spent in each stage is recorded once for the notification: total_time and dwell_time aggregation, index,
+    encode and write of the reports, and parse, the time left, spent reading the events.
+    With {user_reports}, the reports of the user are updated in place: the time slices in the windows processed before
+    for the same client are skipped, or cut to their new time, the new time slices are merged to the saved aggregates
+    of the user. The {user_name}, {start_time} and {end_time} must be found before the client proximity data sets,
+    else the reports are created in a new folder. The time slices of a data set found before its {mac_address} are
+    kept until it is found.
+    :param events: (event, key, value) events, see {proximity_stream}
+    :param indexers: indexers to add the time slices to
+    :param timezones: TimeZones for the dwell time reports, see {client_reports}
+    :param report_format: COLUMNAR or JSON_LINES, see {client_reports}
+    :param user_reports: optional, UserReports to update the reports of each user incrementally
+    :return: report info: folder, user_name, start_time, end_time, mac_addresses of the reported client, the number
+    of time slices and of new time slices, not processed before
+    """
+    username = None
+    folder_name = None
+    completed_clients = []
+    details = {}
+    mac_addresses = []
+    slices = new_slices = 0
+    incremental = False
+    client_windows = None
+    pending_slices = []  # the time slices of the client found before its MAC address, with {incremental}
+    merged_clients = []
+    # the aggregators and the index writers of the current data set, None outside of the client proximity data sets
+    total_time_aggregator = dwell_time_aggregator = index_writers = None
+    wireless_mac_address = None
+    perf_counter = time.perf_counter
+    start = perf_counter()
+    total_time_seconds = dwell_time_seconds = index_seconds = reports_seconds = 0.0
+    with contextlib.ExitStack() as user_lock:
+        for event, key, value in events:
+            if event == 'slice':
+                if total_time_aggregator is None:
+                    raise ValueError('A time slice was found outside of a client proximity data set')
+                slices += 1
+                if incremental:
+                    if client_windows is None:
+                        pending_slices.append(value)
+                        continue
+                    parts = client_windows.new_slices(value)
+                    if not parts:
+                        continue
+                else:
+                    parts = (value,)
+                new_slices += 1
+                slice_start = perf_counter()
+                for part in parts:
+                    total_time_aggregator.add_slice(part)
+                total_time_end = perf_counter()
+                for part in parts:
+                    dwell_time_aggregator.add_slice(part)
+                dwell_time_end = perf_counter()
+                for index_writer in index_writers:
+                    for part in parts:
+                        index_writer.add_slice(part)
+                index_end = perf_counter()
+                total_time_seconds += total_time_end - slice_start
+                dwell_time_seconds += dwell_time_end - total_time_end
+                index_seconds += index_end - dwell_time_end
+            elif event == 'client_start':
+                if user_reports is not None and not incremental:
+                    if all(key in details for key in ('user_name', 'start_time', 'end_time')):
+                        # locked until the user reports are saved, the windows are not changed by other notifications
+                        user_lock.enter_context(user_reports.lock(username))
+                        incremental = True
+                    else:
+                        print('The user_name, start_time and end_time not found before the client proximity, '
+                              'the reports are created in a new folder')
+                        user_reports = None
+                wireless_mac_address = None
+                client_windows = None
+                total_time_aggregator = TotalTimeAggregator()
+                dwell_time_aggregator = DwellTimeAggregator()
+                index_writers = [indexer.client_writer() for indexer in indexers]
+            elif event == 'client' and key == 'mac_address':
+                if total_time_aggregator is None:
+                    raise ValueError('A mac_address was found outside of a client proximity data set')
+                wireless_mac_address = value
+                mac_addresses.append(value)
+                if incremental:
+                    # the windows processed before for this client, the time slices found before are added now
+                    client_windows = user_reports.windows(username, wireless_mac_address)
+                    for time_slice in pending_slices:
+                        parts = client_windows.new_slices(time_slice)
+                        new_slices += bool(parts)
+                        for part in parts:
+                            total_time_aggregator.add_slice(part)
+                            dwell_time_aggregator.add_slice(part)
+                            for index_writer in index_writers:
+                                index_writer.add_slice(part)
+                    pending_slices = []
+            elif event == 'client_end':
+                if total_time_aggregator is None:
+                    raise ValueError('The end of a client proximity data set was found before its start')
+                if wireless_mac_address is None:
+                    raise ValueError('The mac_address was not found in a client proximity data set')
+                if incremental:
+                    merged_clients.append((wireless_mac_address, total_time_aggregator, dwell_time_aggregator))
+                else:
+                    completed_clients.append((wireless_mac_address, total_time_aggregator, dwell_time_aggregator))
+                index_start = perf_counter()
+                for index_writer in index_writers:
+                    index_writer.save(wireless_mac_address)
+                index_seconds += perf_counter() - index_start
+                total_time_aggregator = dwell_time_aggregator = index_writers = None
+            elif event == 'details':
+                details[key] = value
+                if key == 'user_name':
+                    username = value
+
+            # the reports are saved when the username, required for the folder name, is known
+            if completed_clients and username is not None:
+                reports_start = perf_counter()
+                if folder_name is None:
+                    folder_name = create_report_folder(username)
+                for client in completed_clients:
+                    write_client_reports(folder_name, *client, timezones=timezones, report_format=report_format)
+                completed_clients = []
+                reports_seconds += perf_counter() - reports_start
+
+        STAGE_SECONDS.observe(total_time_seconds, 'total_time')
+        STAGE_SECONDS.observe(dwell_time_seconds, 'dwell_time')
+        STAGE_SECONDS.observe(index_seconds, 'index')
+        STAGE_SECONDS.observe(perf_counter() - start - total_time_seconds - dwell_time_seconds - index_seconds -
+                              reports_seconds, 'parse')
+
+        if username is None:
+            raise ValueError('The user_name was not found in the client proximity notification')
+        if incremental:
+            folder_name = update_user_reports(user_reports, username, int(details['start_time']),
+                                              int(details['end_time']), merged_clients, timezones, report_format)
+    if folder_name is None:
+        folder_name = create_report_folder(username)
+    return {
+        'folder': folder_name, 'user_name': username, 'start_time': int(details['start_time']),
+        'end_time': int(details['end_time']), 'mac_addresses': mac_addresses, 'slices': slices,
+        'new_slices': new_slices
+    }
+
+
+def update_user_reports(user_reports, username, start_time, end_time, clients, timezones=None,
+                        report_format=COLUMNAR):
+    """
+    Merge the new time slices of a notification to the saved aggregates of the user, and save the updated reports
+    of each wireless client with new time slices to the user folder, replacing the previous reports
+    :param user_reports: UserReports
+    :param username: the username of the reported client
+    :param start_time: start of the notification window, epoch time in msec
+    :param end_time: end of the notification window, epoch time in msec
+    :param clients: list of (MAC address, TotalTimeAggregator, DwellTimeAggregator) with the new time slices
+    :param timezones: TimeZones for the dwell time reports, see {client_reports}
+    :param report_format: COLUMNAR or JSON_LINES, see {client_reports}
+    :return: the user folder
+    """
+    user_reports.merge(username, start_time, end_time, [
+        (wireless_mac_address, total_time_aggregator.contacts.values(), dwell_time_aggregator.report())
+        for wireless_mac_address, total_time_aggregator, dwell_time_aggregator in clients])
+    folder_name = user_reports.user_folder(username)
+    # the reports of the clients without new time slices are not changed
+    for wireless_mac_address in dict.fromkeys(wireless_mac_address for wireless_mac_address, _, dwell_time_aggregator
+                                              in clients if dwell_time_aggregator.last_location is not None):
+        write_client_reports(folder_name, wireless_mac_address,
+                             *client_aggregators(*user_reports.client_aggregates(username, wireless_mac_address)),
+                             timezones=timezones, report_format=report_format)
+    return folder_name
+
+
+def create_reports(webhook_json, processes=1, indexers=(), timezones=None, report_format=COLUMNAR, user_reports=None):
+    """
+    Create the reports for each wireless client in the client proximity notification
+    :param webhook_json: client proximity notification
+    :param processes: number of worker processes, the reports are created in this process if 1
+    :param indexers: indexers to add the time slices to, see {create_reports_from_events}
+    :param timezones: TimeZones for the dwell time reports, see {client_reports}
+    :param report_format: COLUMNAR or JSON_LINES, see {client_reports}
+    :param user_reports: optional, UserReports to update the reports of each user, see {create_reports_from_events}
+    :return: report info, see {create_reports_from_events}
+    """
+    if processes > 1 and len(webhook_json['details']['client_proximity']) > 1:
+        return create_reports_parallel(webhook_json, processes, indexers, timezones, report_format, user_reports)
+    return create_reports_from_events(iter_payload_events(webhook_json), indexers, timezones, report_format,
+                                      user_reports)
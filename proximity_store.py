@@ -0,0 +1,286 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+# The notifications are saved as JSON lines to segment files, {segment-00000001.log}. When the active segment reaches
+# the segment size, a new segment is started and the previous one is compressed to {segment-00000001.log.gz}.
+# The sidecar index {index.db} has the segment, offset and length of each notification, with the {user_name},
+# {start_time}, {end_time} and the {mac_address} of the reported client devices.
+# With several receiver processes, example gunicorn workers, each process appends to its own active segment, locked
+# while active. The segments are merged when read, in the order of the index. The segment left active by a stopped
+# process is continued or compressed by the next process started.
+
+
+import gzip
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+
+from collections import OrderedDict
+
+from proximity_model import normalize_mac
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows, a single process can write to the store
+    fcntl = None
+
+
+CHUNK_SIZE = 64 * 1024
+SEGMENT_SIZE = 64 * 1024 * 1024
+MAX_OPEN_SEGMENTS = 64  # segments open at the same time, when reading the records of many segments
+
+SEGMENT_FILE = re.compile(r'^segment-(\d{8})\.log(\.gz)?$')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS records (
+    record_id INTEGER PRIMARY KEY,
+    segment INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    received REAL NOT NULL,
+    user_name TEXT,
+    start_time INTEGER,
+    end_time INTEGER
+);
+CREATE INDEX IF NOT EXISTS records_user_name ON records (user_name);
+CREATE INDEX IF NOT EXISTS records_time ON records (start_time, end_time);
+CREATE TABLE IF NOT EXISTS record_macs (
+    mac_address TEXT NOT NULL,
+    record_id INTEGER NOT NULL,
+    PRIMARY KEY (mac_address, record_id)
+) WITHOUT ROWID;
+'''
+
+
+def lock_file(path, create=False):
+    """
+    Open the file {path} for append and lock it for this process, until the file is closed. Used to find the files
+    owned by a running process, the files of a stopped process are unlocked.
+    :param path: file path
+    :param create: if True, the file is created, it must not exist
+    :return: the open file, binary, or None if the file is locked by another process, or not found, or already exists
+    with {create}
+    """
+    flags = os.O_WRONLY | os.O_APPEND | (os.O_CREAT | os.O_EXCL if create else 0)
+    try:
+        f = os.fdopen(os.open(path, flags, 0o644), 'ab')
+    except (FileExistsError, FileNotFoundError):
+        return None
+    if fcntl is not None:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return None
+    if os.fstat(f.fileno()).st_nlink == 0:
+        # removed by the previous owner before the lock was released
+        f.close()
+        return None
+    return f
+
+
+class ProximityStore:
+    """
+    Segmented, compressed and indexed store for the client proximity notifications
+    """
+
+    def __init__(self, folder, segment_size=SEGMENT_SIZE):
+        """
+        :param folder: folder to save the segments and the index to
+        :param segment_size: size of the segment (in bytes) that will start a new segment
+        """
+        self.folder = folder
+        self.segment_size = segment_size
+        self.lock = threading.Lock()
+        os.makedirs(folder, exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(folder, 'index.db'), timeout=60, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')  # the processes appending do not block the downloads
+        self.db.executescript(SCHEMA)
+
+        # the segments not compressed are active in a running process, or were left by a stopped process: the last
+        # one not full is continued, the others are compressed
+        self.segment = self.segment_file = None
+        for segment in sorted(self._segments(compressed=False), reverse=True):
+            segment_file = lock_file(self._segment_path(segment))
+            if segment_file is None:
+                continue
+            if self.segment_file is None and os.fstat(segment_file.fileno()).st_size < segment_size:
+                self.segment, self.segment_file = segment, segment_file
+            else:
+                threading.Thread(target=self._compress, args=(segment, segment_file), daemon=True).start()
+        if self.segment_file is None:
+            self._new_segment()
+
+    def _segments(self, compressed=True):
+        segments = set()
+        for filename in os.listdir(self.folder):
+            match = SEGMENT_FILE.match(filename)
+            if match and (compressed or not match.group(2)):
+                segments.add(int(match.group(1)))
+        return segments
+
+    def _new_segment(self):
+        # the segment numbers are unique, the segment file is created by one process only
+        segment = max(self._segments(), default=0) + 1
+        while True:
+            segment_file = lock_file(self._segment_path(segment), create=True)
+            if segment_file is not None:
+                self.segment, self.segment_file = segment, segment_file
+                return
+            segment += 1
+
+    def _segment_filename(self, segment, compressed=False):
+        return 'segment-%08d.log' % segment + ('.gz' if compressed else '')
+
+    def _segment_path(self, segment, compressed=False):
+        return os.path.join(self.folder, self._segment_filename(segment, compressed))
+
+    def _compress(self, segment, segment_file):
+        # the segment stays locked until removed, it is not continued by another process
+        segment_path = self._segment_path(segment)
+        compressed_path = self._segment_path(segment, compressed=True)
+        try:
+            with open(segment_path, 'rb') as f_in, gzip.open(compressed_path + '.tmp', 'wb') as f_out:
+                shutil.copyfileobj(f_in, f_out, CHUNK_SIZE)
+            os.replace(compressed_path + '.tmp', compressed_path)
+            os.remove(segment_path)
+        finally:
+            segment_file.close()
+
+    def _open_segment(self, segment):
+        try:
+            return open(self._segment_path(segment), 'rb')
+        except FileNotFoundError:
+            return gzip.open(self._segment_path(segment, compressed=True), 'rb')
+
+    def append(self, payload_path, report_info=None):
+        """
+        Append the notification saved to the file {payload_path} to the active segment of this process, as one line.
+        New lines are only allowed as whitespace in JSON, they are replaced with spaces.
+        :param payload_path: path to the saved notification
+        :param report_info: the info returned by {create_reports}, to index the notification, or None
+        :return: the record id
+        """
+        with self.lock:
+            f = self.segment_file
+            with open(payload_path, 'rb') as payload:
+                offset = f.tell()
+                for chunk in iter(lambda: payload.read(CHUNK_SIZE), b''):
+                    f.write(chunk.replace(b'\r', b' ').replace(b'\n', b' '))
+                f.write(b'\n')
+                f.flush()
+                length = f.tell() - offset
+            report_info = report_info or {}
+            with self.db:
+                cursor = self.db.execute(
+                    'INSERT INTO records (segment, offset, length, received, user_name, start_time, end_time) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (self.segment, offset, length, time.time(), report_info.get('user_name'),
+                     report_info.get('start_time'), report_info.get('end_time')))
+                record_id = cursor.lastrowid
+                if report_info:
+                    self.db.executemany(
+                        'INSERT OR IGNORE INTO record_macs (mac_address, record_id) VALUES (?, ?)',
+                        [(normalize_mac(mac_address), record_id) for mac_address in report_info['mac_addresses']])
+            if offset + length >= self.segment_size:
+                threading.Thread(target=self._compress, args=(self.segment, self.segment_file), daemon=True).start()
+                self._new_segment()
+        return record_id
+
+    def find(self, user_name=None, mac_address=None, start_time=None, end_time=None):
+        """
+        Find the notifications matching all the filters provided
+        :param user_name: the username of the reported client
+        :param mac_address: the MAC address of one of the reported client devices
+        :param start_time: epoch time in msec, notifications ending before this time are excluded
+        :param end_time: epoch time in msec, notifications starting after this time are excluded
+        :return: list of (segment, offset, length), in the order received
+        """
+        query = 'SELECT segment, offset, length FROM records'
+        conditions = []
+        params = []
+        if user_name is not None:
+            conditions.append('user_name = ?')
+            params.append(user_name)
+        if mac_address is not None:
+            conditions.append('record_id IN (SELECT record_id FROM record_macs WHERE mac_address = ?)')
+            params.append(normalize_mac(mac_address))
+        if start_time is not None:
+            conditions.append('end_time >= ?')
+            params.append(int(start_time))
+        if end_time is not None:
+            conditions.append('start_time <= ?')
+            params.append(int(end_time))
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += ' ORDER BY record_id'
+        with self.lock:
+            return self.db.execute(query, params).fetchall()
+
+    def iter_records(self, records, start=0, end=None):
+        """
+        Read the notifications from the segments, in the order of the {records}. The segments of the processes are
+        read at the same time, each one forward only, the records of a segment are in the order of their offsets.
+        With {start} and {end}, only the byte range of the notifications joined is read, the records before the range
+        are skipped without reading them, example to resume a download.
+        :param records: list of (segment, offset, length), returned by {find}
+        :param start: offset of the first byte, in the notifications joined
+        :param end: offset after the last byte, in the notifications joined, or None for all the bytes after {start}
+        :return: generator of chunks of the notifications, bytes, at most {CHUNK_SIZE} each, a large notification is
+        not read to memory at once. Each notification is one JSON line, the first and last one cut to the byte range
+        """
+        open_segments = OrderedDict()  # segment: file, the least recently read are closed first
+        position = 0  # offset of the record, in the notifications joined
+        try:
+            for segment, offset, length in records:
+                if end is not None and position >= end:
+                    break
+                record_start, position = position, position + length
+                if position <= start:
+                    continue
+                f = open_segments.pop(segment, None)
+                if f is None:
+                    if len(open_segments) >= MAX_OPEN_SEGMENTS:
+                        open_segments.popitem(last=False)[1].close()
+                    f = self._open_segment(segment)
+                open_segments[segment] = f
+                skip = max(0, start - record_start)
+                f.seek(offset + skip)
+                remaining = (length if end is None else min(length, end - record_start)) - skip
+                while remaining > 0:
+                    chunk = f.read(min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    yield chunk
+        finally:
+            for f in open_segments.values():
+                f.close()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+# The client proximity notification is parsed as a stream of events, each event is a tuple (event, key, value):
+#   ('details', key, value)     - a field of {details}, other than {client_proximity}
+#   ('client_start', None, None) - start of a {client_proximity} data set
+#   ('client', key, value)      - a field of the data set, other than {client_info}, example {mac_address}
+#   ('slice', None, time_slice) - one {client_info} time slice, as TimeSlice, see {proximity_model}
+#   ('client_end', None, None)  - end of the data set
+
+
+import codecs
+import json
+import re
+
+from proximity_model import PayloadDecoder
+
+
+CHUNK_SIZE = 64 * 1024
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+NUMBER_START = '-0123456789'
+NUMBER_END = ' \t\n\r,]}'
+
+
+class JSONStream:
+    """
+    Read JSON values from a binary stream, keeping in memory only the values not yet parsed. The time slices are
+    parsed as TimeSlice.
+    """
+
+    def __init__(self, stream, chunk_size=CHUNK_SIZE):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self.json_decoder = PayloadDecoder().json_decoder()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        data = self.stream.read(self.chunk_size)
+        if not data:
+            self.eof = True
+        text = self.text_decoder.decode(data, final=self.eof)
+        self.buffer = self.buffer[self.pos:] + text
+        self.pos = 0
+
+    def peek(self):
+        """
+        Skip the whitespace and find the next character, without consuming it
+        :return: the next character, or '' at the end of the stream
+        """
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if self.eof:
+                return ''
+            self._fill()
+
+    def expect(self, characters):
+        """
+        Consume the next character, it must be one of the {characters}
+        :param characters: expected characters
+        :return: the consumed character
+        """
+        character = self.peek()
+        if character == '' or character not in characters:
+            raise ValueError('Expecting one of "' + characters + '" at position ' + str(self.pos) + ', found "' +
+                             character + '"')
+        self.pos += 1
+        return character
+
+    def value(self):
+        """
+        Parse the next complete JSON value
+        :return: the value
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self.json_decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                self._fill()
+                continue
+            # a number at the end of the buffer may continue in the next chunk, example {-1.} of {-1.5e3} is parsed as
+            # -1, a number is complete only when followed by a delimiter
+            if not self.eof and (end == len(self.buffer) or (
+                    self.buffer[self.pos] in NUMBER_START and self.buffer[end] not in NUMBER_END)):
+                self._fill()
+                continue
+            self.pos = end
+            return value
+
+    def object_keys(self):
+        """
+        Iterate the keys of the next JSON object, the value of each key must be consumed before the next key
+        :return: generator of keys
+        """
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(':')
+            yield key
+            if self.expect(',}') == '}':
+                return
+
+    def array_items(self):
+        """
+        Iterate the items of the next JSON array, each item must be consumed before the next one
+        :return: generator of item indexes
+        """
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        index = 0
+        while True:
+            yield index
+            index += 1
+            if self.expect(',]') == ']':
+                return
+
+
+def iter_proximity_events(stream, chunk_size=CHUNK_SIZE):
+    """
+    Parse the client proximity notification from the binary {stream}, one time slice at a time
+    :param stream: binary file-like object, with the notification
+    :param chunk_size: number of bytes to read at a time
+    :return: generator of (event, key, value) events
+    """
+    json_stream = JSONStream(stream, chunk_size)
+    for key in json_stream.object_keys():
+        if key != 'details':
+            json_stream.value()
+            continue
+        for detail_key in json_stream.object_keys():
+            if detail_key != 'client_proximity':
+                yield 'details', detail_key, json_stream.value()
+                continue
+            for _ in json_stream.array_items():
+                yield 'client_start', None, None
+                for client_key in json_stream.object_keys():
+                    if client_key == 'client_info':
+                        for _ in json_stream.array_items():
+                            yield 'slice', None, json_stream.value()
+                    else:
+                        yield 'client', client_key, json_stream.value()
+                yield 'client_end', None, None
+
+
+def read_details(stream, chunk_size=CHUNK_SIZE):
+    """
+    Read the {details} fields of the notification saved before the client proximity data sets, the data sets are not
+    parsed
+    :param stream: binary file-like object, with the notification
+    :param chunk_size: number of bytes to read at a time
+    :return: dict of the {details} fields found
+    """
+    details = {}
+    for event, key, value in iter_proximity_events(stream, chunk_size):
+        if event != 'details':
+            break
+        details[key] = value
+    return details
+
+
+def iter_payload_events(webhook_json):
+    """
+    Create the same events as {iter_proximity_events}, for a notification already parsed. All the {details} fields
+    are found before the client proximity data sets, and the fields of each data set, example {mac_address}, before
+    its time slices, in any order in the notification. The time slices not parsed as TimeSlice, see
+    {proximity_model.load_payload}, are converted one at a time.
+    :param webhook_json: client proximity notification
+    :return: generator of (event, key, value) events
+    """
+    payload_decoder = PayloadDecoder()
+    for detail_key, value in webhook_json['details'].items():
+        if detail_key != 'client_proximity':
+            yield 'details', detail_key, value
+    for data_set in webhook_json['details'].get('client_proximity', ()):
+        yield 'client_start', None, None
+        for client_key, client_value in data_set.items():
+            if client_key != 'client_info':
+                yield 'client', client_key, client_value
+        for time_slice in data_set.get('client_info', ()):
+            yield 'slice', None, payload_decoder.time_slice(time_slice)
+        yield 'client_end', None, None
@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+import datetime
+import functools
+
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+
+DEFAULT_TIMEZONE = 'America/Los_Angeles'
+
+QUARTER = 15 * 60
+HOUR = 60 * 60
+DAY = 24 * HOUR
+
+
+class TimeFormatter:
+    """
+    Convert epoch timestamps (in msec) to local time strings, for one timezone.
+    The UTC offset is cached for each quarter hour and the date string for each day, the time of day is found in a
+    table of all the seconds of the day. A list of timestamps is converted without a datetime object for each value.
+    """
+
+    def __init__(self, timezone):
+        """
+        :param timezone: IANA timezone name, example {America/Los_Angeles}
+        """
+        self.timezone = ZoneInfo(timezone)
+        self.utc_offsets = {}
+        self.dates = {}
+
+    def _offset(self, seconds):
+        return int(datetime.datetime.fromtimestamp(seconds, self.timezone).utcoffset().total_seconds())
+
+    def _utc_offset(self, quarter):
+        # the offset is not cached, None, for the quarter hours with a timezone change
+        first_offset = self._offset(quarter * QUARTER)
+        utc_offset = first_offset if first_offset == self._offset(quarter * QUARTER + QUARTER - 1) else None
+        self.utc_offsets[quarter] = utc_offset
+        return utc_offset
+
+    def _date(self, day):
+        date = self.dates[day] = (datetime.date(1970, 1, 1) + datetime.timedelta(days=day)).strftime('%Y-%m-%d ')
+        return date
+
+    def format_timestamps(self, timestamps):
+        """
+        Convert the epoch timestamps to local time, format {YYYY-mm-dd HH:MM:SS}
+        :param timestamps: list of epoch times in msec
+        :return: list of local times
+        """
+        utc_offsets = self.utc_offsets
+        dates = self.dates
+        times_of_day = get_times_of_day()
+        local_times = []
+        for timestamp in timestamps:
+            seconds = int(timestamp) // 1000
+            quarter = seconds // QUARTER
+            utc_offset = utc_offsets.get(quarter, False)
+            if utc_offset is False:
+                utc_offset = self._utc_offset(quarter)
+            if utc_offset is None:
+                utc_offset = self._offset(seconds)
+            local_seconds = seconds + utc_offset
+            day = local_seconds // DAY
+            date = dates.get(day) or self._date(day)
+            local_times.append(date + times_of_day[local_seconds - day * DAY])
+        return local_times
+
+
+@functools.lru_cache(maxsize=None)
+def get_times_of_day():
+    """
+    :return: list of the {HH:MM:SS} strings for each second of the day
+    """
+    return ['%02d:%02d:%02d' % (second // HOUR, second // 60 % 60, second % 60) for second in range(DAY)]
+
+
+@functools.lru_cache(maxsize=None)
+def get_time_formatter(timezone):
+    """
+    Find the TimeFormatter for the {timezone}, shared by all the reports
+    :param timezone: IANA timezone name
+    :return: TimeFormatter
+    """
+    return TimeFormatter(timezone)
+
+
+@functools.lru_cache(maxsize=4096)
+def format_duration(duration):
+    """
+    Convert the duration in msec to: days hh:mm:ss, the durations are multiples of the time resolution and repeat
+    :param duration: duration in msec
+    :return: formatted duration
+    """
+    return str(datetime.timedelta(seconds=int(duration / 1000)))
+
+
+def format_durations(durations):
+    """
+    Convert the durations in msec to: days hh:mm:ss
+    :param durations: list of durations in msec
+    :return: list of formatted durations
+    """
+    return [format_duration(duration) for duration in durations]
+
+
+def valid_timezone(timezone):
+    """
+    :param timezone: timezone name
+    :return: True if {timezone} is a known IANA timezone name
+    """
+    try:
+        get_time_formatter(timezone)
+    except (ValueError, ZoneInfoNotFoundError):
+        return False
+    return True
+
+
+class TimeZones:
+    """
+    The timezone of each site, the reports use the timezone of the site of each location.
+    A site is a location prefix, example {Global/San Jose}, the longest matching site is used.
+    """
+
+    def __init__(self, default=DEFAULT_TIMEZONE, sites=None):
+        """
+        :param default: IANA timezone name, for the locations not matching any site
+        :param sites: dict of site: IANA timezone name
+        """
+        self.default = default
+        self.sites = sorted((sites or {}).items(), key=lambda x: len(x[0]), reverse=True)
+        # validate the timezone names
+        for timezone in [default] + [timezone for _, timezone in self.sites]:
+            get_time_formatter(timezone)
+
+    def for_request(self, timezone):
+        """
+        :param timezone: IANA timezone name requested, or None
+        :return: TimeZones using the {timezone} for all the locations, or this TimeZones if None
+        """
+        return self if timezone is None else TimeZones(timezone)
+
+    def timezone(self, location):
+        """
+        :param location: location, example {Global/San Jose/Building 24/Floor 1}
+        :return: the IANA timezone name of the location site
+        """
+        for site, timezone in self.sites:
+            if location == site or location.startswith(site + '/'):
+                return timezone
+        return self.default
+
+    def format_timestamps(self, timestamps, locations):
+        """
+        Convert the epoch timestamps to the local time of each location, the timestamps of each timezone are
+        converted in one batch
+        :param timestamps: list of epoch times in msec
+        :param locations: list of locations, one for each timestamp
+        :return: list of local times
+        """
+        if not self.sites:
+            return get_time_formatter(self.default).format_timestamps(timestamps)
+        batches = {}
+        site_timezones = {}
+        for index, location in enumerate(locations):
+            timezone = site_timezones.get(location)
+            if timezone is None:
+                timezone = site_timezones[location] = self.timezone(location)
+            batches.setdefault(timezone, []).append(index)
+        local_times = [None] * len(timestamps)
+        for timezone, indexes in batches.items():
+            batch = get_time_formatter(timezone).format_timestamps([timestamps[index] for index in indexes])
+            for index, local_time in zip(indexes, batch):
+                local_times[index] = local_time
+        return local_times
@@ -0,0 +1,322 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+# The reports are saved in a columnar binary format, {.prx}, one file per report:
+#   header  - magic {PRXC}, format version, report kind and number of rows, struct '<4sBBI'
+#   strings - number of strings, the length of each string (uint32) and the UTF-8 strings, the users, client types
+#             and locations are saved once and referenced by index (int32, -1 if missing)
+#   columns - one column after the other, little-endian:
+#             total time report: client_mac (48-bit, big-endian), client_user (int32), client_type (int32),
+#                                total_time (int64)
+#             dwell time report: location (int32), start_time (int64), end_time (int64)
+# All the times are epoch times or durations in msec. The JSON Lines format, {.jsonl}, has the formatted times.
+
+
+import functools
+import json
+import struct
+import sys
+
+from array import array
+
+from proximity_model import normalize_mac
+from proximity_time import TimeZones, format_durations
+
+
+COLUMNAR = 'columnar'
+JSON_LINES = 'jsonl'
+REPORT_EXTENSIONS = {COLUMNAR: '.prx', JSON_LINES: '.jsonl'}
+
+MAGIC = b'PRXC'
+VERSION = 1
+HEADER = struct.Struct('<4sBBI')
+TOTAL_TIME = 1
+DWELL_TIME = 2
+MAC_SIZE = 6
+
+# report kind: columns, (name, array typecode), the MAC column is saved as 48-bit values
+COLUMNS = {
+    TOTAL_TIME: [('client_mac', None), ('client_user', 'i'), ('client_type', 'i'), ('total_time', 'q')],
+    DWELL_TIME: [('location', 'i'), ('start_time', 'q'), ('end_time', 'q')]
+}
+
+
+def _column_bytes(typecode, values):
+    column = array(typecode, values)
+    if sys.byteorder == 'big':
+        column.byteswap()
+    return column.tobytes()
+
+
+def _column_values(typecode, data):
+    column = array(typecode)
+    column.frombytes(data)
+    if sys.byteorder == 'big':
+        column.byteswap()
+    return column.tolist()
+
+
+class StringTable:
+    """
+    Each string is saved once, the columns have the index of the string
+    """
+
+    def __init__(self):
+        self.strings = []
+        self.indexes = {}
+
+    def index(self, value):
+        """
+        :param value: string, or None
+        :return: the index of the {value}, -1 for None
+        """
+        if value is None:
+            return -1
+        index = self.indexes.get(value)
+        if index is None:
+            index = self.indexes[value] = len(self.strings)
+            self.strings.append(value)
+        return index
+
+    def to_bytes(self):
+        encoded = [value.encode('utf-8') for value in self.strings]
+        return (struct.pack('<I', len(encoded)) + _column_bytes('I', [len(value) for value in encoded]) +
+                b''.join(encoded))
+
+
+def _mac_column(mac_addresses):
+    # the MAC addresses are converted in one call, or one at a time if not all in the {aa:bb:cc:00:11:22} format
+    try:
+        column = bytes.fromhex(''.join(mac_addresses).replace(':', ''))
+    except ValueError:  # example {aabb.cc00.1122}
+        column = b''
+    if len(column) != MAC_SIZE * len(mac_addresses):
+        column = b''.join(bytes.fromhex(normalize_mac(mac_address)) for mac_address in mac_addresses)
+    return column
+
+
+def _encode(kind, rows, string_columns):
+    strings = StringTable()
+    columns = []
+    for name, typecode in COLUMNS[kind]:
+        values = [row.get(name) for row in rows]
+        if typecode is None:
+            columns.append(_mac_column(values))
+        elif name in string_columns:
+            columns.append(_column_bytes(typecode, [strings.index(value) for value in values]))
+        else:
+            columns.append(_column_bytes(typecode, values))
+    return b''.join([HEADER.pack(MAGIC, VERSION, kind, len(rows)), strings.to_bytes()] + columns)
+
+
+def encode_total_time_report(sorted_users_total_time):
+    """
+    :param sorted_users_total_time: the total time report, see {TotalTimeAggregator.report}
+    :return: the report in the columnar format
+    """
+    return _encode(TOTAL_TIME, sorted_users_total_time, ('client_user', 'client_type'))
+
+
+def encode_dwell_time_report(employee_dwell_time):
+    """
+    :param employee_dwell_time: the dwell time report, see {DwellTimeAggregator.report}
+    :return: the report in the columnar format
+    """
+    return _encode(DWELL_TIME, employee_dwell_time, ('location',))
+
+
+def encode_json_lines(items):
+    """
+    :param items: list of report items
+    :return: the report in the JSON Lines format, one item per line
+    """
+    return ''.join(json.dumps(item) + '\n' for item in items).encode('utf-8')
+
+
+def format_total_time_report(sorted_users_total_time):
+    """
+    Convert the total times in msec to: days hh:mm:ss, in one batch
+    :param sorted_users_total_time: the total time report, updated
+    :return: the total time report
+    """
+    total_times = format_durations([user['total_time'] for user in sorted_users_total_time])
+    for user, total_time in zip(sorted_users_total_time, total_times):
+        user['total_time'] = total_time
+    return sorted_users_total_time
+
+
+def format_dwell_time_report(employee_dwell_time, timezones=None):
+    """
+    Convert the dwell times to the local time of each location, in one batch
+    :param employee_dwell_time: the dwell time report, updated
+    :param timezones: TimeZones of the locations, the default timezone if None
+    :return: the dwell time report
+    """
+    locations = [time_slice['location'] for time_slice in employee_dwell_time]
+    local_times = (timezones or TimeZones()).format_timestamps(
+        [time_slice['start_time'] for time_slice in employee_dwell_time] +
+        [time_slice['end_time'] for time_slice in employee_dwell_time], locations + locations)
+    for time_slice, start_time, end_time in zip(employee_dwell_time, local_times, local_times[len(locations):]):
+        time_slice.update({'start_time': start_time, 'end_time': end_time})
+    return employee_dwell_time
+
+
+@functools.lru_cache(maxsize=65536)
+def format_mac(value):
+    """
+    :param value: 48-bit MAC address
+    :return: MAC address, example {aa:bb:cc:00:11:22}
+    """
+    mac_address = '%012x' % value
+    return ':'.join(mac_address[i:i + 2] for i in range(0, 12, 2))
+
+
+class ColumnarReport:
+    """
+    A report loaded from the columnar format, the columns are lists of values
+    """
+
+    def __init__(self, kind, strings, columns):
+        """
+        :param kind: TOTAL_TIME or DWELL_TIME
+        :param strings: the string table
+        :param columns: dict of column name: list of values, the MAC addresses as 48-bit values and the strings as
+        indexes in the {strings}
+        """
+        self.kind = kind
+        self.strings = strings
+        self.columns = columns
+
+    def __len__(self):
+        return len(next(iter(self.columns.values())))
+
+    def string_column(self, name):
+        """
+        :param name: column name, example {location}
+        :return: list of the strings, None if missing
+        """
+        strings = self.strings
+        return [strings[index] if index >= 0 else None for index in self.columns[name]]
+
+    def rows(self):
+        """
+        :return: list of the report items, same as created by the report aggregators, the times in msec
+        """
+        if self.kind == TOTAL_TIME:
+            rows = []
+            for client_mac, client_user, client_type, total_time in zip(
+                    map(format_mac, self.columns['client_mac']), self.string_column('client_user'),
+                    self.string_column('client_type'), self.columns['total_time']):
+                if client_user is None:
+                    rows.append({'client_mac': client_mac, 'total_time': total_time})
+                else:
+                    rows.append({'client_mac': client_mac, 'client_user': client_user, 'client_type': client_type,
+                                 'total_time': total_time})
+            return rows
+        return [{'location': location, 'start_time': start_time, 'end_time': end_time}
+                for location, start_time, end_time in zip(
+                    self.string_column('location'), self.columns['start_time'], self.columns['end_time'])]
+
+    def formatted_rows(self, timezones=None):
+        """
+        :param timezones: TimeZones to convert the dwell times to local time, the default timezone if None
+        :return: list of the report items, the total times in: days hh:mm:ss, the dwell times in local time
+        """
+        if self.kind == TOTAL_TIME:
+            return format_total_time_report(self.rows())
+        return format_dwell_time_report(self.rows(), timezones)
+
+
+def decode_report(data):
+    """
+    :param data: report in the columnar format, bytes
+    :return: ColumnarReport
+    """
+    magic, version, kind, row_count = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION or kind not in COLUMNS:
+        raise ValueError('Not a columnar report, or unsupported version')
+    offset = HEADER.size
+    string_count, = struct.unpack_from('<I', data, offset)
+    offset += 4
+    lengths = _column_values('I', data[offset:offset + 4 * string_count])
+    offset += 4 * string_count
+    strings = []
+    for length in lengths:
+        strings.append(data[offset:offset + length].decode('utf-8'))
+        offset += length
+    columns = {}
+    for name, typecode in COLUMNS[kind]:
+        if typecode is None:
+            size = MAC_SIZE * row_count
+            columns[name] = [int.from_bytes(data[i:i + MAC_SIZE], 'big')
+                             for i in range(offset, offset + size, MAC_SIZE)]
+        else:
+            size = array(typecode).itemsize * row_count
+            columns[name] = _column_values(typecode, data[offset:offset + size])
+        offset += size
+    return ColumnarReport(kind, strings, columns)
+
+
+def load_report(file_path):
+    """
+    Load a report saved in the columnar format
+    :param file_path: report file path, {.prx}
+    :return: ColumnarReport
+    """
+    with open(file_path, 'rb') as f:
+        return decode_report(f.read())
+
+
+def export_json_lines(file_path, output_path, timezones=None):
+    """
+    Export a report saved in the columnar format to JSON Lines, with the formatted times
+    :param file_path: report file path, {.prx}
+    :param output_path: JSON Lines file path
+    :param timezones: TimeZones for the dwell times, see {ColumnarReport.formatted_rows}
+    :return:
+    """
+    data = encode_json_lines(load_report(file_path).formatted_rows(timezones))
+    with open(output_path, 'wb') as f:
+        f.write(data)
+
+
+def main():
+    """
+    Export the columnar reports to JSON Lines, next to each report.
+    Command line arguments: the report files, {.prx}
+    """
+    from config import TIMEZONE, SITE_TIMEZONES
+    timezones = TimeZones(TIMEZONE, SITE_TIMEZONES)
+    for file_path in sys.argv[1:]:
+        output_path = file_path[:-len(REPORT_EXTENSIONS[COLUMNAR])] + REPORT_EXTENSIONS[JSON_LINES]
+        export_json_lines(file_path, output_path, timezones)
+        print('Report exported to ' + output_path)
+
+
+if __name__ == '__main__':
+    main()
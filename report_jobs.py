@@ -0,0 +1,421 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+import cProfile
+import hashlib
+import json
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+
+from collections import OrderedDict
+
+from metrics import JOBS, PAYLOAD_BYTES, PAYLOAD_SLICES, STAGE_SECONDS
+from proximity_model import load_payload
+from proximity_reports import create_reports, create_reports_from_events, get_process_pool
+from proximity_store import lock_file
+from proximity_stream import iter_proximity_events, read_details, CHUNK_SIZE
+from proximity_time import TimeZones
+from report_format import COLUMNAR
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows, a single receiver process
+    fcntl = None
+
+
+JOB_HISTORY = 1000  # number of completed jobs to keep the status for
+SPOOL_LOCK = '.lock'  # locked by the process saving to the spool folder
+
+# fraction of the notifications profiled with cProfile, example 0.01, the profiles are saved to PROFILE_FOLDER
+PROFILE_RATE = float(os.environ.get('PROXIMITY_PROFILE_RATE', 0))
+PROFILE_FOLDER = os.environ.get('PROXIMITY_PROFILE_FOLDER', 'profiles')
+
+
+def process_payload_file(payload_path, streaming=False, processes=1, indexers=(), timezones=None,
+                         report_format=COLUMNAR, profile_path=None, user_reports=None):
+    """
+    Create the reports for the notification saved to the file {payload_path}
+    :param payload_path: path to the saved notification
+    :param streaming: if True, parse the notification one time slice at a time, instead of loading it in memory
+    :param processes: number of worker processes to create the reports for the wireless clients, not used if
+    {streaming}
+    :param indexers: indexers to add the time slices to, see {create_reports_from_events}
+    :param timezones: TimeZones for the dwell time reports, see {client_reports}
+    :param report_format: COLUMNAR or JSON_LINES, see {client_reports}
+    :param profile_path: optional, the processing is profiled with cProfile and the stats saved to {profile_path}
+    :param user_reports: optional, UserReports to update the reports of each user, see {create_reports_from_events}
+    :return: report info, see {create_reports_from_events}
+    """
+    if profile_path is not None:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # another profiler is running in this process
+            profiler = None
+        try:
+            return process_payload_file(payload_path, streaming, processes, indexers, timezones, report_format,
+                                        user_reports=user_reports)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                profiler.dump_stats(profile_path)
+    if streaming:
+        with open(payload_path, 'rb') as f:
+            return create_reports_from_events(iter_proximity_events(f), indexers, timezones, report_format,
+                                              user_reports)
+    with STAGE_SECONDS.time('load'):
+        with open(payload_path) as f:
+            webhook_json = load_payload(f)
+    return create_reports(webhook_json, processes, indexers, timezones, report_format, user_reports)
+
+
+class ReportJobs:
+    """
+    Bounded queue of saved notifications, processed by a pool of workers.
+    The notifications are saved to the {spool_folder} before they are queued, and removed when the reports have been
+    created and the notification saved to the {store}, or renamed to {job_id}.failed if the reports could not be
+    created. Each receiver process saves to its own folder in the {spool_folder}, locked while the process runs. The
+    notifications found at start in the folders of the stopped processes are moved to the new folder and queued again.
+    The timezone requested for a notification, its content hash and if it is parsed as a stream are saved to
+    {job_id}.meta, next to the notification. With a {dedup} index, the redelivered notifications are skipped: by
+    content hash when received, and by the {user_name}, {start_time} and {end_time} when processed.
+    The bytes of the notifications queued and running are available for the admission control, see {queued_bytes}.
+    The time spent in each stage, the size and time slices of the notifications and the job results are recorded in the
+    {metrics} registry. With PROFILE_RATE, a sample of the notifications is profiled.
+    """
+
+    def __init__(self, spool_folder, workers=4, queue_size=100, executor='thread', streaming=False, store=None,
+                 processes=1, indexers=(), timezones=None, report_format=COLUMNAR, dedup=None, user_reports=None):
+        """
+        :param spool_folder: folder to save the notifications to, until processed
+        :param workers: number of workers creating reports
+        :param queue_size: maximum number of notifications waiting to be processed
+        :param executor: 'thread' to create the reports in the worker threads, 'process' to use a process pool of
+        {workers} processes, create it with {get_process_pool} before the threads are started and the files are opened
+        :param streaming: if True, the notifications are parsed one time slice at a time
+        :param store: ProximityStore to save the processed notifications to, indexed with the report info
+        :param processes: number of worker processes to create the reports for the wireless clients of one
+        notification
+        :param indexers: indexers to add the time slices to, example {ContactGraph}
+        :param timezones: TimeZones for the dwell time reports, the default timezone if None
+        :param report_format: COLUMNAR or JSON_LINES, the format of the reports
+        :param dedup: optional, DedupIndex of the notifications received
+        :param user_reports: optional, UserReports to update the reports of each user in place, instead of creating a
+        new report folder for each notification
+        """
+        self.spool_folder = spool_folder
+        self.streaming = streaming
+        self.store = store
+        self.processes = processes
+        self.indexers = indexers
+        self.timezones = timezones or TimeZones()
+        self.report_format = report_format
+        self.dedup = dedup
+        self.user_reports = user_reports
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.jobs = OrderedDict()
+        self.job_bytes = {}  # job_id: size of the notification, for the jobs queued and running
+        self.lock = threading.Lock()
+        # the persistent report process pool, forked when created, see {get_process_pool}
+        self.process_pool = get_process_pool(workers) if executor == 'process' else None
+        self.spool_root = spool_folder
+        os.makedirs(spool_folder, exist_ok=True)
+        self.spool_folder = os.path.join(spool_folder, 'worker-%d-%s' % (os.getpid(), uuid.uuid4().hex[:8]))
+        os.mkdir(self.spool_folder)
+        self.spool_lock = lock_file(os.path.join(self.spool_folder, SPOOL_LOCK), create=True)
+        self._adopt_spool()
+        for _ in range(workers):
+            threading.Thread(target=self._worker, daemon=True).start()
+        saved_payloads = sorted(filename for filename in os.listdir(self.spool_folder) if filename.endswith('.json'))
+        threading.Thread(target=self._recover, args=(saved_payloads,), daemon=True).start()
+
+    def _adopt_spool(self):
+        # the files of the stopped processes are moved to the folder of this process. The processes starting at the same
+        # time adopt the folders one at a time
+        with open(os.path.join(self.spool_root, SPOOL_LOCK), 'ab') as adopt_lock:
+            if fcntl is not None:
+                fcntl.flock(adopt_lock, fcntl.LOCK_EX)
+            for name in sorted(os.listdir(self.spool_root)):
+                folder = os.path.join(self.spool_root, name)
+                if folder == self.spool_folder or not os.path.isdir(folder):
+                    continue
+                folder_lock = lock_file(os.path.join(folder, SPOOL_LOCK))
+                if folder_lock is None:
+                    # the folder of a running process
+                    continue
+                # the request info is moved before the notification, a recovered notification always finds it
+                for filename in sorted(os.listdir(folder), key=lambda name: not name.endswith('.meta')):
+                    path = os.path.join(folder, filename)
+                    if filename != SPOOL_LOCK and os.path.isfile(path):
+                        os.replace(path, os.path.join(self.spool_folder, filename))
+                os.remove(os.path.join(folder, SPOOL_LOCK))
+                folder_lock.close()
+                try:
+                    os.rmdir(folder)
+                except OSError:
+                    pass
+
+    def save(self, chunks, timezone=None, streaming=False):
+        """
+        Save the notification to the spool folder. If reading the {chunks} fails, example the notification is too
+        large, nothing is saved and the error is raised.
+        :param chunks: the notification, iterable of bytes
+        :param timezone: IANA timezone name for all the reports of this notification, or None for the site timezones
+        :param streaming: if True, this notification is parsed one time slice at a time, example a large notification
+        :return: the job id
+        """
+        job_id = uuid.uuid4().hex
+        meta = {} if timezone is None else {'timezone': timezone}
+        if streaming:
+            meta['streaming'] = True
+        if meta:
+            # saved before the notification, a recovered notification always finds its timezone
+            self._save_meta(job_id, meta)
+        content_hash = hashlib.sha256()
+        try:
+            with open(self.payload_path(job_id), 'wb') as f:
+                for chunk in chunks:
+                    content_hash.update(chunk)
+                    f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+        except BaseException:
+            os.remove(self.payload_path(job_id))
+            self._remove_meta(job_id)
+            raise
+        if self.dedup is not None:
+            meta['content_hash'] = content_hash.hexdigest()
+            self._save_meta(job_id, meta)
+        return job_id
+
+    def payload_path(self, job_id):
+        """
+        :param job_id: job id
+        :return: path to the saved notification for the job {job_id}
+        """
+        return os.path.join(self.spool_folder, job_id + '.json')
+
+    def meta_path(self, job_id):
+        """
+        :param job_id: job id
+        :return: path to the saved request info, example the timezone, for the job {job_id}
+        """
+        return os.path.join(self.spool_folder, job_id + '.meta')
+
+    def _meta(self, job_id):
+        try:
+            with open(self.meta_path(job_id)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _save_meta(self, job_id, meta):
+        with open(self.meta_path(job_id) + '.tmp', 'w') as f:
+            json.dump(meta, f)
+        os.replace(self.meta_path(job_id) + '.tmp', self.meta_path(job_id))
+
+    def _remove_meta(self, job_id):
+        try:
+            os.remove(self.meta_path(job_id))
+        except FileNotFoundError:
+            pass
+
+    def _find_duplicate(self, job_id, payload_path):
+        # compared with the notifications received before: by content hash, if not done when received, and by the
+        # {user_name}, {start_time} and {end_time}, if saved before the client proximity data sets
+        content_hash = self._meta(job_id).get('content_hash')
+        if content_hash is None:
+            # not saved if the receiver stopped after the notification was saved
+            content_hash = hashlib.sha256()
+            with open(payload_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                    content_hash.update(chunk)
+            content_hash = content_hash.hexdigest()
+            original_job_id = self.dedup.claim(content_hash, job_id)
+            if original_job_id not in (None, job_id):
+                return content_hash, original_job_id, True
+        with open(payload_path, 'rb') as f:
+            details = read_details(f)
+        if not all(key in details for key in ('user_name', 'start_time', 'end_time')):
+            return content_hash, None, False
+        return content_hash, self.dedup.claim_details(content_hash, details['user_name'], details['start_time'],
+                                                      details['end_time']), True
+
+    def deduplicate(self, job_id):
+        """
+        Find if the saved notification was already received, the duplicate notification is removed
+        :param job_id: the job id returned by {save}
+        :return: the job id of the first delivery if already received, or None
+        """
+        if self.dedup is None:
+            return None
+        original_job_id = self.dedup.claim(self._meta(job_id)['content_hash'], job_id)
+        if original_job_id is not None:
+            os.remove(self.payload_path(job_id))
+            self._remove_meta(job_id)
+        return original_job_id
+
+    def submit(self, job_id):
+        """
+        Queue the saved notification to be processed
+        :param job_id: the job id returned by {save}
+        :return: True if queued, False if the queue is full and the saved notification was removed
+        """
+        payload_path = self.payload_path(job_id)
+        with self.lock:
+            self.jobs[job_id] = {'job_id': job_id, 'status': 'queued', 'submitted': time.time()}
+            self.job_bytes[job_id] = os.path.getsize(payload_path)
+        try:
+            self.queue.put_nowait((job_id, payload_path))
+        except queue.Full:
+            with self.lock:
+                del self.jobs[job_id]
+                del self.job_bytes[job_id]
+            if self.dedup is not None:
+                # not processed, the notification is accepted again when redelivered
+                self.dedup.release(self._meta(job_id)['content_hash'])
+            os.remove(payload_path)
+            self._remove_meta(job_id)
+            return False
+        return True
+
+    def status(self, job_id):
+        """
+        Find the status of the job {job_id}. The jobs of the other receiver processes are found in their spool
+        folders, queued or failed
+        :param job_id: job id
+        :return: job status info, or None if not found
+        """
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is not None:
+                return dict(job)
+        if not job_id.isalnum():
+            return None
+        for name in os.listdir(self.spool_root):
+            for extension, status in (('.json', 'queued'), ('.failed', 'failed')):
+                if os.path.exists(os.path.join(self.spool_root, name, job_id + extension)):
+                    return {'job_id': job_id, 'status': status}
+        return None
+
+    def queued_bytes(self):
+        """
+        :return: the bytes of the notifications queued and being processed
+        """
+        with self.lock:
+            return sum(self.job_bytes.values())
+
+    def _recover(self, saved_payloads):
+        for filename in saved_payloads:
+            job_id = filename[:-len('.json')]
+            payload_path = os.path.join(self.spool_folder, filename)
+            self._update(job_id, status='queued', submitted=os.path.getmtime(payload_path))
+            with self.lock:
+                self.job_bytes[job_id] = os.path.getsize(payload_path)
+            self.queue.put((job_id, payload_path))
+
+    def _update(self, job_id, **info):
+        with self.lock:
+            job = self.jobs.setdefault(job_id, {'job_id': job_id})
+            job.update(info)
+            if info.get('status') in ('completed', 'failed', 'duplicate'):
+                self.jobs.move_to_end(job_id)
+                while len(self.jobs) > JOB_HISTORY and self.jobs[next(iter(self.jobs))]['status'] in (
+                        'completed', 'failed', 'duplicate'):
+                    self.jobs.popitem(last=False)
+
+    def _profile_path(self, job_id):
+        if not PROFILE_RATE or random.random() >= PROFILE_RATE:
+            return None
+        os.makedirs(PROFILE_FOLDER, exist_ok=True)
+        return os.path.join(PROFILE_FOLDER, job_id + '.prof')
+
+    def _worker(self):
+        while True:
+            job_id, payload_path = self.queue.get()
+            self._update(job_id, status='running', started=time.time())
+            job_start = time.perf_counter()
+            report_info = None
+            content_hash = None
+            try:
+                if self.dedup is not None:
+                    with STAGE_SECONDS.time('dedup'):
+                        content_hash, original_job_id, details_claimed = self._find_duplicate(job_id, payload_path)
+                    if original_job_id is not None:
+                        print('Report job ' + job_id + ' skipped, duplicate of ' + original_job_id)
+                        os.remove(payload_path)
+                        self._remove_meta(job_id)
+                        self._update(job_id, status='duplicate', completed=time.time(), duplicate_of=original_job_id)
+                        JOBS.inc('duplicate')
+                        continue
+                PAYLOAD_BYTES.set(os.path.getsize(payload_path))
+                meta = self._meta(job_id)
+                timezones = self.timezones.for_request(meta.get('timezone'))
+                streaming = self.streaming or meta.get('streaming', False)
+                profile_path = self._profile_path(job_id)
+                if self.process_pool is not None:
+                    # the stages are recorded in the worker process, only the job time is recorded here
+                    report_info = self.process_pool.submit(process_payload_file, payload_path, streaming,
+                                                           1, self.indexers, timezones, self.report_format,
+                                                           profile_path, self.user_reports).result()
+                else:
+                    report_info = process_payload_file(payload_path, streaming, self.processes, self.indexers,
+                                                       timezones, self.report_format, profile_path, self.user_reports)
+                PAYLOAD_SLICES.set(report_info['slices'])
+                if self.dedup is not None and not details_claimed:
+                    self.dedup.claim_details(content_hash, report_info['user_name'], report_info['start_time'],
+                                             report_info['end_time'])
+                if self.store is not None:
+                    with STAGE_SECONDS.time('store'):
+                        self.store.append(payload_path, report_info)
+                os.remove(payload_path)
+                self._remove_meta(job_id)
+            except Exception as error:
+                print('Report job ' + job_id + ' failed: ' + repr(error))
+                if content_hash is not None:
+                    # the notification is processed again if redelivered
+                    self.dedup.release(content_hash)
+                if report_info is None and self.store is not None:
+                    # the notifications are saved, even if the reports could not be created
+                    self.store.append(payload_path)
+                os.replace(payload_path, payload_path[:-len('.json')] + '.failed')
+                self._update(job_id, status='failed', completed=time.time(), error=repr(error))
+                JOBS.inc('failed')
+            else:
+                self._update(job_id, status='completed', completed=time.time(), folder=report_info['folder'])
+                STAGE_SECONDS.observe(time.perf_counter() - job_start, 'job')
+                JOBS.inc('completed')
+            finally:
+                with self.lock:
+                    self.job_bytes.pop(job_id, None)
+                self.queue.task_done()
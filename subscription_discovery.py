@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+# Discovery of the webhook destinations and event subscriptions of Cisco DNA Center. All the pages are fetched, a
+# wave of {concurrency} pages at a time, until a page is not full, a page is empty or a page starts with the same item
+# as a previous page (an API not supporting the offset), at most {max_pages} pages. The destinations are indexed by URL
+# and instanceId, the subscriptions by the instanceId of each of their endpoints.
+
+
+from concurrent.futures import ThreadPoolExecutor
+
+from dnac_client import PAGE_SIZE
+
+
+PAGE_CONCURRENCY = 4  # pages requested at the same time
+MAX_PAGES = 1000  # pages of each paginated API, the items of the next pages are not fetched
+
+
+def fetch_pages(fetch_page, page_size=PAGE_SIZE, concurrency=PAGE_CONCURRENCY, max_pages=MAX_PAGES):
+    """
+    Fetch all the pages of a paginated API, {concurrency} pages at a time, until a page is not full, a page is empty, or
+    a page starts with the same item as a previous page, the offset is not supported and the same page is returned again
+    :param fetch_page: function(offset, limit) returning the list of items of one page
+    :param page_size: number of items of each page
+    :param concurrency: number of pages requested at the same time
+    :param max_pages: maximum number of pages fetched
+    :return: list of all the items, in the order of the pages
+    """
+    items = []
+    first_items = []
+    offset = 0
+    fetched = 0
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while fetched < max_pages:
+            offsets = [offset + page * page_size for page in range(min(concurrency, max_pages - fetched))]
+            pages = list(executor.map(lambda page_offset: fetch_page(page_offset, page_size), offsets))
+            for page in pages:
+                if not page or page[0] in first_items:
+                    return items
+                first_items.append(page[0])
+                items += page
+                if len(page) < page_size:
+                    return items
+            offset += len(offsets) * page_size
+            fetched += len(offsets)
+    print('Paginated API: more than ' + str(max_pages) + ' pages, the next pages are not fetched')
+    return items
+
+
+class Discovery:
+    """
+    The webhook destinations and the event subscriptions of one event id, indexed
+    """
+
+    def __init__(self, destinations, subscriptions):
+        """
+        :param destinations: list of the REST destinations
+        :param subscriptions: list of the event subscriptions
+        """
+        self.destinations = destinations
+        self.subscriptions = subscriptions
+        self.destinations_by_url = {}
+        self.destinations_by_id = {}
+        for destination in destinations:
+            self.destinations_by_url.setdefault(destination.get('url'), destination)
+            self.destinations_by_id[destination['instanceId']] = destination
+        self.subscriptions_by_destination = {}
+        for subscription in subscriptions:
+            for endpoint in subscription.get('subscriptionEndpoints', []):
+                self.subscriptions_by_destination.setdefault(endpoint.get('instanceId'), []).append(subscription)
+
+    def destination(self, url):
+        """
+        :param url: the destination URL, example {WEBHOOK_URL}
+        :return: the destination, or None if not found
+        """
+        return self.destinations_by_url.get(url)
+
+    def destination_subscriptions(self, instance_id):
+        """
+        :param instance_id: the destination instanceId
+        :return: list of the event subscriptions with an endpoint to the destination
+        """
+        return self.subscriptions_by_destination.get(instance_id, [])
+
+
+class SubscriptionDiscovery:
+    """
+    Find the webhook destinations and the event subscriptions
+    """
+
+    def __init__(self, dnac_client, page_size=PAGE_SIZE, concurrency=PAGE_CONCURRENCY):
+        """
+        :param dnac_client: DNACClient
+        :param page_size: number of items of each page
+        :param concurrency: number of pages requested at the same time
+        """
+        self.dnac_client = dnac_client
+        self.page_size = page_size
+        self.concurrency = concurrency
+
+    def discover(self, event_id):
+        """
+        Find all the destinations and the event subscriptions for the {event_id}, the destinations and the
+        subscriptions are fetched at the same time
+        :param event_id: Cisco DNA Center event id, example {NETWORK-CLIENTS-3-506}
+        :return: Discovery
+        """
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            destinations = executor.submit(fetch_pages, self.dnac_client.get_destination_details, self.page_size,
+                                           self.concurrency)
+            subscriptions = executor.submit(
+                fetch_pages, lambda offset, limit: self.dnac_client.get_event_subscriptions(event_id, offset, limit),
+                self.page_size, self.concurrency)
+            return Discovery(destinations.result(), subscriptions.result())
@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+import json
+import random
+import time
+
+
+LOCATIONS = ['Global/San Jose/Building 24/Floor ' + str(floor) for floor in range(1, 5)]
+CLIENT_TYPES = ['Apple-Device', 'Microsoft-Workstation', 'Android-Samsung']
+
+
+def mac_address(index):
+    """
+    Create a MAC address for the synthetic client {index}
+    :param index: client index
+    :return: MAC address, example {00:00:00:00:01:2c}
+    """
+    value = '%012x' % index
+    return ':'.join(value[i:i + 2] for i in range(0, 12, 2))
+
+
+def iter_client_proximity(days, resolution, contacts, devices, contacts_per_slice, end_time, rnd):
+    """
+    Create the synthetic client proximity data sets, one for each device
+    :return: generator of data sets, with mac_address and client_info
+    """
+    resolution_msec = resolution * 60 * 1000
+    start_time = end_time - days * 24 * 60 * 60 * 1000
+    slices = (end_time - start_time) // resolution_msec
+    for device in range(devices):
+        client_info = []
+        location = rnd.choice(LOCATIONS)
+        for index in range(slices):
+            if rnd.random() < 0.05:
+                location = rnd.choice(LOCATIONS)
+            users_info = []
+            for contact in rnd.sample(range(contacts), min(contacts_per_slice, contacts)):
+                users_info.append({
+                    'client_mac': mac_address(0x10000 + contact),
+                    'client_user': 'user' + str(contact),
+                    'client_type': CLIENT_TYPES[contact % len(CLIENT_TYPES)]
+                })
+            client_info.append({
+                'location': location,
+                'start_time': start_time + index * resolution_msec,
+                'end_time': start_time + (index + 1) * resolution_msec,
+                'users_info': users_info
+            })
+        yield {'mac_address': mac_address(device + 1), 'client_info': client_info}
+
+
+def payload_envelope(user_name, days, resolution, end_time):
+    """
+    Create the notification, without the client proximity data sets
+    :return: the notification
+    """
+    return {
+        'eventId': 'NETWORK-CLIENTS-3-506',
+        'category': 'INFO',
+        'timestamp': end_time,
+        'details': {
+            'user_name': user_name,
+            'time_resolution': resolution,
+            'number_days': days,
+            'start_time': end_time - days * 24 * 60 * 60 * 1000,
+            'end_time': end_time,
+            'client_proximity': []
+        }
+    }
+
+
+def end_timestamp(resolution):
+    """
+    :param resolution: time resolution, in minutes
+    :return: the current time in msec, rounded down to the time resolution
+    """
+    resolution_msec = resolution * 60 * 1000
+    return (int(time.time() * 1000) // resolution_msec) * resolution_msec
+
+
+def make_payload(user_name='gabiz', days=14, resolution=5, contacts=200, devices=1, contacts_per_slice=10,
+                 seed=0):
+    """
+    Create a synthetic client proximity notification, for the event id {NETWORK-CLIENTS-3-506}
+    :param user_name: the username of the reported client
+    :param days: number of days in the past
+    :param resolution: time resolution, in minutes
+    :param contacts: number of unique wireless clients found in proximity
+    :param devices: number of wireless devices of the reported client
+    :param contacts_per_slice: number of wireless clients in proximity in each time slice
+    :param seed: random seed, the same arguments will create the same payload
+    :return: the notification
+    """
+    end_time = end_timestamp(resolution)
+    payload = payload_envelope(user_name, days, resolution, end_time)
+    payload['details']['client_proximity'] = list(iter_client_proximity(
+        days, resolution, contacts, devices, contacts_per_slice, end_time, random.Random(seed)))
+    return payload
+
+
+def write_payload(f, user_name='gabiz', days=14, resolution=5, contacts=200, devices=1, contacts_per_slice=10,
+                  seed=0):
+    """
+    Write a synthetic client proximity notification to the text file {f}, one device at a time.
+    Used to create notifications larger than the available memory, see {make_payload} for the other params.
+    :param f: text file to write to
+    :return:
+    """
+    end_time = end_timestamp(resolution)
+    envelope = json.dumps(payload_envelope(user_name, days, resolution, end_time))
+    head, tail = envelope.split('"client_proximity": []')
+    f.write(head + '"client_proximity": [')
+    data_sets = iter_client_proximity(days, resolution, contacts, devices, contacts_per_slice, end_time,
+                                      random.Random(seed))
+    for index, data_set in enumerate(data_sets):
+        if index:
+            f.write(', ')
+        json.dump(data_set, f)
+    f.write(']' + tail)
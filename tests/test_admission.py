@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+
+import io
+
+import pytest
+
+from admission import AdmissionControl, AdmissionRejected
+from metrics import ADMISSION_REJECTED
+
+
+def rejected(admission_control, content_length, content_encoding=None):
+    """
+    :return: the AdmissionRejected raised when the notification is admitted
+    """
+    with pytest.raises(AdmissionRejected) as error:
+        with admission_control.admit(content_length, content_encoding):
+            pass
+    return error.value
+
+
+def test_body_size():
+    admission_control = AdmissionControl(max_body_size=1000)
+    error = rejected(admission_control, 1001)
+    assert (error.reason, error.status) == ('body_size', 413)
+    assert error.response()[2] == {}
+    with admission_control.admit(1000) as streaming:
+        assert not streaming
+
+
+def test_content_encoding():
+    error = rejected(AdmissionControl(), 100, 'br')
+    assert (error.reason, error.status) == ('content_encoding', 415)
+
+
+def test_in_flight():
+    admission_control = AdmissionControl(max_in_flight=2, retry_after=7)
+    rejected_count = ADMISSION_REJECTED.values.get('in_flight', 0)
+    with admission_control.admit(100), admission_control.admit(100):
+        error = rejected(admission_control, 100)
+        assert (error.reason, error.status) == ('in_flight', 503)
+        assert error.response()[2] == {'Retry-After': '7'}
+    assert ADMISSION_REJECTED.values['in_flight'] == rejected_count + 1
+    # admitted again when the notifications received are completed
+    with admission_control.admit(100):
+        assert admission_control.in_flight == 1
+    assert (admission_control.in_flight, admission_control.receiving_bytes) == (0, 0)
+
+
+def test_queued_bytes():
+    queued_bytes = [600]
+    admission_control = AdmissionControl(max_queued_bytes=1000, queued_bytes=lambda: queued_bytes[0])
+    with admission_control.admit(300):
+        # the notifications waiting for the reports and the notifications being received
+        assert rejected(admission_control, 101).reason == 'queued_bytes'
+        with admission_control.admit(100):
+            pass
+        queued_bytes[0] = 0
+        with admission_control.admit(700):
+            pass
+    assert admission_control.receiving_bytes == 0
+
+
+def test_streaming():
+    admission_control = AdmissionControl(streaming_size=1000)
+    with admission_control.admit(1000) as streaming:
+        assert not streaming
+    with admission_control.admit(1001) as streaming:
+        assert streaming
+    # the size is not known before the body is read
+    with admission_control.admit(None) as streaming:
+        assert streaming
+
+
+def test_body_chunks():
+    admission_control = AdmissionControl(max_body_size=1000)
+    assert b''.join(admission_control.body_chunks(io.BytesIO(b'x' * 1000), chunk_size=300)) == b'x' * 1000
+    # a notification without Content-Length is limited while read
+    chunks = admission_control.body_chunks(io.BytesIO(b'x' * 1001), chunk_size=300)
+    with pytest.raises(AdmissionRejected) as error:
+        for _ in chunks:
+            pass
+    assert (error.value.reason, error.value.status) == ('body_size', 413)
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+
+import copy
+import json
+import os
+
+from backfill import backfill
+from proximity_reports import create_reports
+from report_format import load_report
+from synthetic_payload import make_payload
+from user_reports import UserReports
+
+
+DAY = 24 * 60 * 60 * 1000
+
+
+def report_rows(folder):
+    """
+    :return: dict of report file name: the sorted report rows
+    """
+    return {filename: sorted(map(str, load_report(os.path.join(folder, filename)).rows()))
+            for filename in sorted(os.listdir(folder)) if filename.endswith('.prx')}
+
+
+def notifications():
+    two_devices = make_payload(user_name='alice', days=1, contacts=10, devices=2)
+    one_device = copy.deepcopy(two_devices)
+    one_device['details']['client_proximity'] = one_device['details']['client_proximity'][:1]
+    return [one_device, two_devices, make_payload(user_name='bob', days=1, contacts=10, seed=1)]
+
+
+def test_backfill_rebuilds_user_reports():
+    payloads = notifications()
+    with open('client_proximity_data.log', 'w') as f:
+        for payload in payloads:
+            f.write(json.dumps(payload) + '\n')
+    # the reports expected, created by the webhook receiver from the same notifications
+    expected = UserReports('expected')
+    for payload in payloads:
+        create_reports(copy.deepcopy(payload), user_reports=expected)
+
+    # the previous user reports have a notification not in the log, and a report folder removed
+    user_reports = UserReports('user_reports')
+    stale = copy.deepcopy(payloads[1])
+    stale['details']['start_time'] -= DAY
+    for data_set in stale['details']['client_proximity']:
+        for time_slice in data_set['client_info']:
+            time_slice['start_time'] -= DAY
+            time_slice['end_time'] -= DAY
+    for payload in [stale] + payloads:
+        create_reports(copy.deepcopy(payload), user_reports=user_reports)
+    for filename in os.listdir('user_reports/bob'):
+        os.remove(os.path.join('user_reports/bob', filename))
+
+    summary = backfill(['client_proximity_data.log'], 'backfill', 2, chunk_size=1024)
+    assert summary['chunks'] > 1
+    assert summary['records'] == 3
+    assert summary['failed'] == 0
+    for user_name in ('alice', 'bob'):
+        assert report_rows(os.path.join('user_reports', user_name)) == report_rows(os.path.join('expected', user_name))
+
+    # a completed backfill run again does not change the user reports
+    backfill(['client_proximity_data.log'], 'backfill', 2, chunk_size=1024)
+    for user_name in ('alice', 'bob'):
+        assert report_rows(os.path.join('user_reports', user_name)) == report_rows(os.path.join('expected', user_name))
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+
+import threading
+import time
+
+from bulk_proximity import BulkProximityRequests
+from dnac_client import RateLimitError
+
+RATE_LIMITED = {'bapiExtendedStatusDescription': 'Too many client proximity requests running'}
+
+
+class ProximityClient:
+    """
+    DNACClient returning the responses of each username in order, then an execution URL. A response is returned, or
+    raised if an exception. Each request takes {duration} seconds.
+    """
+
+    def __init__(self, responses, duration=0.05):
+        self.responses = {username: list(username_responses) for username, username_responses in responses.items()}
+        self.duration = duration
+        self.requests = []  # username, start and end time of each request
+        self.lock = threading.Lock()
+
+    def client_proximity(self, client_username, days, resolution):
+        start = time.monotonic()
+        time.sleep(self.duration)
+        with self.lock:
+            self.requests.append((client_username, start, time.monotonic()))
+            responses = self.responses.get(client_username)
+            response = responses.pop(0) if responses else {'executionStatusUrl': '/execution/' + client_username}
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def bulk_requests(client, **kwargs):
+    kwargs.setdefault('retry_delay', 0.4)
+    return BulkProximityRequests(client, 14, 15, **kwargs)
+
+
+def test_shared_backoff():
+    client = ProximityClient({'alice': [RateLimitError('Rate limited, HTTP 429')]})
+    usernames = ['alice', 'bob', 'carol', 'dave', 'erin']
+    results, summary = bulk_requests(client, concurrency=2).run(usernames)
+    assert [result['username'] for result in results] == usernames
+    assert [result['status'] for result in results] == ['submitted'] * 5
+    assert results[0]['attempts'] == 2
+    assert (summary['submitted'], summary['requests']) == (5, 6)
+
+    # no request is sent during the backoff, at least half the retry delay after the rejection
+    rejected = client.requests[0]
+    assert rejected[0] == 'alice'
+    for _, start, _ in client.requests:
+        if start > rejected[2]:
+            assert start >= rejected[2] + 0.2
+
+
+def test_rate_limit_rejections():
+    client = ProximityClient({'alice': [RATE_LIMITED, RATE_LIMITED, RATE_LIMITED]})
+    results, _ = bulk_requests(client, concurrency=1, retry_delay=0.01, max_attempts=3).run(['alice', 'bob'])
+    assert (results[0]['status'], results[0]['attempts']) == ('failed', 3)
+    assert results[0]['error'] == RATE_LIMITED['bapiExtendedStatusDescription']
+    assert results[1]['status'] == 'submitted'
+
+
+def test_other_errors_not_retried():
+    client = ProximityClient({'alice': [ConnectionError('connection refused')], 'bob': [{'error': 'unknown user'}]})
+    results, summary = bulk_requests(client, concurrency=2, retry_delay=60).run(['alice', 'bob', 'carol'])
+    assert [(result['status'], result['attempts']) for result in results] == [
+        ('failed', 1), ('failed', 1), ('submitted', 1)]
+    assert 'connection refused' in results[0]['error']
+    # the other requests are not paused
+    assert summary['elapsed'] < 5
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+
+from contact_graph import ContactGraph
+from proximity_model import PayloadDecoder
+
+MINUTE = 60 * 1000
+
+
+def save_slices(contact_graph, wireless_mac_address, time_slices):
+    """
+    Save the contact events of one reported wireless client
+    :param contact_graph: ContactGraph
+    :param wireless_mac_address: MAC address of the reported client
+    :param time_slices: list of (start_time, end_time, list of client_mac), times in minutes
+    :return:
+    """
+    payload_decoder = PayloadDecoder()
+    writer = contact_graph.client_writer()
+    for start_time, end_time, client_macs in time_slices:
+        writer.add_slice(payload_decoder.time_slice({
+            'location': 'Floor 1', 'start_time': start_time * MINUTE, 'end_time': end_time * MINUTE,
+            'users_info': [{'client_mac': client_mac, 'client_user': 'user-' + client_mac[-1], 'client_type': 'phone'}
+                           for client_mac in client_macs]}))
+    writer.save(wireless_mac_address)
+
+
+def test_first_and_second_degree():
+    contact_graph = ContactGraph('contact_graph.db')
+    save_slices(contact_graph, 'AABB.CC00.000A', [(0, 10, ['aa:bb:cc:00:00:0b', 'aa:bb:cc:00:00:0c']),
+                                                  (10, 20, ['aa:bb:cc:00:00:0b'])])
+    save_slices(contact_graph, 'aa:bb:cc:00:00:0b', [(30, 60, ['aa:bb:cc:00:00:0d'])])
+
+    contacts = contact_graph.contacts('aa:bb:cc:00:00:0a')
+    assert [(contact['client_mac'], contact['total_time'], contact['client_user'])
+            for contact in contacts['first_degree']] == [('aa:bb:cc:00:00:0b', 20 * MINUTE, 'user-b'),
+                                                         ('aa:bb:cc:00:00:0c', 10 * MINUTE, 'user-c')]
+    # the reported client and its direct contacts are not second degree contacts
+    assert [(contact['client_mac'], contact['total_time'], contact['via'])
+            for contact in contacts['second_degree']] == [('aa:bb:cc:00:00:0d', 30 * MINUTE, ['aa:bb:cc:00:00:0b'])]
+
+    # the edges are saved in both directions
+    contacts = contact_graph.contacts('aa:bb:cc:00:00:0c', degree=1)
+    assert [contact['client_mac'] for contact in contacts['first_degree']] == ['aa:bb:cc:00:00:0a']
+    assert contacts['second_degree'] == []
+
+
+def test_min_time():
+    contact_graph = ContactGraph('contact_graph.db')
+    save_slices(contact_graph, 'aa:bb:cc:00:00:0a', [(0, 20, ['aa:bb:cc:00:00:0b']), (0, 5, ['aa:bb:cc:00:00:0c'])])
+    save_slices(contact_graph, 'aa:bb:cc:00:00:0c', [(30, 60, ['aa:bb:cc:00:00:0d'])])
+    save_slices(contact_graph, 'aa:bb:cc:00:00:0b', [(30, 35, ['aa:bb:cc:00:00:0e'])])
+
+    contacts = contact_graph.contacts('aa:bb:cc:00:00:0a', min_time=15 * MINUTE)
+    assert [contact['client_mac'] for contact in contacts['first_degree']] == ['aa:bb:cc:00:00:0b']
+    # both edges of a second degree contact are at least {min_time}
+    assert contacts['second_degree'] == []
+
+
+def test_redelivered_events():
+    contact_graph = ContactGraph('contact_graph.db')
+    for _ in range(2):
+        save_slices(contact_graph, 'aa:bb:cc:00:00:0a', [(0, 10, ['aa:bb:cc:00:00:0b'])])
+    save_slices(contact_graph, 'aa:bb:cc:00:00:0a', [(0, 10, ['aa:bb:cc:00:00:0b']), (10, 15, ['aa:bb:cc:00:00:0b'])])
+
+    # the contact events already saved are not added again
+    contact = contact_graph.contacts('aa:bb:cc:00:00:0a')['first_degree'][0]
+    assert (contact['total_time'], contact['first_seen'], contact['last_seen']) == (15 * MINUTE, 0, 15 * MINUTE)
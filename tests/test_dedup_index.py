@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+
+from dedup_index import DedupIndex
+
+
+def test_claim_and_duplicate():
+    dedup_index = DedupIndex('dedup.db')
+    assert dedup_index.claim('hash1', 'job1') is None
+    assert dedup_index.claim('hash1', 'job2') == 'job1'
+    assert dedup_index.claim('hash2', 'job2') is None
+    assert dedup_index.stats()['duplicate_content'] == 1
+    # saved, found by the other receiver processes and after a restart
+    assert DedupIndex('dedup.db').claim('hash1', 'job3') == 'job1'
+
+
+def test_release():
+    dedup_index = DedupIndex('dedup.db')
+    assert dedup_index.claim('hash1', 'job1') is None
+    dedup_index.release('hash1')
+    # the notification is processed again if redelivered
+    assert dedup_index.claim('hash1', 'job2') is None
+    assert dedup_index.claim('hash1', 'job3') == 'job2'
+    assert dedup_index.stats()['entries'] == 1
+
+
+def test_claim_details():
+    dedup_index = DedupIndex('dedup.db')
+    assert dedup_index.claim('hash1', 'job1') is None
+    assert dedup_index.claim_details('hash1', 'alice', 1000, 2000) is None
+    # redelivered with another timestamp, the same client and time interval
+    assert dedup_index.claim('hash2', 'job2') is None
+    assert dedup_index.claim_details('hash2', 'alice', 1000, 2000) == 'job1'
+    assert dedup_index.claim('hash2', 'job3') == 'job1'
+    assert dedup_index.claim('hash3', 'job4') is None
+    assert dedup_index.claim_details('hash3', 'alice', 1000, 3000) is None
+    assert dedup_index.stats()['duplicate_details'] == 1
+
+
+def test_bounded():
+    dedup_index = DedupIndex('dedup.db', max_entries=2)
+    for index in range(5):
+        assert dedup_index.claim('hash%d' % index, 'job%d' % index) is None
+    assert dedup_index.stats()['entries'] == 2
+    # the oldest notifications are removed
+    assert dedup_index.claim('hash0', 'job5') is None
+    assert dedup_index.claim('hash4', 'job6') == 'job4'
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+
+import os
+import stat
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from dnac_client import DNACClient, RateLimitError
+from dnac_simulator import create_token
+
+DNAC_URL = 'https://dnac.example.com'
+
+
+class Response:
+    def __init__(self, status_code, json_data=None, headers=None):
+        self.status_code = status_code
+        self.json_data = json_data
+        self.headers = headers or {}
+
+    def json(self):
+        return self.json_data
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise AssertionError('HTTP ' + str(self.status_code))
+
+
+class Session:
+    """
+    requests Session returning a new token for each token request, and the responses {statuses} for the API calls,
+    200 when all used
+    """
+
+    def __init__(self, statuses=(), lifetime=3600):
+        self.statuses = list(statuses)
+        self.lifetime = lifetime
+        self.tokens = []
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def post(self, url, auth=None, timeout=None):
+        assert url == DNAC_URL + '/dna/system/api/v1/auth/token'
+        with self.lock:
+            self.tokens.append(create_token(self.lifetime))
+            return Response(200, {'Token': self.tokens[-1]})
+
+    def request(self, method, url, headers=None, **kwargs):
+        with self.lock:
+            self.calls.append((method, url, headers['x-auth-token']))
+            status_code = self.statuses.pop(0) if self.statuses else 200
+        return Response(status_code, {'response': []}, {'Retry-After': '5'})
+
+
+def create_client(session, username='username', **kwargs):
+    client = DNACClient(DNAC_URL, username, 'password', **kwargs)
+    client.session = session
+    return client
+
+
+def test_token_reused():
+    session = Session()
+    client = create_client(session)
+    for _ in range(3):
+        assert client.get('/dna/intent/api/v1/event/subscription') == {'response': []}
+    assert len(session.tokens) == 1
+    assert [token for _, _, token in session.calls] == session.tokens * 3
+
+
+def test_token_refreshed():
+    session = Session(statuses=[401])
+    client = create_client(session)
+    assert client.get('/dna/intent/api/v1/event/subscription') == {'response': []}
+    # the call rejected with 401 is sent again with a new token
+    assert len(session.tokens) == 2
+    assert [token for _, _, token in session.calls] == session.tokens
+
+
+def test_token_expired():
+    # the tokens expire before the refresh margin, a new token is requested for each call
+    session = Session(lifetime=30)
+    client = create_client(session)
+    client.get('/dna/intent/api/v1/event/subscription')
+    client.get('/dna/intent/api/v1/event/subscription')
+    assert len(session.tokens) == 2
+
+
+def test_token_cache_file():
+    session = Session()
+    create_client(session, token_cache='dnac_token.json').get_token()
+    assert stat.S_IMODE(os.stat('dnac_token.json').st_mode) == 0o600
+
+    # the next runs reuse the token, for the same Cisco DNA Center and username
+    assert create_client(Session(), token_cache='dnac_token.json').get_token() == session.tokens[0]
+    other_client = create_client(Session(), username='other_username', token_cache='dnac_token.json')
+    assert other_client.get_token() != session.tokens[0]
+
+
+def test_session_shared_by_threads():
+    session = Session()
+    client = create_client(session)
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(lambda _: client.get('/dna/intent/api/v1/event/subscription'), range(40)))
+    assert len(session.calls) == 40
+    assert len(session.tokens) == 1
+
+
+def test_rate_limited():
+    client = create_client(Session(statuses=[429]))
+    with pytest.raises(RateLimitError, match='Retry-After: 5'):
+        client.client_proximity('alice', 14, 15)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+
+import json
+import time
+
+from execution_tracker import ExecutionTracker
+
+
+class StatusClient:
+    """
+    DNACClient returning the execution status of each execution URL
+    """
+
+    def __init__(self, statuses):
+        self.statuses = statuses
+        self.polls = {}
+
+    def get_execution_status(self, execution_url):
+        self.polls[execution_url] = self.polls.get(execution_url, 0) + 1
+        return {'status': self.statuses[execution_url]}
+
+
+def tracker(client, **kwargs):
+    return ExecutionTracker(client, 'executions.json', poll_interval=0.01, max_poll_interval=0.02, **kwargs)
+
+
+def saved_executions():
+    with open('executions.json') as f:
+        return json.load(f)
+
+
+def test_completed_removed():
+    client = StatusClient({'/e/1': 'SUCCESS', '/e/2': 'IN_PROGRESS'})
+    execution_tracker = tracker(client, timeout=0.1)
+    execution_tracker.add('/e/1', 'alice')
+    execution_tracker.add('/e/2', 'bob')
+    results = {result['execution_url']: result for result in execution_tracker.run()}
+    assert results['/e/1']['status'] == 'SUCCESS'
+    assert results['/e/1']['latency'] is not None
+    assert results['/e/2']['status'] == 'TIMEOUT'
+    # tracked again at the next run
+    assert list(saved_executions()) == ['/e/2']
+
+
+def test_resumed_execution_polled_for_another_timeout():
+    client = StatusClient({'/e/1': 'IN_PROGRESS'})
+    tracker(client).add('/e/1', 'alice', submitted=time.time() - 60 * 60)
+    result, = tracker(client, timeout=0.2).run()
+    assert result['status'] == 'TIMEOUT'
+    assert result['polls'] > 1
+    assert list(saved_executions()) == ['/e/1']
+
+
+def test_expired_removed():
+    client = StatusClient({'/e/1': 'IN_PROGRESS', '/e/2': 'IN_PROGRESS'})
+    execution_tracker = tracker(client, timeout=0.05, max_age=60 * 60)
+    execution_tracker.add('/e/1', 'alice', submitted=time.time() - 2 * 60 * 60)
+    execution_tracker.add('/e/2', 'bob')
+    results = {result['execution_url']: result['status'] for result in execution_tracker.run()}
+    assert results == {'/e/1': 'EXPIRED', '/e/2': 'TIMEOUT'}
+    assert list(saved_executions()) == ['/e/2']
+    assert list(tracker(client).executions) == ['/e/2']
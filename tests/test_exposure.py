@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+
+from contact_graph import ContactGraph
+from exposure import ExposureRanking
+from metrics import EXPOSURE_CACHE
+from proximity_model import PayloadDecoder
+
+MINUTE = 60 * 1000
+HOUR = 60 * MINUTE
+
+
+def save_slices(contact_graph, wireless_mac_address, time_slices):
+    """
+    Save the contact events of one reported wireless client
+    :param contact_graph: ContactGraph
+    :param wireless_mac_address: MAC address of the reported client
+    :param time_slices: list of (start_time, end_time, list of client_mac), times in minutes
+    :return:
+    """
+    payload_decoder = PayloadDecoder()
+    writer = contact_graph.client_writer()
+    for start_time, end_time, client_macs in time_slices:
+        writer.add_slice(payload_decoder.time_slice({
+            'location': 'Floor 1', 'start_time': start_time * MINUTE, 'end_time': end_time * MINUTE,
+            'users_info': [{'client_mac': client_mac, 'client_user': 'user-' + client_mac[-1], 'client_type': 'phone'}
+                           for client_mac in client_macs]}))
+    writer.save(wireless_mac_address)
+
+
+def ranking(result):
+    return [(client['client_mac'], client['total_time']) for client in result['clients']]
+
+
+def test_top():
+    contact_graph = ContactGraph('contact_graph.db')
+    save_slices(contact_graph, 'aa:bb:cc:00:00:01', [(0, 30, ['aa:bb:cc:00:00:0b', 'aa:bb:cc:00:00:0c']),
+                                                     (50, 70, ['aa:bb:cc:00:00:0c'])])
+    save_slices(contact_graph, 'aa:bb:cc:00:00:02', [(10, 20, ['aa:bb:cc:00:00:0b', 'aa:bb:cc:00:00:0d']),
+                                                     (130, 190, ['aa:bb:cc:00:00:0d'])])
+    exposure_ranking = ExposureRanking(contact_graph)
+
+    # the contact events are counted in the hour they start in, the window is extended to whole hours
+    result = exposure_ranking.top(30 * MINUTE, 90 * MINUTE)
+    assert (result['start_time'], result['end_time']) == (0, 2 * HOUR)
+    assert ranking(result) == [('aa:bb:cc:00:00:0c', 50 * MINUTE), ('aa:bb:cc:00:00:0b', 40 * MINUTE),
+                               ('aa:bb:cc:00:00:0d', 10 * MINUTE)]
+    assert result['clients'][0]['client_user'] == 'user-c'
+    assert ranking(exposure_ranking.top(2 * HOUR, 3 * HOUR)) == [('aa:bb:cc:00:00:0d', 60 * MINUTE)]
+    # the top {limit} clients of the window
+    assert ranking(exposure_ranking.top(0, 4 * HOUR, limit=2)) == [('aa:bb:cc:00:00:0d', 70 * MINUTE),
+                                                                   ('aa:bb:cc:00:00:0c', 50 * MINUTE)]
+
+
+def test_cache_invalidated():
+    contact_graph = ContactGraph('contact_graph.db')
+    save_slices(contact_graph, 'aa:bb:cc:00:00:01', [(0, 30, ['aa:bb:cc:00:00:0b'])])
+    exposure_ranking = ExposureRanking(contact_graph)
+    hits = EXPOSURE_CACHE.values.get('hit', 0)
+    misses = EXPOSURE_CACHE.values.get('miss', 0)
+
+    result = exposure_ranking.top(0, HOUR)
+    assert exposure_ranking.top(0, HOUR) is result
+    assert (EXPOSURE_CACHE.values['hit'] - hits, EXPOSURE_CACHE.values['miss'] - misses) == (1, 1)
+
+    # new contact events saved by another connection, example another receiver process, change the data version
+    save_slices(ContactGraph('contact_graph.db'), 'aa:bb:cc:00:00:02', [(0, 20, ['aa:bb:cc:00:00:0c'])])
+    assert ranking(exposure_ranking.top(0, HOUR)) == [('aa:bb:cc:00:00:0b', 30 * MINUTE),
+                                                      ('aa:bb:cc:00:00:0c', 20 * MINUTE)]
+    assert (EXPOSURE_CACHE.values['hit'] - hits, EXPOSURE_CACHE.values['miss'] - misses) == (1, 2)
+
+    # the contact events already saved are not counted again
+    save_slices(contact_graph, 'aa:bb:cc:00:00:02', [(0, 20, ['aa:bb:cc:00:00:0c'])])
+    assert ranking(exposure_ranking.top(0, HOUR)) == [('aa:bb:cc:00:00:0b', 30 * MINUTE),
+                                                      ('aa:bb:cc:00:00:0c', 20 * MINUTE)]
+
+
+def test_cache_size():
+    contact_graph = ContactGraph('contact_graph.db')
+    save_slices(contact_graph, 'aa:bb:cc:00:00:01', [(0, 30, ['aa:bb:cc:00:00:0b'])])
+    exposure_ranking = ExposureRanking(contact_graph, cache_size=2)
+    for limit in [1, 2, 3, 1]:
+        exposure_ranking.top(0, HOUR, limit=limit)
+    # the least recently used result is removed
+    assert list(exposure_ranking.cache) == [(0, HOUR, 3), (0, HOUR, 1)]
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+
+import threading
+import time
+
+from fleet import print_fleet_summary, run_fleet
+
+
+def cluster(name):
+    return {'name': name, 'url': 'https://' + name + '.example.com', 'username': 'username', 'password': 'password'}
+
+
+def test_failed_and_timeout_clusters():
+    release = threading.Event()
+
+    def function(fleet_cluster, dnac_client):
+        assert dnac_client.dnac_url == fleet_cluster['url']
+        assert dnac_client.token_cache == 'dnac_token_' + fleet_cluster['name'] + '.json'
+        if fleet_cluster['name'] == 'failed':
+            raise ValueError('No subscription found')
+        if fleet_cluster['name'] == 'timeout':
+            release.wait(10)
+        return {'submitted': len(fleet_cluster['name'])}
+
+    start = time.monotonic()
+    try:
+        results = run_fleet(function, [cluster('ok'), cluster('failed'), cluster('timeout')], timeout=0.3)
+    finally:
+        release.set()
+    # the clusters run at the same time, the timed out cluster does not stop the others
+    assert time.monotonic() - start < 2
+    assert [(result['cluster'], result['status']) for result in results] == [
+        ('ok', 'ok'), ('failed', 'failed'), ('timeout', 'timeout')]
+    assert results[0]['result'] == {'submitted': 2}
+    assert 'No subscription found' in results[1]['error']
+    assert results[2]['time'] >= 0.3
+
+
+def test_concurrency():
+    running = []
+    max_running = []
+    lock = threading.Lock()
+
+    def function(fleet_cluster, dnac_client):
+        with lock:
+            running.append(fleet_cluster['name'])
+            max_running.append(len(running))
+        time.sleep(0.1)
+        with lock:
+            running.remove(fleet_cluster['name'])
+        return {}
+
+    results = run_fleet(function, [cluster('cluster%d' % index) for index in range(5)], timeout=5, concurrency=2)
+    assert [result['status'] for result in results] == ['ok'] * 5
+    assert max(max_running) == 2
+
+
+def test_print_fleet_summary(capsys):
+    results = [
+        {'cluster': 'east', 'status': 'ok', 'time': 1.25, 'result': {'submitted': 3, 'max_latency': 20.5}},
+        {'cluster': 'west', 'status': 'ok', 'time': 2.0, 'result': {'submitted': 2, 'max_latency': 40.0}},
+        {'cluster': 'south', 'status': 'timeout', 'time': 60.0, 'error': 'Not completed in 60 seconds'},
+    ]
+    print_fleet_summary(results, [('Submitted', 'submitted', sum), ('Max latency', 'max_latency', max)])
+    output = capsys.readouterr().out
+    assert 'Error: Not completed in 60 seconds' in output
+    assert 'Clusters: 3, ok: 2, failed: 0, timeout: 1, submitted: 5, max latency: 40.0' in output
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+
+import gzip
+import io
+import zlib
+
+import pytest
+
+from flask import Flask, jsonify
+from werkzeug.datastructures import Accept
+from werkzeug.http import parse_accept_header
+
+from admission import AdmissionControl, AdmissionRejected
+from http_compression import compress_response, content_encoding, decompress_chunks, gzip_chunks
+
+BODY = b'{"client_mac": "aa:bb:cc:00:11:22", "location": "Global/San Jose/Building 24/Floor 1"}\n' * 2000
+
+
+def split(data, size):
+    return [data[index:index + size] for index in range(0, len(data), size)]
+
+
+def raw_deflate(data):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+@pytest.mark.parametrize('encoding, compressed', [
+    ('gzip', gzip.compress(BODY)),
+    ('gzip', gzip.compress(BODY[:1000]) + gzip.compress(BODY[1000:])),  # several members
+    ('deflate', zlib.compress(BODY)),  # zlib format
+    ('deflate', raw_deflate(BODY)),  # raw deflate, without the zlib header
+])
+def test_decompress_chunks(encoding, compressed):
+    for size in [1, 7, 4096, len(compressed)]:
+        chunks = list(decompress_chunks(split(compressed, size), encoding, chunk_size=1000))
+        assert b''.join(chunks) == BODY
+        assert max(map(len, chunks)) <= 1000
+
+
+@pytest.mark.parametrize('encoding, compressed', [
+    ('gzip', gzip.compress(BODY)[:-10]),  # truncated
+    ('gzip', b'not gzip data'),
+    ('deflate', zlib.compress(BODY)[:1]),
+    ('deflate', zlib.compress(BODY) + b'x'),  # data after the end of the stream
+])
+def test_invalid_body(encoding, compressed):
+    with pytest.raises(zlib.error):
+        list(decompress_chunks(split(compressed, 100), encoding))
+
+
+def test_decompressed_size_limit():
+    admission_control = AdmissionControl(max_body_size=len(BODY) - 1)
+    # a small compressed body, too large when decompressed, is rejected while read
+    compressed = gzip.compress(BODY)
+    chunks = admission_control.body_chunks(io.BytesIO(compressed), 'gzip', chunk_size=1000)
+    with pytest.raises(AdmissionRejected) as error:
+        for _ in chunks:
+            pass
+    assert (error.value.reason, error.value.status) == ('body_size', 413)
+
+    with pytest.raises(AdmissionRejected) as error:
+        list(AdmissionControl().body_chunks(io.BytesIO(b'not gzip data'), 'gzip'))
+    assert (error.value.reason, error.value.status) == ('content_encoding', 400)
+
+
+def test_content_encoding():
+    assert content_encoding(None) is None
+    assert content_encoding(' identity ') is None
+    assert content_encoding('GZIP') == 'gzip'
+
+
+def test_gzip_chunks():
+    assert gzip.decompress(b''.join(gzip_chunks(split(BODY, 1000)))) == BODY
+    assert gzip.decompress(b''.join(gzip_chunks([]))) == b''
+
+
+def test_compress_response():
+    app = Flask(__name__)
+    gzip_accepted = parse_accept_header('gzip, deflate', Accept)
+    with app.app_context():
+        response = compress_response(jsonify(clients=['aa:bb:cc:00:11:22'] * 200), gzip_accepted)
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(response.get_data()) == jsonify(clients=['aa:bb:cc:00:11:22'] * 200).get_data()
+        assert 'Accept-Encoding' in response.vary
+
+        # not accepted by the client, or too small
+        response = compress_response(jsonify(clients=['aa:bb:cc:00:11:22'] * 200), Accept())
+        assert 'Content-Encoding' not in response.headers
+        response = compress_response(jsonify(clients=[]), gzip_accepted)
+        assert 'Content-Encoding' not in response.headers
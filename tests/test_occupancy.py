@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+
+from occupancy import OccupancyTimeline
+from proximity_model import PayloadDecoder
+
+MINUTE = 60 * 1000
+
+
+def save_slices(occupancy_timeline, wireless_mac_address, time_slices):
+    """
+    Save the presence of one reported wireless client and of the clients in proximity
+    :param occupancy_timeline: OccupancyTimeline
+    :param wireless_mac_address: MAC address of the reported client
+    :param time_slices: list of (location, start_time, end_time, list of client_mac), times in minutes
+    :return:
+    """
+    payload_decoder = PayloadDecoder()
+    writer = occupancy_timeline.client_writer()
+    for location, start_time, end_time, client_macs in time_slices:
+        writer.add_slice(payload_decoder.time_slice({
+            'location': location, 'start_time': start_time * MINUTE, 'end_time': end_time * MINUTE,
+            'users_info': [{'client_mac': client_mac} for client_mac in client_macs]}))
+    writer.save(wireless_mac_address)
+
+
+def test_buckets():
+    occupancy_timeline = OccupancyTimeline('occupancy.db', resolution=5)
+    assert list(occupancy_timeline.buckets(7 * MINUTE, 16 * MINUTE)) == [5 * MINUTE, 10 * MINUTE, 15 * MINUTE]
+    assert list(occupancy_timeline.buckets(10 * MINUTE, 15 * MINUTE)) == [10 * MINUTE]
+    # an instant is in one bucket
+    assert list(occupancy_timeline.buckets(12 * MINUTE, 12 * MINUTE)) == [10 * MINUTE]
+
+
+def test_clients():
+    occupancy_timeline = OccupancyTimeline('occupancy.db', resolution=5)
+    save_slices(occupancy_timeline, 'AABB.CC00.000A', [('Floor 1', 0, 6, ['aa:bb:cc:00:00:0b']),
+                                                       ('Floor 1', 6, 12, ['aa:bb:cc:00:00:0c']),
+                                                       ('Floor 2', 12, 20, ['aa:bb:cc:00:00:0b'])])
+
+    clients = occupancy_timeline.clients('Floor 1', 0, 60 * MINUTE)
+    assert sorted((client['client_mac'], client['time']) for client in clients) == [
+        ('aa:bb:cc:00:00:0a', 15 * MINUTE), ('aa:bb:cc:00:00:0b', 10 * MINUTE), ('aa:bb:cc:00:00:0c', 10 * MINUTE)]
+    assert clients[0]['client_mac'] == 'aa:bb:cc:00:00:0a'
+    # the start time is extended to the start of its bucket
+    clients = occupancy_timeline.clients('Floor 2', 17 * MINUTE, 18 * MINUTE)
+    assert sorted(client['client_mac'] for client in clients) == ['aa:bb:cc:00:00:0a', 'aa:bb:cc:00:00:0b']
+    assert occupancy_timeline.clients('Floor 2', 20 * MINUTE, 60 * MINUTE) == []
+
+
+def test_peak_occupancy():
+    occupancy_timeline = OccupancyTimeline('occupancy.db', resolution=5)
+    save_slices(occupancy_timeline, 'aa:bb:cc:00:00:0a', [('Floor 1', 0, 5, ['aa:bb:cc:00:00:0b']),
+                                                          ('Floor 1', 5, 10, ['aa:bb:cc:00:00:0b',
+                                                                              'aa:bb:cc:00:00:0c'])])
+    # the same clients saved again by another notification are counted once
+    save_slices(occupancy_timeline, 'aa:bb:cc:00:00:0b', [('Floor 1', 5, 10, ['aa:bb:cc:00:00:0a']),
+                                                          ('Floor 1', 60, 65, [])])
+    save_slices(occupancy_timeline, 'aa:bb:cc:00:00:0d', [('Floor 2', 30, 35, [])])
+
+    assert occupancy_timeline.peak_occupancy(0, 120 * MINUTE) == [
+        {'location': 'Floor 1', 'hour': 0, 'peak_occupancy': 3},
+        {'location': 'Floor 1', 'hour': 60 * MINUTE, 'peak_occupancy': 1},
+        {'location': 'Floor 2', 'hour': 0, 'peak_occupancy': 1}]
+    assert occupancy_timeline.peak_occupancy(60 * MINUTE, 120 * MINUTE, location='Floor 1') == [
+        {'location': 'Floor 1', 'hour': 60 * MINUTE, 'peak_occupancy': 1}]
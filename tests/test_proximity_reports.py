@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+
+import pytest
+
+from benchmark_total_time import legacy_total_time
+from proximity_model import PayloadDecoder, TimeSlice
+from proximity_reports import DwellTimeAggregator, TotalTimeAggregator, create_reports_from_events
+from synthetic_payload import make_payload
+
+
+def legacy_dwell_time(client_info):
+    """
+    The dwell time report, as implemented in {proximity_webhook} before the single pass aggregation, the times not
+    converted to local time
+    """
+    employee_dwell_time = []
+    last_start_timestamp = client_info[0]['start_time']
+    last_end_timestamp = client_info[0]['start_time']
+    last_location = client_info[0]['location']
+    for time_slice in client_info:
+        if last_location == time_slice['location'] and last_end_timestamp == time_slice['start_time']:
+            last_end_timestamp = time_slice['end_time']
+            continue
+        employee_dwell_time.append({
+            'location': last_location, 'start_time': last_start_timestamp, 'end_time': last_end_timestamp
+        })
+        last_start_timestamp = time_slice['start_time']
+        last_end_timestamp = time_slice['end_time']
+        last_location = time_slice['location']
+    employee_dwell_time.append({
+        'location': last_location, 'start_time': last_start_timestamp, 'end_time': last_end_timestamp
+    })
+    return employee_dwell_time
+
+
+def aggregated(aggregator, client_info):
+    payload_decoder = PayloadDecoder()
+    for time_slice in client_info:
+        aggregator.add_slice(payload_decoder.time_slice(time_slice))
+    return aggregator.report()
+
+
+def client_info_with_gaps():
+    client_info = make_payload(days=2, contacts=100, seed=3)['details']['client_proximity'][0]['client_info']
+    # missing time slices, the dwell time is split at each gap
+    return [time_slice for index, time_slice in enumerate(client_info) if index % 17 not in (5, 6)]
+
+
+def sorted_rows(report):
+    # the sort order of the clients with the same total time is not defined by the legacy report
+    return sorted(sorted(row.items()) for row in report)
+
+
+def test_total_time_same_as_legacy():
+    client_info = client_info_with_gaps()
+    report = aggregated(TotalTimeAggregator(), client_info)
+    legacy_report = legacy_total_time(client_info)
+    assert sorted_rows(report) == sorted_rows(legacy_report)
+    assert [row['total_time'] for row in report] == [row['total_time'] for row in legacy_report]
+
+
+def test_total_time_last_client_details():
+    client_info = [
+        {'location': 'a', 'start_time': '0', 'end_time': '300000', 'users_info': [
+            {'client_mac': 'aa:bb:cc:00:11:22', 'client_user': 'alice', 'client_type': 'Apple-iPhone'}]},
+        {'location': 'a', 'start_time': '300000', 'end_time': '600000', 'users_info': [
+            {'client_mac': 'aa:bb:cc:00:11:22'}]},
+        {'location': 'a', 'start_time': '600000', 'end_time': '660000', 'users_info': [
+            {'client_mac': 'aa:bb:cc:00:11:22', 'client_user': 'alice2', 'client_type': 'Apple-iPad'}]}
+    ]
+    assert aggregated(TotalTimeAggregator(), client_info) == legacy_total_time(client_info) == [
+        {'client_mac': 'aa:bb:cc:00:11:22', 'client_user': 'alice2', 'client_type': 'Apple-iPad',
+         'total_time': 660000}]
+
+
+def test_dwell_time_same_as_legacy():
+    client_info = client_info_with_gaps()
+    report = aggregated(DwellTimeAggregator(), client_info)
+    assert report == legacy_dwell_time(client_info)
+    assert len(report) > len(set(time_slice['location'] for time_slice in client_info))
+
+
+def test_empty_reports():
+    assert TotalTimeAggregator().report() == []
+    assert DwellTimeAggregator().report() == []
+
+
+@pytest.mark.parametrize('events', [
+    [('details', 'user_name', 'alice'), ('slice', None, TimeSlice('a', 0, 300000, ()))],
+    [('details', 'user_name', 'alice'), ('client', 'mac_address', 'aa:bb:cc:00:11:22')],
+    [('details', 'user_name', 'alice'), ('client_end', None, None)],
+    [('details', 'user_name', 'alice'), ('client_start', None, None), ('client', 'mac_address', 'aa:bb:cc:00:11:22'),
+     ('client_end', None, None), ('slice', None, TimeSlice('a', 0, 300000, ()))]
+])
+def test_events_outside_of_a_data_set(events):
+    with pytest.raises(ValueError):
+        create_reports_from_events(iter(events))
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+
+import json
+
+import proximity_store
+
+from proximity_store import ProximityStore
+
+
+def save_payload(path, payload):
+    with open(path, 'w') as f:
+        json.dump(payload, f, indent=1)  # with new lines, saved to the store as one line
+    return path
+
+
+def append_payloads(store, count, size=100):
+    lines = []
+    for index in range(count):
+        payload = {'details': {'user_name': 'user%d' % (index % 2), 'data': 'x' * size}}
+        report_info = {'user_name': payload['details']['user_name'], 'start_time': index * 1000,
+                       'end_time': index * 1000 + 500, 'mac_addresses': ['AA:BB:CC:00:00:%02X' % index]}
+        store.append(save_payload('payload.json', payload), report_info)
+        lines.append(json.dumps(payload).encode('utf-8'))
+    return lines
+
+
+def joined(store, records, start=0, end=None):
+    return b''.join(store.iter_records(records, start, end))
+
+
+def test_append_and_iterate():
+    store = ProximityStore('store')
+    lines = append_payloads(store, 5)
+    records = store.find()
+    assert len(records) == 5
+    data = joined(store, records)
+    assert [json.loads(line) for line in data.splitlines()] == [json.loads(line) for line in lines]
+    assert data.count(b'\n') == 5
+
+
+def test_find():
+    store = ProximityStore('store')
+    append_payloads(store, 6)
+    assert len(store.find(user_name='user1')) == 3
+    # any MAC address format
+    assert len(store.find(mac_address='aabb.cc00.0004')) == 1
+    assert len(store.find(user_name='user1', mac_address='aa:bb:cc:00:00:04')) == 0
+    assert len(store.find(start_time=2000, end_time=3000)) == 2
+
+
+def test_byte_ranges():
+    store = ProximityStore('store')
+    append_payloads(store, 5)
+    records = store.find()
+    data = joined(store, records)
+    for start, end in [(0, 1), (10, 250), (len(data) - 3, None), (120, len(data)), (len(data), None)]:
+        assert joined(store, records, start, end) == data[start:end]
+
+
+def test_segments_and_chunks(monkeypatch):
+    monkeypatch.setattr(proximity_store, 'CHUNK_SIZE', 64)
+    store = ProximityStore('store', segment_size=1000)
+    append_payloads(store, 12, size=300)
+    records = store.find()
+    assert len({segment for segment, _, _ in records}) > 1
+    data = joined(store, records)
+    assert len(data.splitlines()) == 12
+    assert all(len(chunk) <= 64 for chunk in store.iter_records(records))
+    assert joined(store, records, 500, 2500) == data[500:2500]
+    # the segments are continued, or compressed, by the next store opened
+    store = ProximityStore('store', segment_size=1000)
+    assert joined(store, store.find()) == data
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+
+import io
+import json
+
+from proximity_model import PayloadDecoder
+from proximity_stream import iter_payload_events, iter_proximity_events
+from synthetic_payload import make_payload
+
+
+def document_events(webhook_json):
+    """
+    The events of the notification parsed with json.loads, in the order of the notification
+    """
+    for detail_key, value in webhook_json['details'].items():
+        if detail_key != 'client_proximity':
+            yield 'details', detail_key, value
+            continue
+        for data_set in value:
+            yield 'client_start', None, None
+            for client_key, client_value in data_set.items():
+                if client_key == 'client_info':
+                    for time_slice in client_value:
+                        yield 'slice', None, time_slice
+                else:
+                    yield 'client', client_key, client_value
+            yield 'client_end', None, None
+
+
+def comparable(events):
+    """
+    The events with the time slices converted to tuples, the time slices parsed to TimeSlice or dicts
+    """
+    payload_decoder = PayloadDecoder()
+    for event, key, value in events:
+        yield event, key, slice_fields(payload_decoder.time_slice(value)) if event == 'slice' else value
+
+
+def slice_fields(time_slice):
+    return (time_slice.location, time_slice.start_time, time_slice.end_time,
+            [(user.client_mac, user.client_user, user.client_type) for user in time_slice.users_info])
+
+
+def test_stream_events_match_json_loads():
+    payload = make_payload(days=1, contacts=20, devices=2)
+    # escaped and non-ASCII strings, numbers of all the JSON forms, the fields before and after the data sets
+    payload['details']['client_proximity'][0]['client_info'][0]['location'] = 'Global/Zürich/"HQ"\\Floor\t1 \u2603'
+    payload['details']['float'] = -1.5e3
+    payload['details']['flags'] = [True, False, None, {}, []]
+    payload['trailer'] = {'ignored': 1}
+    data = json.dumps(payload).encode('utf-8')
+    expected = list(comparable(document_events(json.loads(data))))
+    for chunk_size in (1, 7, 64 * 1024):
+        assert list(comparable(iter_proximity_events(io.BytesIO(data), chunk_size))) == expected
+
+
+def test_stream_events_match_payload_events():
+    payload = make_payload(days=1, contacts=20, devices=2)
+    data = json.dumps(payload).encode('utf-8')
+    assert list(comparable(iter_proximity_events(io.BytesIO(data)))) == list(
+        comparable(iter_payload_events(json.loads(data))))
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+
+import datetime
+
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from proximity_time import TimeFormatter, TimeZones, format_durations, valid_timezone
+
+# the timezone changes: America/Los_Angeles spring forward and fall back, Europe/Paris, the 30 minutes change of
+# Australia/Lord_Howe, and Asia/Kolkata with a 30 minutes offset and no change
+TIMEZONE_CHANGES = [
+    ('America/Los_Angeles', '2021-03-14T10:00:00+00:00'),
+    ('America/Los_Angeles', '2021-11-07T09:00:00+00:00'),
+    ('Europe/Paris', '2021-10-31T01:00:00+00:00'),
+    ('Australia/Lord_Howe', '2021-04-03T15:00:00+00:00'),
+    ('Asia/Kolkata', '2021-04-03T15:00:00+00:00'),
+]
+
+
+def local_time(timestamp, timezone):
+    return datetime.datetime.fromtimestamp(timestamp / 1000, ZoneInfo(timezone)).strftime('%Y-%m-%d %H:%M:%S')
+
+
+@pytest.mark.parametrize('timezone, change', TIMEZONE_CHANGES)
+def test_timezone_change(timezone, change):
+    change = int(datetime.datetime.fromisoformat(change).timestamp()) * 1000
+    # every 37 seconds, 3 hours before and after the change, and the seconds next to the change
+    timestamps = list(range(change - 3 * 3600 * 1000, change + 3 * 3600 * 1000, 37 * 1000))
+    timestamps += [change - 1000, change - 1, change, change + 999, change + 1000]
+    assert TimeFormatter(timezone).format_timestamps(timestamps) == [
+        local_time(timestamp, timezone) for timestamp in timestamps]
+
+
+def test_formatter_cache():
+    time_formatter = TimeFormatter('America/Los_Angeles')
+    change = int(datetime.datetime.fromisoformat('2021-11-07T09:00:00+00:00').timestamp()) * 1000
+    # the cached offsets and dates are reused in the next calls, in any order
+    for timestamps in [[change + 1000], [change - 1000], [str(change - 3600 * 1000), change + 3600 * 1000]]:
+        assert time_formatter.format_timestamps(timestamps) == [
+            local_time(int(timestamp), 'America/Los_Angeles') for timestamp in timestamps]
+
+
+def test_site_timezones():
+    timezones = TimeZones('America/Los_Angeles', {'Global/Paris': 'Europe/Paris',
+                                                  'Global/Paris/Building 2': 'Asia/Kolkata'})
+    assert timezones.timezone('Global/Paris/Building 1/Floor 1') == 'Europe/Paris'
+    assert timezones.timezone('Global/Paris/Building 2/Floor 1') == 'Asia/Kolkata'
+    assert timezones.timezone('Global/Parisian/Floor 1') == 'America/Los_Angeles'
+    timestamps = [0, 3600 * 1000, 7200 * 1000]
+    locations = ['Global/Paris/Building 1', 'Global/San Jose', 'Global/Paris/Building 2']
+    assert timezones.format_timestamps(timestamps, locations) == [
+        '1970-01-01 01:00:00', '1969-12-31 17:00:00', '1970-01-01 07:30:00']
+    assert timezones.for_request('UTC').format_timestamps(timestamps, locations) == [
+        '1970-01-01 00:00:00', '1970-01-01 01:00:00', '1970-01-01 02:00:00']
+
+
+def test_valid_timezone():
+    assert valid_timezone('Europe/Paris')
+    assert not valid_timezone('Europe/Nowhere')
+    assert not valid_timezone('../etc/passwd')
+
+
+def test_format_durations():
+    assert format_durations([0, 61 * 1000, 90000 * 1000]) == ['0:00:00', '0:01:01', '1 day, 1:00:00']
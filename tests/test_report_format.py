@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+
+import pytest
+
+from report_format import (decode_report, encode_dwell_time_report, encode_total_time_report, format_mac, load_report,
+                           DWELL_TIME, TOTAL_TIME)
+
+
+TOTAL_TIME_REPORT = [
+    {'client_mac': 'aa:bb:cc:00:11:22', 'client_user': 'alice', 'client_type': 'Apple-iPhone', 'total_time': 900000},
+    {'client_mac': 'AABB.CC00.1123', 'total_time': 300000},
+    {'client_mac': '00:00:00:00:00:01', 'client_user': 'zoë', 'client_type': 'Apple-iPhone', 'total_time': 2 ** 40}
+]
+
+DWELL_TIME_REPORT = [
+    {'location': 'Global/San Jose/Building 24/Floor 1', 'start_time': 1600000000000, 'end_time': 1600000300000},
+    {'location': None, 'start_time': 1600000300000, 'end_time': 1600000600000},
+    {'location': 'Global/San Jose/Building 24/Floor 1', 'start_time': 1600000600000, 'end_time': 1600000900000}
+]
+
+
+def test_total_time_round_trip():
+    report = decode_report(encode_total_time_report(TOTAL_TIME_REPORT))
+    assert report.kind == TOTAL_TIME
+    assert len(report) == 3
+    # each string is saved once
+    assert sorted(report.strings) == ['Apple-iPhone', 'alice', 'zoë']
+    # the MAC addresses are loaded in the {aa:bb:cc:00:11:22} format, the missing strings are not in the rows
+    assert report.rows() == [
+        TOTAL_TIME_REPORT[0], {'client_mac': 'aa:bb:cc:00:11:23', 'total_time': 300000}, TOTAL_TIME_REPORT[2]]
+
+
+def test_dwell_time_round_trip(tmp_path):
+    path = tmp_path / 'dwell_total_time_aa:bb:cc:00:11:22.prx'
+    path.write_bytes(encode_dwell_time_report(DWELL_TIME_REPORT))
+    report = load_report(str(path))
+    assert report.kind == DWELL_TIME
+    assert report.rows() == DWELL_TIME_REPORT
+
+
+def test_empty_report_round_trip():
+    assert decode_report(encode_total_time_report([])).rows() == []
+    assert decode_report(encode_dwell_time_report([])).rows() == []
+
+
+def test_not_a_columnar_report():
+    with pytest.raises(ValueError):
+        decode_report(b'{"client_mac": "aa:bb:cc:00:11:22"}\n')
+
+
+def test_format_mac():
+    assert format_mac(0xaabbcc001122) == 'aa:bb:cc:00:11:22'
+    assert format_mac(1) == '00:00:00:00:00:01'
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+
+import threading
+
+from subscription_discovery import SubscriptionDiscovery, fetch_pages
+
+
+class PagedAPI:
+    """
+    Paginated API with {count} items, or unlimited if None. If {offset_supported} is False, the first page is always
+    returned.
+    """
+
+    def __init__(self, count, offset_supported=True):
+        self.count = count
+        self.offset_supported = offset_supported
+        self.offsets = []
+        self.lock = threading.Lock()
+
+    def fetch_page(self, offset, limit):
+        with self.lock:
+            self.offsets.append(offset)
+        if not self.offset_supported:
+            offset = 0
+        end = offset + limit if self.count is None else min(offset + limit, self.count)
+        return ['item%d' % index for index in range(offset, end)]
+
+
+def test_short_page():
+    api = PagedAPI(25)
+    assert fetch_pages(api.fetch_page, page_size=10, concurrency=2) == ['item%d' % index for index in range(25)]
+    assert sorted(api.offsets) == [0, 10, 20, 30]
+
+
+def test_empty_page():
+    api = PagedAPI(20)
+    assert fetch_pages(api.fetch_page, page_size=10, concurrency=1) == ['item%d' % index for index in range(20)]
+    assert api.offsets == [0, 10, 20]
+
+
+def test_repeated_page():
+    # the offset is ignored, the same page is returned again
+    api = PagedAPI(30, offset_supported=False)
+    assert fetch_pages(api.fetch_page, page_size=10, concurrency=3) == ['item%d' % index for index in range(10)]
+    assert sorted(api.offsets) == [0, 10, 20]
+
+
+def test_max_pages(capsys):
+    api = PagedAPI(None)
+    assert len(fetch_pages(api.fetch_page, page_size=10, concurrency=4, max_pages=6)) == 60
+    assert sorted(api.offsets) == list(range(0, 60, 10))
+    assert 'more than 6 pages' in capsys.readouterr().out
+
+
+class DiscoveryClient:
+    """
+    DNACClient with the pages of the destinations and the event subscriptions
+    """
+
+    def __init__(self, destinations, subscriptions):
+        self.destinations = PagedAPI(destinations)
+        self.subscriptions = PagedAPI(subscriptions)
+
+    def get_destination_details(self, offset, limit):
+        return [{'instanceId': item, 'url': 'https://webhook/' + item}
+                for item in self.destinations.fetch_page(offset, limit)]
+
+    def get_event_subscriptions(self, event_id, offset, limit):
+        assert event_id == 'NETWORK-CLIENTS-3-506'
+        return [{'name': item, 'subscriptionEndpoints': [{'instanceId': 'item%d' % (index % 3)}]}
+                for index, item in enumerate(self.subscriptions.fetch_page(offset, limit), offset)]
+
+
+def test_discover():
+    discovery = SubscriptionDiscovery(DiscoveryClient(5, 12), page_size=5).discover('NETWORK-CLIENTS-3-506')
+    assert len(discovery.destinations) == 5
+    assert len(discovery.subscriptions) == 12
+    assert discovery.destination('https://webhook/item2')['instanceId'] == 'item2'
+    assert discovery.destination('https://webhook/item9') is None
+    assert [subscription['name'] for subscription in discovery.destination_subscriptions('item1')] == [
+        'item1', 'item4', 'item7', 'item10']
+    assert discovery.destination_subscriptions('item4') == []
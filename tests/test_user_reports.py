@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+
+import copy
+import os
+
+import pytest
+
+from proximity_model import TimeSlice
+from proximity_reports import create_reports
+from report_format import load_report
+from synthetic_payload import make_payload
+from user_reports import ProcessedWindows, UserReports, check_folder_name
+
+
+MINUTE = 60 * 1000
+
+
+def report_rows(folder):
+    """
+    :return: dict of report file name: the sorted report rows
+    """
+    return {filename: sorted(map(str, load_report(os.path.join(folder, filename)).rows()))
+            for filename in sorted(os.listdir(folder)) if filename.endswith('.prx')}
+
+
+def total_time(folder):
+    """
+    :return: the sum of the total times of all the total time reports, in msec
+    """
+    return sum(row['total_time'] for filename in os.listdir(folder) if filename.startswith('proximity_total_time_')
+               for row in load_report(os.path.join(folder, filename)).rows())
+
+
+def shifted(payload, offset):
+    """
+    :return: a copy of the {payload} with all the times moved by {offset} msec
+    """
+    payload = copy.deepcopy(payload)
+    details = payload['details']
+    details['start_time'] += offset
+    details['end_time'] += offset
+    for data_set in details['client_proximity']:
+        for time_slice in data_set['client_info']:
+            time_slice['start_time'] += offset
+            time_slice['end_time'] += offset
+    return payload
+
+
+def test_second_device():
+    user_reports = UserReports('user_reports')
+    two_devices = make_payload(user_name='alice', days=1, contacts=10, devices=2)
+    one_device = copy.deepcopy(two_devices)
+    one_device['details']['client_proximity'] = one_device['details']['client_proximity'][:1]
+    first = create_reports(copy.deepcopy(one_device), user_reports=user_reports)
+    second = create_reports(copy.deepcopy(two_devices), user_reports=user_reports)
+    # the time slices of the first device are skipped, all the time slices of the second device are new
+    assert first['new_slices'] == first['slices'] == 288
+    assert second['slices'] == 576
+    assert second['new_slices'] == 288
+    expected = create_reports(copy.deepcopy(two_devices))
+    assert report_rows(second['folder']) == report_rows(expected['folder'])
+    assert len(report_rows(second['folder'])) == 4
+
+
+def test_same_notification_again():
+    user_reports = UserReports('user_reports')
+    payload = make_payload(user_name='alice', days=1, contacts=10)
+    first = create_reports(copy.deepcopy(payload), user_reports=user_reports)
+    before = report_rows(first['folder'])
+    second = create_reports(copy.deepcopy(payload), user_reports=user_reports)
+    assert second['new_slices'] == 0
+    assert report_rows(second['folder']) == before
+
+
+def test_overlapping_notifications():
+    user_reports = UserReports('user_reports')
+    payload = make_payload(user_name='alice', days=1, contacts=10)
+    create_reports(copy.deepcopy(payload), user_reports=user_reports)
+    # moved by 2 minutes, half of the resolution: only the last 2 minutes are new
+    later = shifted(payload, 2 * MINUTE)
+    info = create_reports(copy.deepcopy(later), user_reports=user_reports)
+    assert info['new_slices'] == 1
+    expected = create_reports(copy.deepcopy(payload))
+    last_slice = payload['details']['client_proximity'][0]['client_info'][-1]
+    assert total_time(info['folder']) == total_time(expected['folder']) + 2 * MINUTE * len(last_slice['users_info'])
+
+
+def test_new_slices():
+    processed_windows = ProcessedWindows([(10, 20), (30, 40)])
+    assert processed_windows.new_slices(TimeSlice('a', 12, 18, ())) == []
+    time_slice = TimeSlice('a', 40, 50, ())
+    assert processed_windows.new_slices(time_slice) == [time_slice]
+    parts = processed_windows.new_slices(TimeSlice('a', 5, 45, ()))
+    assert [(part.start_time, part.end_time) for part in parts] == [(5, 10), (20, 30), (40, 45)]
+
+
+@pytest.mark.parametrize('user_name', ['', '.', '..', '../alice', 'alice/reports', 'a\\b', '.hidden', None])
+def test_invalid_user_name(user_name):
+    with pytest.raises(ValueError):
+        check_folder_name(user_name)
+    with pytest.raises(ValueError):
+        UserReports('user_reports').user_folder(user_name)
+
+
+def test_invalid_user_name_notification():
+    payload = make_payload(user_name='../alice', days=1, contacts=10)
+    with pytest.raises(ValueError):
+        create_reports(payload, user_reports=UserReports('user_reports'))
+    assert not os.path.exists('alice')
@@ -0,0 +1,300 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+
+Copyright (c) 2021 Cisco and/or its affiliates.
+
+This software is licensed to you under the terms of the Cisco Sample
+Code License, Version 1.1 (the "License"). You may obtain a copy of the
+License at
+
+               https://developer.cisco.com/docs/licenses
+
+All use of the material herein must be in accordance with the terms of
+the License. All rights not expressly granted by the License are
+reserved. Unless required by applicable law or agreed to separately in
+writing, software distributed under the License is distributed on an "AS
+IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express
+or implied.
+
+"""
+
+__author__ = "Gabriel Zapodeanu TME, ENB"
+__email__ = "gzapodea@cisco.com"
+__version__ = "0.1.0"
+__copyright__ = "Copyright (c) 2021 Cisco and/or its affiliates."
+__license__ = "Cisco Sample Code License, Version 1.1"
+
+
+# The reports of each user are updated in place with each client proximity notification, in the folder
+# {<folder>/<user_name>}. The aggregates are saved to a sqlite database, {<folder>/user_reports.db}:
+#   client_windows - the time windows already processed for each client of the user, merged when overlapping or
+#                    adjacent
+#   user_contacts - the total time in proximity of each wireless client, for each client of the user
+#   user_dwell    - the dwell time intervals of each client of the user
+# Only the time slices outside the processed windows of their client are added, the time slices partly in a processed
+# window are cut to the new time. A notification overlapping the previous ones costs as much as its new time slices,
+# a client reported for the first time gets all its time slices.
+
+
+import bisect
+import contextlib
+import os
+import sqlite3
+import threading
+
+from proximity_model import TimeSlice, pack_mac
+from report_format import format_mac
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows, the users are locked in this process only
+    fcntl = None
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS client_windows (
+    user_name TEXT NOT NULL,
+    mac_address TEXT NOT NULL,
+    start_time INTEGER NOT NULL,
+    end_time INTEGER NOT NULL,
+    PRIMARY KEY (user_name, mac_address, start_time)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS user_contacts (
+    user_name TEXT NOT NULL,
+    mac_address TEXT NOT NULL,
+    client_mac TEXT NOT NULL,
+    client_user TEXT,
+    client_type TEXT,
+    total_time INTEGER NOT NULL,
+    PRIMARY KEY (user_name, mac_address, client_mac)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS user_dwell (
+    user_name TEXT NOT NULL,
+    mac_address TEXT NOT NULL,
+    start_time INTEGER NOT NULL,
+    end_time INTEGER NOT NULL,
+    location TEXT,
+    PRIMARY KEY (user_name, mac_address, start_time)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS user_dwell_end_time ON user_dwell (user_name, mac_address, end_time);
+'''
+
+user_locks = {}  # user_name: threading.Lock, used if fcntl is not available
+user_locks_lock = threading.Lock()
+
+
+def check_folder_name(user_name):
+    """
+    :param user_name: the username of the reported client, from the notification
+    :return: the {user_name}, if valid as the name of a folder in the reports folder
+    :raises ValueError: if the {user_name} is empty, has a path separator or starts with a dot, example {..}
+    """
+    if (not isinstance(user_name, str) or not user_name or user_name.startswith('.') or
+            any(character in user_name for character in '/\\\0')):
+        raise ValueError('The user_name is not a valid folder name: ' + repr(user_name))
+    return user_name
+
+
+class ProcessedWindows:
+    """
+    The time windows already processed for a client of a user, sorted and not overlapping
+    """
+
+    def __init__(self, windows):
+        """
+        :param windows: list of (start_time, end_time), epoch times in msec
+        """
+        self.windows = sorted(windows)
+        self.start_times = [start_time for start_time, _ in self.windows]
+
+    def new_slices(self, time_slice):
+        """
+        Cut the time slice to the time not processed before
+        :param time_slice: TimeSlice
+        :return: list of TimeSlice, empty if the time slice was already processed, the {time_slice} if not overlapping
+        any processed window, else the parts of the time slice outside the processed windows
+        """
+        start_time = time_slice.start_time
+        end_time = time_slice.end_time
+        index = bisect.bisect_right(self.start_times, start_time) - 1
+        if start_time >= end_time:
+            return [] if index >= 0 and end_time <= self.windows[index][1] else [time_slice]
+        parts = []
+        for window_start, window_end in self.windows[max(0, index):]:
+            if window_start >= end_time:
+                break
+            if window_end <= start_time:
+                continue
+            if window_start > start_time:
+                parts.append((start_time, window_start))
+            start_time = window_end
+            if start_time >= end_time:
+                break
+        if start_time < end_time:
+            parts.append((start_time, end_time))
+        if parts == [(time_slice.start_time, time_slice.end_time)]:
+            return [time_slice]
+        return [TimeSlice(time_slice.location, part_start, part_end, time_slice.users_info)
+                for part_start, part_end in parts]
+
+
+class UserReports:
+    """
+    The aggregates of the reports of each user, updated with the time slices not processed before
+    """
+
+    def __init__(self, folder):
+        """
+        :param folder: folder of the user report folders and the database
+        """
+        self.folder = folder
+        self.db_path = os.path.join(folder, 'user_reports.db')
+        os.makedirs(folder, exist_ok=True)
+        db = self.connect()
+        try:
+            db.execute('PRAGMA journal_mode=WAL')
+            db.executescript(SCHEMA)
+        finally:
+            db.close()
+
+    def connect(self):
+        """
+        Open a new connection to the database, each thread and process uses its own connection
+        :return: sqlite connection
+        """
+        return sqlite3.connect(self.db_path, timeout=60)
+
+    def user_folder(self, user_name):
+        """
+        Find the report folder of the user, created at first use
+        :param user_name: the username of the reported client
+        :return: the folder name
+        :raises ValueError: if the {user_name} is not a valid folder name, example with a path separator
+        """
+        folder_name = os.path.join(self.folder, check_folder_name(user_name))
+        os.makedirs(folder_name, exist_ok=True)
+        return folder_name
+
+    @contextlib.contextmanager
+    def lock(self, user_name):
+        """
+        Lock the reports of the user, the notifications of the same user are merged one at a time, by all the threads
+        and processes
+        :param user_name: the username of the reported client
+        """
+        if fcntl is None:
+            with user_locks_lock:
+                user_lock = user_locks.setdefault(user_name, threading.Lock())
+            with user_lock:
+                yield
+            return
+        with open(os.path.join(self.user_folder(user_name), '.lock'), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def windows(self, user_name, mac_address):
+        """
+        :param user_name: the username of the reported client
+        :param mac_address: MAC address of the reported wireless client
+        :return: ProcessedWindows of the client
+        """
+        db = self.connect()
+        try:
+            return ProcessedWindows(db.execute('SELECT start_time, end_time FROM client_windows '
+                                               'WHERE user_name = ? AND mac_address = ?',
+                                               (user_name, mac_address)).fetchall())
+        finally:
+            db.close()
+
+    def merge(self, user_name, start_time, end_time, clients):
+        """
+        Add the new aggregates of the user and the processed window of each client, in one transaction
+        :param user_name: the username of the reported client
+        :param start_time: start of the notification window, epoch time in msec
+        :param end_time: end of the notification window, epoch time in msec
+        :param clients: list of (mac_address, contacts, dwell_time) of the time slices not processed before, the
+        contacts as (client_mac, client_user, client_type, total_time), the client_mac packed to an int, and the dwell
+        time intervals sorted by time, as dicts with location, start_time and end_time
+        :return:
+        """
+        db = self.connect()
+        try:
+            with db:
+                db.execute('BEGIN IMMEDIATE')
+                for mac_address, contacts, dwell_time in clients:
+                    db.executemany(
+                        'INSERT INTO user_contacts (user_name, mac_address, client_mac, client_user, client_type, '
+                        'total_time) VALUES (?, ?, ?, ?, ?, ?) '
+                        'ON CONFLICT (user_name, mac_address, client_mac) DO UPDATE SET '
+                        'client_user = COALESCE(excluded.client_user, client_user), '
+                        'client_type = COALESCE(excluded.client_type, client_type), '
+                        'total_time = total_time + excluded.total_time',
+                        [(user_name, mac_address, format_mac(client_mac), client_user, client_type, total_time)
+                         for client_mac, client_user, client_type, total_time in contacts])
+                    for interval in dwell_time:
+                        self._merge_interval(db, user_name, mac_address, interval)
+                    self._merge_window(db, user_name, mac_address, start_time, end_time)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _merge_interval(db, user_name, mac_address, interval):
+        # joined with the intervals at the same location ending at its start or starting at its end
+        location = interval['location']
+        start_time = interval['start_time']
+        end_time = interval['end_time']
+        previous = db.execute('SELECT start_time, location FROM user_dwell '
+                              'WHERE user_name = ? AND mac_address = ? AND end_time = ?',
+                              (user_name, mac_address, start_time)).fetchone()
+        if previous is not None and previous[1] == location:
+            start_time = previous[0]
+            db.execute('DELETE FROM user_dwell WHERE user_name = ? AND mac_address = ? AND start_time = ?',
+                       (user_name, mac_address, start_time))
+        following = db.execute('SELECT end_time, location FROM user_dwell '
+                               'WHERE user_name = ? AND mac_address = ? AND start_time = ?',
+                               (user_name, mac_address, end_time)).fetchone()
+        if following is not None and following[1] == location:
+            db.execute('DELETE FROM user_dwell WHERE user_name = ? AND mac_address = ? AND start_time = ?',
+                       (user_name, mac_address, end_time))
+            end_time = following[0]
+        db.execute('INSERT OR REPLACE INTO user_dwell (user_name, mac_address, start_time, end_time, location) '
+                   'VALUES (?, ?, ?, ?, ?)', (user_name, mac_address, start_time, end_time, location))
+
+    @staticmethod
+    def _merge_window(db, user_name, mac_address, start_time, end_time):
+        overlapping = db.execute('SELECT start_time, end_time FROM client_windows '
+                                 'WHERE user_name = ? AND mac_address = ? AND start_time <= ? AND end_time >= ?',
+                                 (user_name, mac_address, end_time, start_time)).fetchall()
+        for window_start, window_end in overlapping:
+            start_time = min(start_time, window_start)
+            end_time = max(end_time, window_end)
+        db.executemany('DELETE FROM client_windows WHERE user_name = ? AND mac_address = ? AND start_time = ?',
+                       [(user_name, mac_address, window_start) for window_start, _ in overlapping])
+        db.execute('INSERT INTO client_windows (user_name, mac_address, start_time, end_time) VALUES (?, ?, ?, ?)',
+                   (user_name, mac_address, start_time, end_time))
+
+    def client_aggregates(self, user_name, mac_address):
+        """
+        Find all the aggregates of one client of the user
+        :param user_name: the username of the reported client
+        :param mac_address: MAC address of the reported wireless client
+        :return: the contacts, dict of client_mac: [client_mac, client_user, client_type, total_time] with the
+        client_mac packed to an int, and the dwell time intervals sorted by time
+        """
+        db = self.connect()
+        try:
+            contacts = {}
+            for client_mac, client_user, client_type, total_time in db.execute(
+                    'SELECT client_mac, client_user, client_type, total_time FROM user_contacts '
+                    'WHERE user_name = ? AND mac_address = ?', (user_name, mac_address)):
+                client_mac = pack_mac(client_mac)
+                contacts[client_mac] = [client_mac, client_user, client_type, total_time]
+            dwell_time = [{'location': location, 'start_time': start_time, 'end_time': end_time}
+                          for location, start_time, end_time in db.execute(
+                              'SELECT location, start_time, end_time FROM user_dwell '
+                              'WHERE user_name = ? AND mac_address = ? ORDER BY start_time',
+                              (user_name, mac_address))]
+        finally:
+            db.close()
+        return contacts, dwell_time